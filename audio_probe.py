@@ -0,0 +1,495 @@
+"""
+Header-only Audio Probe
+Baca sample rate, channels, codec, duration dan bit rate langsung dari container
+header (WAV, FLAC, WebM/Matroska, M4A/MP4) tanpa menjalankan ffprobe per file
+"""
+
+import argparse
+import json
+import os
+import struct
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from manifest import find_audio_file
+
+logger = logging.getLogger(__name__)
+
+# WAV format tags
+WAVE_FORMATS = {
+    0x0001: 'pcm_s16le',
+    0x0003: 'pcm_f32le',
+    0x0006: 'pcm_alaw',
+    0x0007: 'pcm_mulaw',
+    0xFFFE: 'pcm_s16le',  # WAVE_FORMAT_EXTENSIBLE, di-refine dari bits per sample
+}
+
+# Matroska element IDs
+EBML_HEADER = 0x1A45DFA3
+MKV_SEGMENT = 0x18538067
+MKV_INFO = 0x1549A966
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+MKV_TRACKS = 0x1654AE6B
+MKV_TRACK_ENTRY = 0xAE
+MKV_TRACK_TYPE = 0x83
+MKV_CODEC_ID = 0x86
+MKV_AUDIO = 0xE1
+MKV_SAMPLING_FREQUENCY = 0xB5
+MKV_CHANNELS = 0x9F
+MKV_BIT_DEPTH = 0x6264
+MKV_CLUSTER = 0x1F43B675
+
+# Matroska CodecID -> nama codec ala yt-dlp/ffmpeg
+MKV_CODECS = {
+    'A_OPUS': 'opus',
+    'A_VORBIS': 'vorbis',
+    'A_AAC': 'aac',
+    'A_FLAC': 'flac',
+    'A_MPEG/L3': 'mp3',
+}
+
+# MP4 container boxes yang di-walk untuk sampai ke stsd
+MP4_CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+
+
+class ProbeError(ValueError):
+    """File bukan format yang dikenal atau header-nya rusak"""
+
+
+def _read_exact(f: BinaryIO, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise ProbeError("Unexpected end of file")
+    return data
+
+
+def _probe_wav(f: BinaryIO, file_size: int) -> Dict:
+    header = _read_exact(f, 12)
+    if header[:4] not in (b'RIFF', b'RF64') or header[8:12] != b'WAVE':
+        raise ProbeError("Not a WAV file")
+
+    fmt = None
+    data_size = None
+    while fmt is None or data_size is None:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            break
+        chunk_id, chunk_size = struct.unpack('<4sI', chunk)
+        if chunk_id == b'fmt ':
+            fmt = _read_exact(f, chunk_size)
+            f.seek(chunk_size % 2, os.SEEK_CUR)
+        elif chunk_id == b'data':
+            # ffmpeg yang menulis ke pipe meninggalkan size 0 / 0xFFFFFFFF
+            data_size = min(chunk_size, file_size - f.tell()) if chunk_size not in (0, 0xFFFFFFFF) \
+                else file_size - f.tell()
+        else:
+            f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+    if fmt is None or len(fmt) < 16:
+        raise ProbeError("WAV file without fmt chunk")
+
+    format_tag, channels, sample_rate, byte_rate, _, bits = struct.unpack('<HHIIHH', fmt[:16])
+    codec = WAVE_FORMATS.get(format_tag, f'wav_0x{format_tag:04x}')
+    if codec.startswith('pcm_s') and bits != 16:
+        codec = 'pcm_u8' if bits == 8 else f'pcm_s{bits}le'
+
+    return {
+        "format": "wav",
+        "codec": codec,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "bits_per_sample": bits,
+        "duration_sec": data_size / byte_rate if byte_rate and data_size is not None else None,
+        "bit_rate": byte_rate * 8 / 1000 if byte_rate else None,
+    }
+
+
+def _probe_flac(f: BinaryIO, file_size: int) -> Dict:
+    if _read_exact(f, 4) != b'fLaC':
+        raise ProbeError("Not a FLAC file")
+    block_header = _read_exact(f, 4)
+    if block_header[0] & 0x7F != 0:
+        raise ProbeError("FLAC file without STREAMINFO")
+    info = _read_exact(f, 34)
+
+    # 20 bits sample rate | 3 bits channels-1 | 5 bits bps-1 | 36 bits total samples
+    packed = int.from_bytes(info[10:18], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    bits = ((packed >> 36) & 0x1F) + 1
+    total_samples = packed & 0xFFFFFFFFF
+
+    duration = total_samples / sample_rate if sample_rate and total_samples else None
+    return {
+        "format": "flac",
+        "codec": "flac",
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "bits_per_sample": bits,
+        "duration_sec": duration,
+        "bit_rate": file_size * 8 / duration / 1000 if duration else None,
+    }
+
+
+def _read_vint(f: BinaryIO, keep_marker: bool) -> Tuple[int, int]:
+    """Baca EBML variable-length integer, return (value, jumlah byte)"""
+    first = f.read(1)
+    if not first:
+        raise EOFError
+    first = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ProbeError("Invalid EBML variable-length integer")
+    value = first if keep_marker else first & (mask - 1)
+    for byte in _read_exact(f, length - 1):
+        value = (value << 8) | byte
+    return value, length
+
+
+def _iter_ebml(f: BinaryIO, end: int) -> Iterator[Tuple[int, int, int]]:
+    """Iterate child elements sampai offset `end`, yield (id, data offset, size)"""
+    while f.tell() < end:
+        try:
+            element_id, _ = _read_vint(f, keep_marker=True)
+            size, size_len = _read_vint(f, keep_marker=False)
+        except EOFError:
+            return
+        start = f.tell()
+        if size == (1 << (7 * size_len)) - 1:  # unknown size (live / streaming muxer)
+            size = end - start
+        yield element_id, start, size
+        f.seek(start + size)
+
+
+def _ebml_uint(data: bytes) -> int:
+    return int.from_bytes(data, 'big') if data else 0
+
+
+def _ebml_float(data: bytes) -> Optional[float]:
+    if len(data) == 4:
+        return struct.unpack('>f', data)[0]
+    if len(data) == 8:
+        return struct.unpack('>d', data)[0]
+    return None
+
+
+def _probe_matroska(f: BinaryIO, file_size: int) -> Dict:
+    element_id, _ = _read_vint(f, keep_marker=True)
+    if element_id != EBML_HEADER:
+        raise ProbeError("Not a Matroska/WebM file")
+    f.seek(0)
+
+    result = {"format": "webm", "codec": None, "sample_rate": None, "channels": None,
+              "bits_per_sample": None, "duration_sec": None, "bit_rate": None}
+    timecode_scale = 1_000_000
+    duration = None
+
+    for element_id, start, size in _iter_ebml(f, file_size):
+        if element_id != MKV_SEGMENT:
+            continue
+        for child_id, child_start, child_size in _iter_ebml(f, start + size):
+            if child_id == MKV_CLUSTER:
+                break  # header selesai, sisanya media data
+            if child_id == MKV_INFO:
+                for info_id, info_start, info_size in _iter_ebml(f, child_start + child_size):
+                    if info_id in (MKV_TIMECODE_SCALE, MKV_DURATION):
+                        f.seek(info_start)
+                        data = _read_exact(f, info_size)
+                        if info_id == MKV_TIMECODE_SCALE:
+                            timecode_scale = _ebml_uint(data)
+                        else:
+                            duration = _ebml_float(data)
+            elif child_id == MKV_TRACKS:
+                for track_id, track_start, track_size in _iter_ebml(f, child_start + child_size):
+                    if track_id != MKV_TRACK_ENTRY:
+                        continue
+                    track = _probe_matroska_track(f, track_start + track_size)
+                    if track.pop("track_type", None) == 2 and result["codec"] is None:
+                        result.update(track)
+        break
+
+    if result["codec"] is None:
+        raise ProbeError("No audio track in Matroska header")
+    if duration:
+        result["duration_sec"] = duration * timecode_scale / 1e9
+        result["bit_rate"] = file_size * 8 / result["duration_sec"] / 1000
+    return result
+
+
+def _probe_matroska_track(f: BinaryIO, end: int) -> Dict:
+    track = {}
+    for element_id, start, size in _iter_ebml(f, end):
+        if element_id == MKV_TRACK_TYPE:
+            f.seek(start)
+            track["track_type"] = _ebml_uint(_read_exact(f, size))
+        elif element_id == MKV_CODEC_ID:
+            f.seek(start)
+            codec_id = _read_exact(f, size).rstrip(b'\0').decode('ascii', 'replace')
+            track["codec"] = MKV_CODECS.get(codec_id, codec_id.lower())
+        elif element_id == MKV_AUDIO:
+            for audio_id, audio_start, audio_size in _iter_ebml(f, start + size):
+                f.seek(audio_start)
+                data = _read_exact(f, audio_size)
+                if audio_id == MKV_SAMPLING_FREQUENCY:
+                    track["sample_rate"] = int(_ebml_float(data) or 0) or None
+                elif audio_id == MKV_CHANNELS:
+                    track["channels"] = _ebml_uint(data)
+                elif audio_id == MKV_BIT_DEPTH:
+                    track["bits_per_sample"] = _ebml_uint(data)
+    return track
+
+
+def _iter_mp4_boxes(f: BinaryIO, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Iterate MP4 boxes sampai offset `end`, yield (type, payload offset, payload size)"""
+    while f.tell() + 8 <= end:
+        size, box_type = struct.unpack('>I4s', _read_exact(f, 8))
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', _read_exact(f, 8))[0]
+            header = 16
+        elif size == 0:
+            size = end - f.tell() + 8
+        start = f.tell()
+        if size < header:
+            raise ProbeError("Invalid MP4 box size")
+        yield box_type, start, size - header
+        f.seek(start + size - header)
+
+
+def _mp4_duration(payload: bytes) -> Optional[float]:
+    """Duration dari mvhd/mdhd payload (version 0 atau 1)"""
+    if payload[0] == 1:
+        timescale, duration = struct.unpack('>IQ', payload[20:32])
+    else:
+        timescale, duration = struct.unpack('>II', payload[12:20])
+    return duration / timescale if timescale and duration else None
+
+
+def _mp4_esds_bitrate(payload: bytes) -> Optional[float]:
+    """avgBitrate dari DecoderConfigDescriptor (tag 0x04) di dalam esds"""
+    pos = 4  # version + flags
+    while pos < len(payload):
+        tag = payload[pos]
+        pos += 1
+        length = 0
+        for _ in range(4):
+            byte = payload[pos]
+            pos += 1
+            length = (length << 7) | (byte & 0x7F)
+            if not byte & 0x80:
+                break
+        if tag == 0x03:
+            pos += 3  # ES_ID + flags, lalu masuk ke nested descriptor
+        elif tag == 0x04:
+            avg_bitrate = struct.unpack('>I', payload[pos + 9:pos + 13])[0]
+            return avg_bitrate / 1000 if avg_bitrate else None
+        else:
+            pos += length
+    return None
+
+
+def _probe_mp4(f: BinaryIO, file_size: int) -> Dict:
+    f.seek(4)
+    if _read_exact(f, 4) != b'ftyp':
+        raise ProbeError("Not an MP4/M4A file")
+    f.seek(0)
+
+    result = {"format": "m4a", "codec": None, "sample_rate": None, "channels": None,
+              "bits_per_sample": None, "duration_sec": None, "bit_rate": None}
+    movie_duration = None
+    track_duration = None
+    handler = None
+
+    def walk(end: int):
+        nonlocal movie_duration, track_duration, handler
+        for box_type, start, size in _iter_mp4_boxes(f, end):
+            if box_type in MP4_CONTAINERS:
+                if box_type == b'trak':
+                    if result["codec"] is not None:
+                        continue
+                    track_duration, handler = None, None
+                walk(start + size)
+                f.seek(start + size)
+            elif box_type in (b'mvhd', b'mdhd', b'hdlr', b'stsd'):
+                payload = _read_exact(f, min(size, 4096))
+                if box_type == b'mvhd':
+                    movie_duration = _mp4_duration(payload)
+                elif box_type == b'mdhd':
+                    track_duration = _mp4_duration(payload)
+                elif box_type == b'hdlr':
+                    # version/flags (4) + pre_defined (4) + handler_type: soun / vide / text ...
+                    handler = payload[8:12]
+                elif box_type == b'stsd' and handler in (None, b'soun'):
+                    _probe_mp4_sample_entry(payload, result, track_duration)
+            elif box_type == b'mdat' and result["codec"] is not None:
+                return
+
+    walk(file_size)
+    if result["codec"] is None:
+        raise ProbeError("No audio sample entry in MP4 header")
+    result["duration_sec"] = result.pop("track_duration", None) or movie_duration
+    if result["bit_rate"] is None and result["duration_sec"]:
+        result["bit_rate"] = file_size * 8 / result["duration_sec"] / 1000
+    return result
+
+
+def _probe_mp4_sample_entry(payload: bytes, result: Dict, track_duration: Optional[float]):
+    """Parse stsd: ambil sample entry audio pertama (mp4a, Opus, fLaC, ...)"""
+    if len(payload) < 16:
+        return
+    entry_size, entry_type = struct.unpack('>I4s', payload[8:16])
+    entry = payload[16:8 + entry_size]
+    if len(entry) < 28:
+        return
+    # SampleEntry (8 bytes) + reserved (8) + channelcount, samplesize, pre_defined, reserved, samplerate 16.16
+    channels, sample_size = struct.unpack('>HH', entry[16:20])
+    sample_rate = struct.unpack('>I', entry[24:28])[0] >> 16
+    codec = entry_type.decode('ascii', 'replace').strip().lower()
+    result.update({
+        "codec": {'mp4a': 'aac', 'fla': 'flac'}.get(codec, codec),
+        "sample_rate": sample_rate or None,
+        "channels": channels or None,
+        "bits_per_sample": sample_size or None,
+        "track_duration": track_duration,
+    })
+
+    # Child boxes setelah AudioSampleEntry (esds untuk AAC)
+    pos = 28
+    while pos + 8 <= len(entry):
+        size, box_type = struct.unpack('>I4s', entry[pos:pos + 8])
+        if size < 8:
+            break
+        if box_type == b'esds':
+            result["bit_rate"] = _mp4_esds_bitrate(entry[pos + 8:pos + size])
+        pos += size
+
+
+# Magic bytes -> parser
+PROBES = (
+    (lambda head: head[:4] in (b'RIFF', b'RF64'), _probe_wav),
+    (lambda head: head[:4] == b'fLaC', _probe_flac),
+    (lambda head: head[:4] == b'\x1a\x45\xdf\xa3', _probe_matroska),
+    (lambda head: head[4:8] == b'ftyp', _probe_mp4),
+)
+
+
+def probe_audio(path: str) -> Dict:
+    """
+    Baca metadata audio dari container header (tanpa decode, tanpa subprocess)
+
+    Args:
+        path: File audio (.wav, .flac, .webm/.mka, .m4a/.mp4)
+
+    Returns:
+        Dict dengan format, codec, sample_rate, channels, bits_per_sample,
+        duration_sec, bit_rate (kbps) dan file_size
+
+    Raises:
+        ProbeError: Format tidak dikenal atau header rusak
+    """
+    path = Path(path)
+    file_size = path.stat().st_size
+    with open(path, 'rb') as f:
+        head = f.read(12)
+        for matches, parser in PROBES:
+            if matches(head):
+                f.seek(0)
+                try:
+                    result = parser(f, file_size)
+                except (struct.error, IndexError) as e:
+                    raise ProbeError(f"Corrupt header in {path.name}: {e}") from e
+                break
+        else:
+            raise ProbeError(f"Unsupported audio container: {path.name}")
+
+    result["file_size"] = file_size
+    for key in ("duration_sec", "bit_rate"):
+        if result.get(key) is not None:
+            result[key] = round(result[key], 3)
+    return result
+
+
+def _probe_video_dir(video_dir: Path, update: bool) -> Optional[Dict]:
+    """Probe satu folder downloads/{channel}/{video_id}/ (dan update json-nya)"""
+    video_id = video_dir.name
+    audio_file = find_audio_file(video_dir, video_id)
+    if not audio_file:
+        return None
+
+    result = {"video_id": video_id, "audio_file": str(audio_file)}
+    try:
+        probe = probe_audio(audio_file)
+    except (ProbeError, OSError) as e:
+        result["error"] = str(e)
+        return result
+    result["audio_metadata"] = probe
+
+    metadata_file = video_dir / f"{video_id}.json"
+    if update and metadata_file.exists():
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        metadata.setdefault("audio_metadata", {}).update(probe)
+        tmp_file = metadata_file.with_name(metadata_file.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, metadata_file)
+        result["updated"] = True
+    return result
+
+
+def probe_tree(base_dir: str, max_workers: int = 8, update: bool = False) -> List[Dict]:
+    """
+    Probe semua audio di downloads/{channel}/{video_id}/ secara paralel
+
+    Args:
+        base_dir: Base output directory (e.g., downloads)
+        max_workers: Jumlah thread (kerja per file hanya beberapa KB read)
+        update: Tulis hasil probe ke audio_metadata di {video_id}.json
+
+    Returns:
+        List of dict per video (video_id, audio_file, audio_metadata atau error)
+    """
+    base_path = Path(base_dir)
+    if not base_path.is_dir():
+        return []
+
+    video_dirs = [
+        video_dir
+        for channel_dir in sorted(p for p in base_path.iterdir() if p.is_dir() and not p.name.startswith('.'))
+        for video_dir in sorted(p for p in channel_dir.iterdir() if p.is_dir())
+    ]
+    logger.info(f"Probing {len(video_dirs)} video folders in {base_path}")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda d: _probe_video_dir(d, update), video_dirs)
+        return [result for result in results if result]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-probe audio files in a downloads tree')
+    parser.add_argument('base_dir', nargs='?', default='downloads',
+                        help='Downloads directory (default: downloads)')
+    parser.add_argument('--workers', type=int, default=8, help='Parallel probes (default: 8)')
+    parser.add_argument('--update', action='store_true',
+                        help='Write probed values into each {video_id}.json')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    results = probe_tree(args.base_dir, max_workers=args.workers, update=args.update)
+    errors = [r for r in results if "error" in r]
+    for result in errors:
+        logger.warning(f"✗ {result['audio_file']}: {result['error']}")
+    logger.info(f"Probed {len(results) - len(errors)} files, {len(errors)} errors"
+                + (" (metadata updated)" if args.update else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,25 @@ Reads channel list from file and downloads all audio with metadata
 """
 
 import sys
-import json
 import argparse
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 import logging
 
 from yt_downloader import YTDownloader
+from scheduler import ChannelScheduler, HostRateLimiter, QueueScheduler
+from dedup_store import DedupStore, LINK_MODES
+from manifest import DownloadManifest
+from tar_sink import TarShardSink
+from work_queue import RETRY_BACKOFF, open_queue
+from planner import DEFAULT_AUDIO_KBPS, PLAN_ORDERS, collect_listings, parse_size, plan_downloads
+from channel_cache import ChannelListingCache
+from transcode import TranscodePool
+from rate_controller import AIMDRateController
+from identity_pool import IdentityPool
+from result_journal import ResultJournal, compact_journal, load_video_states
+from metrics import MetricsExporter, MetricsRegistry
+from profiling import Profiler, profile_dir_for
 
 # Setup logging
 logging.basicConfig(
@@ -67,20 +79,67 @@ def read_channel_list(filename: str) -> List[Tuple[str, str]]:
         sys.exit(1)
 
 
-def save_batch_results(results: dict, output_file: str = "batch_results.json"):
+def plan_resume(
+    channels: List[Tuple[str, str]],
+    journal_path: str,
+    results_file: Optional[str],
+    manifest: DownloadManifest,
+    resume: bool = True,
+    retry_failed: bool = False
+) -> Tuple[List[Tuple[str, str]], Dict[str, Set[str]], Dict[str, List[str]]]:
     """
-    Save batch processing results to JSON file
+    Bangun ulang sisa pekerjaan dari journal, final results, dan manifest
 
     Args:
-        results: Results dictionary
-        output_file: Output filename
+        channels: List of (channel_name, channel_url)
+        journal_path: Journal dari run sebelumnya
+        results_file: Final results dari run sebelumnya
+        manifest: Download manifest (state di disk)
+        resume: Lewati channel yang sudah selesai dan video yang sudah punya status final
+        retry_failed: Download ulang video yang gagal
+
+    Returns:
+        (channels yang masih perlu diproses,
+         skip_ids per channel untuk channel listing,
+         video_urls eksplisit per channel tanpa listing)
     """
-    try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
-        logger.info(f"\nResults saved to: {output_file}")
-    except Exception as e:
-        logger.error(f"Error saving results: {e}")
+    states, completed = load_video_states(journal_path, results_file)
+
+    # Manifest = state di disk: success hanya dihitung kalau file masih ada,
+    # file yang hilang di-download ulang
+    for entry in manifest.entries():
+        channel_states = states.setdefault(entry['channel_name'], {})
+        state = channel_states.setdefault(entry['video_id'], {"status": None, "video_url": None})
+        if entry['status'] == 'success':
+            on_disk = bool(entry['output_path']) and Path(entry['output_path']).exists()
+            state['status'] = 'success' if on_disk else 'failed'
+        elif state['status'] is None:
+            state['status'] = entry['status']
+
+    planned, skip_ids, video_urls = [], {}, {}
+    for channel_name, channel_url in channels:
+        channel_states = states.get(channel_name, {})
+        done = {vid for vid, state in channel_states.items() if state['status'] in ('success', 'skipped')}
+        failed = {
+            vid: state['video_url'] or f"https://www.youtube.com/watch?v={vid}"
+            for vid, state in channel_states.items() if state['status'] == 'failed'
+        }
+
+        # Channel "selesai" tanpa satu video pun biasanya listing yang gagal: listing ulang
+        finished = channel_name in completed and bool(channel_states)
+        if resume and not finished:
+            # Channel belum selesai: listing (dari cache) lalu lewati yang sudah final
+            skip_ids[channel_name] = done if retry_failed else done | set(failed)
+            planned.append((channel_name, channel_url))
+        elif retry_failed and failed:
+            # Channel selesai (atau mode retry saja): hanya video yang gagal, tanpa listing
+            video_urls[channel_name] = list(failed.values())
+            planned.append((channel_name, channel_url))
+
+    logger.info(f"Resume plan: {len(planned)}/{len(channels)} channels left, "
+                f"{sum(len(urls) for urls in video_urls.values())} failed videos to retry, "
+                f"{sum(len(ids) for ids in skip_ids.values())} videos already done")
+    return planned, skip_ids, video_urls
 
 
 def main():
@@ -124,6 +183,50 @@ def main():
         default=None,
         help='Maximum videos to download per channel (default: all)'
     )
+    parser.add_argument(
+        '--max-hours',
+        type=float,
+        default=None,
+        help='Dataset target in hours of audio (already downloaded videos count); videos are picked '
+             'from listing durations until the target is reached'
+    )
+    parser.add_argument(
+        '--max-bytes',
+        type=str,
+        default=None,
+        help='Download budget for this run, e.g. 50G (estimated from duration x --audio-kbps)'
+    )
+    parser.add_argument(
+        '--channel-max-hours',
+        type=float,
+        default=None,
+        help='Quota in hours of audio per channel'
+    )
+    parser.add_argument(
+        '--min-duration',
+        type=float,
+        default=None,
+        help='Skip videos shorter than this many seconds (e.g. 60 for Shorts)'
+    )
+    parser.add_argument(
+        '--max-duration',
+        type=float,
+        default=None,
+        help='Skip videos longer than this many seconds (e.g. long livestreams)'
+    )
+    parser.add_argument(
+        '--plan-order',
+        choices=PLAN_ORDERS,
+        default=None,
+        help='Order of planned videos: longest first over all channels (default), balanced '
+             '(round-robin over channels, longest first) or listing (round-robin, newest first)'
+    )
+    parser.add_argument(
+        '--audio-kbps',
+        type=float,
+        default=DEFAULT_AUDIO_KBPS,
+        help=f'Audio bitrate used to estimate bytes for --max-bytes (default: {DEFAULT_AUDIO_KBPS})'
+    )
     parser.add_argument(
         '--max-channels',
         type=int,
@@ -136,6 +239,250 @@ def main():
         default=None,
         help='Path to browser cookies file (optional, helps avoid 403)'
     )
+    parser.add_argument(
+        '--cookies-files',
+        nargs='+',
+        default=None,
+        help='Several cookies files, one identity each; videos rotate across them and '
+             'every identity gets its own --host-rate bucket and cooldown'
+    )
+    parser.add_argument(
+        '--identities-file',
+        type=str,
+        default=None,
+        help='JSON list of identities [{"name", "cookies_file", "headers"}] (alternative to --cookies-files)'
+    )
+    parser.add_argument(
+        '--identity-cooldown',
+        type=float,
+        default=300.0,
+        help='Seconds an identity rests after 403/429 or repeated failures, doubling on repeats (default: 300)'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=1,
+        help='Number of channels downloaded at the same time (default: 1)'
+    )
+    parser.add_argument(
+        '--host-rate',
+        type=float,
+        default=None,
+        help='Max requests per second per host, shared by all workers '
+             '(default: 1/sleep-min)'
+    )
+    parser.add_argument(
+        '--host-burst',
+        type=float,
+        default=1.0,
+        help='Token bucket burst size per host (default: 1)'
+    )
+    parser.add_argument(
+        '--adaptive-rate',
+        action='store_true',
+        help='Raise bandwidth and shorten sleeps while downloads succeed, back off on 403/429 (AIMD)'
+    )
+    parser.add_argument(
+        '--rate-state-file',
+        type=str,
+        default=None,
+        help='JSON file where --adaptive-rate keeps the learned rate between runs '
+             '(default: <output-dir>/.rate_state.json)'
+    )
+    parser.add_argument(
+        '--max-rate-limit',
+        type=str,
+        default='8M',
+        help='Upper bound for --adaptive-rate download rate (default: 8M)'
+    )
+    parser.add_argument(
+        '--manifest',
+        type=str,
+        default=None,
+        help='SQLite download manifest, finished videos are skipped '
+             '(default: <output-dir>/manifest.sqlite)'
+    )
+    parser.add_argument(
+        '--rebuild-manifest',
+        action='store_true',
+        help='Scan existing output directory and record finished videos in the manifest first'
+    )
+    parser.add_argument(
+        '--output-format',
+        choices=['folder', 'tar'],
+        default='folder',
+        help='folder = downloads/{channel}/{video_id}/ per video, tar = pack audio + metadata '
+             'into sequential tar shards with an offset index (default: folder)'
+    )
+    parser.add_argument(
+        '--shard-dir',
+        type=str,
+        default=None,
+        help='Output directory for --output-format tar (default: <output-dir>/shards)'
+    )
+    parser.add_argument(
+        '--shard-size-mb',
+        type=int,
+        default=1024,
+        help='Target size per tar shard in MB (default: 1024)'
+    )
+    parser.add_argument(
+        '--dedup',
+        action='store_true',
+        help='Store audio once per content hash and hardlink videos that appear in several '
+             'channels instead of downloading them again'
+    )
+    parser.add_argument(
+        '--dedup-dir',
+        type=str,
+        default=None,
+        help='Content-addressed store for --dedup, same filesystem as --output-dir '
+             '(default: <output-dir>/.store)'
+    )
+    parser.add_argument(
+        '--dedup-mode',
+        choices=LINK_MODES,
+        default='hardlink',
+        help='hardlink = audio file in every channel folder, reference = metadata points '
+             'to the store object (default: hardlink)'
+    )
+    parser.add_argument(
+        '--listing-cache-dir',
+        type=str,
+        default=None,
+        help='Directory for cached channel listings (default: <output-dir>/.channel_cache)'
+    )
+    parser.add_argument(
+        '--no-listing-cache',
+        action='store_true',
+        help='Always do a full channel listing instead of stopping at the last-seen video'
+    )
+    parser.add_argument(
+        '--transcode',
+        action='store_true',
+        help='Download without inline ffmpeg and convert in a separate process pool'
+    )
+    parser.add_argument(
+        '--transcode-workers',
+        type=int,
+        default=None,
+        help='Transcode worker processes (default: number of CPU cores)'
+    )
+    parser.add_argument(
+        '--transcode-queue',
+        type=int,
+        default=None,
+        help='Max downloaded files waiting for transcode before downloads pause (default: 2x workers)'
+    )
+    parser.add_argument(
+        '--audio-format',
+        choices=['wav', 'flac'],
+        default='wav',
+        help='Output format for --transcode (default: wav)'
+    )
+    parser.add_argument(
+        '--sample-rate',
+        type=int,
+        default=None,
+        help='Force output sample rate for --transcode (default: keep source, min 16000)'
+    )
+    parser.add_argument(
+        '--channel-layout',
+        choices=['auto', 'mono', 'keep'],
+        default='auto',
+        help='auto: downmix to mono unless channels carry separate speakers; '
+             'mono: always downmix; keep: never downmix (default: auto)'
+    )
+    parser.add_argument(
+        '--journal',
+        type=str,
+        default='batch_results.jsonl',
+        help='Append-only per-video result journal (default: batch_results.jsonl)'
+    )
+    parser.add_argument(
+        '--results-file',
+        type=str,
+        default='batch_results_final.json',
+        help='Final summary compacted from the journal (default: batch_results_final.json)'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue a previous run per video: skip finished channels and videos that '
+             'already have a result in the journal / results file / manifest'
+    )
+    parser.add_argument(
+        '--retry-failed',
+        action='store_true',
+        help='Re-download only videos that failed before (combine with --resume to also '
+             'finish unfinished channels)'
+    )
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        default=None,
+        help='Serve Prometheus metrics on http://0.0.0.0:PORT/metrics (per-stage latency, bytes, throughput)'
+    )
+    parser.add_argument(
+        '--metrics-file',
+        default=None,
+        help='Periodically write Prometheus metrics to this file (e.g., downloads/metrics.prom)'
+    )
+    parser.add_argument(
+        '--metrics-interval',
+        type=float,
+        default=15.0,
+        help='Seconds between metrics file flushes (default: 15)'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Profile the run: cProfile per worker thread + wall-clock sampling per pipeline stage, '
+             'written to <results-file>.profile/ (wall.folded, cpu.prof, summary.json)'
+    )
+    parser.add_argument(
+        '--profile-interval',
+        type=float,
+        default=10.0,
+        help='Wall-clock sampling interval in milliseconds for --profile (default: 10)'
+    )
+    parser.add_argument(
+        '--queue',
+        type=str,
+        default=None,
+        help='Shared work queue for several processes / machines, e.g. /mnt/shared/queue.sqlite '
+             '(needs working file locks, e.g. NFSv4) or sqlite:///path; channels and videos are '
+             'leased so no video is fetched twice'
+    )
+    parser.add_argument(
+        '--worker-id',
+        type=str,
+        default=None,
+        help='Worker ID in the queue (default: hostname-pid)'
+    )
+    parser.add_argument(
+        '--lease-seconds',
+        type=float,
+        default=300.0,
+        help='Queue lease duration; a task whose worker stops renewing is handed to another worker (default: 300)'
+    )
+    parser.add_argument(
+        '--max-attempts',
+        type=int,
+        default=3,
+        help='Queue attempts per channel / video before it is marked failed (default: 3)'
+    )
+    parser.add_argument(
+        '--retry-backoff',
+        type=float,
+        default=RETRY_BACKOFF,
+        help=f'Seconds before a failed queue task is retried, doubled per attempt (default: {RETRY_BACKOFF:.0f})'
+    )
+    parser.add_argument(
+        '--no-seed',
+        action='store_true',
+        help='Join an existing queue without adding channels from channels_file'
+    )
     parser.add_argument(
         '--start-from',
         type=int,
@@ -144,11 +491,36 @@ def main():
     )
 
     args = parser.parse_args()
+    if args.output_format == 'tar' and args.dedup:
+        parser.error("--dedup needs --output-format folder (hardlinks point into per-video folders)")
+    if args.queue and (args.resume or args.retry_failed):
+        parser.error("--queue keeps its own progress; --resume / --retry-failed are not needed")
+    if args.no_seed and not args.queue:
+        parser.error("--no-seed needs --queue")
+    planning = any(value is not None for value in (
+        args.max_hours, args.max_bytes, args.channel_max_hours, args.min_duration, args.max_duration,
+        args.plan_order))
+    if planning and (args.resume or args.retry_failed):
+        parser.error("budget planning already skips downloaded videos; drop --resume / --retry-failed")
+    if planning and args.no_seed:
+        parser.error("budget flags apply when seeding the queue; drop them with --no-seed")
+    max_bytes = None
+    if args.max_bytes:
+        try:
+            max_bytes = parse_size(args.max_bytes)
+        except ValueError as e:
+            parser.error(str(e))
 
-    # Read channel list
-    channels = read_channel_list(args.channels_file)
+    # Profiler dimulai paling awal supaya listing dan setup ikut ter-profile
+    profiler = None
+    if args.profile:
+        profiler = Profiler(profile_dir_for(args.results_file),
+                            interval=args.profile_interval / 1000).start()
 
-    if not channels:
+    # Read channel list (worker yang join queue yang sudah di-seed tidak butuh channels file)
+    channels = [] if args.no_seed else read_channel_list(args.channels_file)
+
+    if not channels and not args.no_seed:
         logger.error("No channels to process!")
         sys.exit(1)
 
@@ -161,69 +533,240 @@ def main():
         logger.info(f"Starting from channel #{args.start_from + 1}")
         channels = channels[args.start_from:]
 
+    # Shared per-host token bucket (menggantikan serial sleep)
+    host_rate = args.host_rate or 1.0 / max(args.sleep_min, 0.001)
+    rate_limiter = HostRateLimiter(
+        rate=host_rate,
+        capacity=args.host_burst,
+        jitter=max(0.0, args.sleep_max - args.sleep_min)
+    )
+
+    # Identity pool: beberapa cookies/headers, masing-masing dengan bucket sendiri
+    identity_pool = None
+    if args.identities_file:
+        identity_pool = IdentityPool.from_config(
+            args.identities_file, rate=host_rate, capacity=args.host_burst, cooldown=args.identity_cooldown
+        )
+    elif args.cookies_files:
+        identity_pool = IdentityPool.from_cookie_files(
+            args.cookies_files, rate=host_rate, capacity=args.host_burst, cooldown=args.identity_cooldown
+        )
+
+    # AIMD controller: rate_limit dan sleep menyesuaikan diri dengan respons YouTube
+    rate_controller = None
+    if args.adaptive_rate:
+        rate_controller = AIMDRateController(
+            state_file=args.rate_state_file or str(Path(args.output_dir) / ".rate_state.json"),
+            initial_rate=YTDownloader._parse_rate(args.rate_limit),
+            max_rate=YTDownloader._parse_rate(args.max_rate_limit),
+            initial_sleep=1.0 / host_rate,
+            rate_limiter=rate_limiter,
+            identity_pool=identity_pool
+        )
+
+    # Download manifest: video yang sudah selesai langsung di-skip
+    manifest = DownloadManifest(args.manifest or str(Path(args.output_dir) / "manifest.sqlite"))
+    if args.rebuild_manifest:
+        manifest.rebuild_from_tree(args.output_dir)
+
+    # Tar output: audio + metadata di-pack ke shard, bukan satu folder per video
+    output_sink = None
+    if args.output_format == 'tar':
+        output_sink = TarShardSink(args.shard_dir or str(Path(args.output_dir) / "shards"),
+                                   shard_size=args.shard_size_mb * 1024 * 1024)
+
+    # Dedup store: video yang muncul di beberapa channel cukup di-download sekali
+    dedup_store = None
+    if args.dedup:
+        dedup_store = DedupStore(args.dedup_dir or str(Path(args.output_dir) / ".store"),
+                                 link_mode=args.dedup_mode)
+
+    # Channel listing cache: listing berikutnya berhenti di video terakhir yang dikenal
+    channel_cache = None
+    if not args.no_listing_cache:
+        channel_cache = ChannelListingCache(
+            args.listing_cache_dir or str(Path(args.output_dir) / ".channel_cache")
+        )
+
+    # Transcode pool: ffmpeg jalan terpisah dari download workers
+    transcoder = None
+    if args.transcode:
+        transcoder = TranscodePool(
+            max_workers=args.transcode_workers,
+            max_pending=args.transcode_queue,
+            audio_format=args.audio_format,
+            sample_rate=args.sample_rate,
+            channel_layout=args.channel_layout
+        )
+
+    # Metrics: latency per stage, bytes, throughput (HTTP endpoint dan/atau file)
+    metrics = MetricsRegistry()
+    exporter = None
+    if args.metrics_port is not None or args.metrics_file:
+        exporter = MetricsExporter(metrics, port=args.metrics_port, file_path=args.metrics_file,
+                                   interval=args.metrics_interval).start()
+
     # Initialize downloader
     downloader = YTDownloader(
         output_base_dir=args.output_dir,
         sleep_interval=args.sleep_min,
         max_sleep_interval=args.sleep_max,
         rate_limit=args.rate_limit,
-        cookies_file=args.cookies_file
+        cookies_file=args.cookies_file,
+        rate_limiter=rate_limiter,
+        manifest=manifest,
+        channel_cache=channel_cache,
+        transcoder=transcoder,
+        channel_layout=args.channel_layout,
+        rate_controller=rate_controller,
+        identity_pool=identity_pool,
+        metrics=metrics,
+        dedup_store=dedup_store,
+        output_sink=output_sink
     )
 
+    # Resume / retry: hanya pekerjaan yang tersisa dari run sebelumnya
+    skip_ids, video_urls = None, None
+    if args.resume or args.retry_failed:
+        channels, skip_ids, video_urls = plan_resume(
+            channels, args.journal, args.results_file, manifest,
+            resume=args.resume, retry_failed=args.retry_failed
+        )
+
+    # Budget planning: listing semua channel dulu, lalu pilih video berdasarkan durasi
+    plan = None
+    listing_failures = []
+    if planning:
+        listings = collect_listings(downloader, channels, max_workers=args.concurrency)
+        listing_failures = [(name, url) for name, url in channels if not listings[name]]
+        done_ids = {entry["video_id"] for entries in listings.values() for entry in entries
+                    if manifest.is_complete(entry["video_id"])}
+        plan = plan_downloads(
+            listings,
+            max_seconds=args.max_hours * 3600 if args.max_hours else None,
+            max_bytes=max_bytes,
+            channel_max_seconds=args.channel_max_hours * 3600 if args.channel_max_hours else None,
+            channel_max_videos=args.max_videos_per_channel,
+            min_duration=args.min_duration,
+            max_duration=args.max_duration,
+            order=args.plan_order or "longest",
+            audio_kbps=args.audio_kbps,
+            done_ids=done_ids
+        )
+        channel_urls = dict(channels)
+        channels = [(name, channel_urls[name]) for name in plan["channels"]]
+        video_urls = plan["video_urls"]
+
     logger.info("\n" + "="*70)
     logger.info("BATCH DOWNLOAD CONFIGURATION")
     logger.info("="*70)
     logger.info(f"Channels to process: {len(channels)}")
     logger.info(f"Output directory: {args.output_dir}")
-    logger.info(f"Sleep interval: {args.sleep_min}-{args.sleep_max} seconds")
-    logger.info(f"Rate limit: {args.rate_limit}")
+    logger.info(f"Concurrency: {args.concurrency} channels")
+    logger.info(f"Host rate: {host_rate:.3f} req/s (burst {args.host_burst}, "
+                f"jitter 0-{args.sleep_max - args.sleep_min:.1f}s)")
+    if rate_controller:
+        logger.info(f"Rate limit: adaptive, starting at {rate_controller.rate / 1024:.0f} KB/s "
+                    f"(max {args.max_rate_limit}), sleep {rate_controller.sleep_interval:.1f}s")
+    else:
+        logger.info(f"Rate limit: {args.rate_limit}")
     logger.info(f"Max videos per channel: {args.max_videos_per_channel or 'All'}")
-    logger.info(f"Cookies file: {args.cookies_file or 'None'}")
+    if identity_pool:
+        logger.info(f"Identities: {len(identity_pool)} "
+                    f"({', '.join(identity.name for identity in identity_pool.identities)})")
+    else:
+        logger.info(f"Cookies file: {args.cookies_file or 'None'}")
+    logger.info(f"Manifest: {manifest.db_path}")
+    if dedup_store:
+        logger.info(f"Dedup store: {dedup_store.store_dir} ({dedup_store.link_mode})")
+    if output_sink:
+        logger.info(f"Output: tar shards in {output_sink.shard_dir} ({args.shard_size_mb} MB each)")
+    if args.queue:
+        logger.info(f"Work queue: {args.queue} (worker {args.worker_id or 'hostname-pid'}, "
+                    f"lease {args.lease_seconds:.0f}s, {'joining' if args.no_seed else 'seeding'})")
+    if plan:
+        logger.info(f"Plan ({args.plan_order or 'longest'}): {plan['videos']} videos, "
+                    f"{plan['seconds'] / 3600:.1f} h, ~{plan['bytes'] / 1024 ** 3:.2f} GB "
+                    f"({plan['unknown_duration']} without listing duration); already downloaded: "
+                    f"{plan['existing']['videos']} videos, {plan['existing']['seconds'] / 3600:.1f} h")
+        logger.info(f"Plan skipped: {plan['skipped']['budget']} over budget, {plan['skipped']['quota']} "
+                    f"over channel quota, {plan['skipped']['filtered']} outside duration range")
+    if transcoder:
+        logger.info(f"Transcode: {transcoder.max_workers} workers, queue {transcoder.max_pending}, "
+                    f"format {transcoder.audio_format}")
     logger.info("="*70 + "\n")
 
     # Process all channels
-    all_results = {}
+    # Setiap video result di-append (fsync) ke journal; tidak ada rewrite checkpoint
+    journal = ResultJournal(args.journal)
     failed_channels = []
-
-    for idx, (channel_name, channel_url) in enumerate(channels, 1):
-        logger.info(f"\n{'='*70}")
-        logger.info(f"CHANNEL {idx}/{len(channels)}: {channel_name}")
-        logger.info(f"{'='*70}")
-
-        try:
-            results = downloader.download_from_channel(
-                channel_url=channel_url,
-                channel_name=channel_name,
-                max_videos=args.max_videos_per_channel
-            )
-
-            all_results[channel_name] = {
-                "channel_url": channel_url,
-                "total_videos": len(results),
-                "successful": sum(1 for r in results if r['status'] == 'success'),
-                "failed": sum(1 for r in results if r['status'] == 'failed'),
-                "videos": results
-            }
-
-            # Save intermediate results after each channel
-            save_batch_results(all_results, f"batch_results_checkpoint.json")
-
-        except Exception as e:
-            logger.error(f"Error processing channel {channel_name}: {e}")
-            failed_channels.append((channel_name, str(e)))
-            all_results[channel_name] = {
-                "channel_url": channel_url,
-                "status": "error",
-                "error": str(e)
-            }
+    channels_done = 0
+    for channel_name, channel_url in listing_failures:
+        journal.append_channel(channel_name, channel_url, "No videos found")
+        failed_channels.append((channel_name, "No videos found"))
+
+    def on_channel_done(channel_name, channel_url, summary, error):
+        nonlocal channels_done
+        channels_done += 1
+        journal.append_channel(channel_name, channel_url, error)
+        if error is not None:
+            failed_channels.append((channel_name, error))
+            return
+
+        # Hanya counter per status; result lengkap sudah di journal
+        pending = summary.get('transcoding', 0)
+        logger.info(f"CHANNEL DONE ({channels_done}/{len(channels)}): {channel_name} "
+                    f"({summary.get('success', 0)}/{sum(summary.values())} successful"
+                    f"{f', {pending} still transcoding' if pending else ''})")
+
+    if args.queue:
+        # Multi-node: channel dan video di-lease dari shared queue
+        queue = open_queue(args.queue)
+        scheduler = QueueScheduler(downloader, queue, max_workers=args.concurrency, worker_id=args.worker_id,
+                                   lease_seconds=args.lease_seconds, max_attempts=args.max_attempts,
+                                   retry_backoff=args.retry_backoff)
+        if plan:
+            scheduler.seed_videos(channels, video_urls)
+        elif channels:
+            scheduler.seed(channels, max_videos=args.max_videos_per_channel)
+
+        def on_channel_listed(channel_name, channel_url, video_count, error):
+            journal.append_channel(channel_name, channel_url, error)
+            if error is not None:
+                failed_channels.append((channel_name, error))
+
+        summary = scheduler.run(on_result=journal.append_video, on_channel_listed=on_channel_listed)
+        logger.info(f"Queue worker {scheduler.worker_id} processed {sum(summary.values())} videos "
+                    f"({summary.get('success', 0)} successful)")
+        for kind, by_status in sorted(queue.counts().items()):
+            logger.info(f"Queue {kind}s: " + ", ".join(f"{n} {status}" for status, n in sorted(by_status.items())))
+        queue.close()
+    else:
+        scheduler = ChannelScheduler(downloader, max_workers=args.concurrency)
+        scheduler.run(
+            channels,
+            max_videos=args.max_videos_per_channel,
+            on_channel_done=on_channel_done,
+            on_result=journal.append_video,
+            skip_ids=skip_ids,
+            video_urls=video_urls
+        )
 
     # Save final results
     logger.info("\n" + "="*70)
     logger.info("BATCH PROCESSING COMPLETE")
     logger.info("="*70)
 
+    # Tunggu transcode jobs yang masih jalan (result-nya masuk journal juga)
+    downloader.close()
+    journal.close()
+    if output_sink:
+        output_sink.close()
+
     # Print overall statistics
     downloader.print_stats()
+    if exporter:
+        exporter.close()
 
     # Print failed channels
     if failed_channels:
@@ -231,12 +774,17 @@ def main():
         for channel_name, error in failed_channels:
             logger.warning(f"  - {channel_name}: {error}")
 
-    # Save final results
-    save_batch_results(all_results, "batch_results_final.json")
+    # Save final results (streaming compaction dari journal)
+    compact_journal(args.journal, args.results_file)
+    manifest.close()
+    if dedup_store:
+        dedup_store.close()
+    if profiler:
+        profiler.stop()
 
     logger.info("\n✓ All done! Check the results in:")
     logger.info(f"  - Downloads: {args.output_dir}/")
-    logger.info(f"  - Results: batch_results_final.json")
+    logger.info(f"  - Results: {args.results_file} (journal: {args.journal})")
 
 
 if __name__ == "__main__":
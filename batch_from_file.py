@@ -1,6 +1,6 @@
 """從檔案讀取 URL 並批量處理"""
 
-from turboscribe_batch import TurboScribeBatch
+import argparse
 import sys
 
 
@@ -29,22 +29,76 @@ def read_urls_from_file(filename: str) -> list:
 
 
 def main():
+    parser = argparse.ArgumentParser(description='從檔案讀取 URL 並批量呼叫 TurboScribe')
+    parser.add_argument('--urls-file', type=str, default='urls.txt',
+                        help='URL 清單檔案，每行一個 (預設: urls.txt)')
+    parser.add_argument('--delay', type=float, default=1.0,
+                        help='API 請求之間的間隔秒數 (預設: 1.0)')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='使用非同步模式，同時解析與下載多個 URL')
+    parser.add_argument('--resolve-concurrency', type=int, default=4,
+                        help='非同步模式下同時解析的 URL 數量 (預設: 4)')
+    parser.add_argument('--download-concurrency', type=int, default=2,
+                        help='非同步模式下同時下載的音訊數量 (預設: 2)')
+    parser.add_argument('--segments', type=int, default=1,
+                        help='每個音訊檔的分段下載連線數 (預設: 1，不分段)')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='在 http://0.0.0.0:PORT/metrics 提供 Prometheus 指標')
+    parser.add_argument('--metrics-file', type=str, default=None,
+                        help='定期將 Prometheus 指標寫入此檔案 (例如 metrics.prom)')
+    parser.add_argument('--metrics-interval', type=float, default=15.0,
+                        help='指標檔案寫入間隔秒數 (預設: 15)')
+    parser.add_argument('--profile', action='store_true',
+                        help='效能分析：每個執行緒的 cProfile 與各階段的 wall-clock 取樣，'
+                             '輸出至 turboscribe_results.profile/')
+    parser.add_argument('--profile-interval', type=float, default=10.0,
+                        help='--profile 的取樣間隔毫秒數 (預設: 10)')
+    args = parser.parse_args()
+    
+    # 參數解析完成後才載入 requests 等較重的模組（--help 與參數錯誤時可立即結束）
+    from turboscribe_batch import TurboScribeBatch
+    from metrics import MetricsExporter, MetricsRegistry
+    from profiling import Profiler, profile_dir_for
+    
+    profiler = None
+    if args.profile:
+        profiler = Profiler(profile_dir_for("turboscribe_results.json"),
+                            interval=args.profile_interval / 1000).start()
+    
     # 從 urls.txt 讀取 URL
-    urls = read_urls_from_file('urls.txt')
+    urls = read_urls_from_file(args.urls_file)
     
     if not urls:
-        print("錯誤: urls.txt 中沒有找到任何 URL")
+        print(f"錯誤: {args.urls_file} 中沒有找到任何 URL")
         sys.exit(1)
     
-    print(f"從 urls.txt 讀取到 {len(urls)} 個 URL\n")
+    print(f"從 {args.urls_file} 讀取到 {len(urls)} 個 URL\n")
     
     # 建立處理器並執行
     # Headers 和 Cookies 會自動從 config_headers.json 和 config_cookies.txt 載入
-    processor = TurboScribeBatch(delay=1.0)
-    results = processor.process_batch(urls, save_html=True, download_audio=True)  # 自動儲存 HTML 和下載音訊
+    metrics = MetricsRegistry()
+    exporter = None
+    if args.metrics_port is not None or args.metrics_file:
+        exporter = MetricsExporter(metrics, port=args.metrics_port, file_path=args.metrics_file,
+                                   interval=args.metrics_interval).start()
+    processor = TurboScribeBatch(delay=args.delay, download_segments=args.segments, metrics=metrics)
+    if args.use_async:
+        results = processor.run_batch_async(
+            urls,
+            save_html=True,
+            download_audio=True,
+            resolve_concurrency=args.resolve_concurrency,
+            download_concurrency=args.download_concurrency
+        )
+    else:
+        results = processor.process_batch(urls, save_html=True, download_audio=True)  # 自動儲存 HTML 和下載音訊
     
     # 儲存結果
     processor.save_results(results, "turboscribe_results.json")
+    if exporter:
+        exporter.close()
+    if profiler:
+        profiler.stop()
     
     # 顯示摘要
     processor.print_summary(results)
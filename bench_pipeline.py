@@ -0,0 +1,350 @@
+"""
+Benchmark: end-to-end YTDownloader dan TurboScribeBatch secara offline
+Local HTTP server menggantikan YouTube (flat playlist per page, format manifest,
+audio yang di-throttle per koneksi) dan TurboScribe (HTMX response dengan audio
+link), jadi hasil bisa dibandingkan antar commit tanpa koneksi internet.
+Report: videos/s, MB/s dan p50/p99 latency per video untuk setiap concurrency.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+
+from metrics import MetricsRegistry
+from scheduler import ChannelScheduler
+from turboscribe_batch import TurboScribeBatch
+from yt_downloader import YTDownloader
+
+_RealYoutubeDL = yt_dlp.YoutubeDL
+
+
+def make_wav(seconds: float, sample_rate: int = 16000) -> bytes:
+    """Mono 16-bit PCM WAV (sine), supaya probe dan channel analysis jalan tanpa ffmpeg"""
+    frames = int(seconds * sample_rate)
+    samples = bytes(
+        b for i in range(sample_rate)
+        for b in struct.pack('<h', int(8000 * math.sin(2 * math.pi * 440 * i / sample_rate)))
+    )
+    data = (samples * (frames // sample_rate + 1))[:frames * 2]
+    header = struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + len(data), b'WAVE', b'fmt ', 16,
+                         1, 1, sample_rate, sample_rate * 2, 2, 16, b'data', len(data))
+    return header + data
+
+
+def make_handler(audio: bytes, bytes_per_sec: int, api_latency: float, page_size: int,
+                 videos_per_channel: int, html_padding: int):
+    """
+    Routes:
+        GET  /api/channel/{name}?page=N  -> flat playlist page
+        GET  /api/player/{video_id}      -> format manifest
+        GET  /audio/{video_id}.wav       -> audio (Range support, throttle per koneksi)
+        POST /_htmx/...                  -> TurboScribe HTML dengan audio link
+    """
+
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status: int, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _base_url(self) -> str:
+            return f"http://{self.headers.get('Host')}"
+
+        def do_GET(self):
+            match = re.match(r'/api/channel/([^/?]+)\?page=(\d+)', self.path)
+            if match:
+                time.sleep(api_latency)
+                channel, page = match.group(1), int(match.group(2))
+                start = page * page_size
+                stop = min(start + page_size, videos_per_channel)
+                entries = [{"id": f"{channel[-5:]:_>5}{idx:06d}", "title": f"{channel} #{idx}"}
+                           for idx in range(start, stop)]
+                body = {"entries": entries, "next": page + 1 if stop < videos_per_channel else None}
+                self._send(200, json.dumps(body).encode(), 'application/json')
+                return
+
+            match = re.match(r'/api/player/([0-9A-Za-z_-]{11})$', self.path)
+            if match:
+                time.sleep(api_latency)
+                video_id = match.group(1)
+                body = {
+                    "id": video_id,
+                    "title": f"Bench video {video_id}",
+                    "uploader": "bench",
+                    "duration": (len(audio) - 44) / 32000,
+                    "formats": [{
+                        "format_id": "wav",
+                        "url": f"{self._base_url()}/audio/{video_id}.wav",
+                        "ext": "wav",
+                        "acodec": "pcm_s16le",
+                        "vcodec": "none",
+                        "asr": 16000,
+                        "audio_channels": 1,
+                        "filesize": len(audio),
+                    }],
+                }
+                self._send(200, json.dumps(body).encode(), 'application/json')
+                return
+
+            if self.path.startswith('/audio/'):
+                self._send_audio()
+                return
+            self._send(404, b'not found', 'text/plain')
+
+        def _send_audio(self):
+            total = len(audio)
+            start, end = 0, total - 1
+            match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+            if match:
+                start = int(match.group(1))
+                end = min(int(match.group(2)), total - 1) if match.group(2) else total - 1
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{total}')
+            else:
+                self.send_response(200)
+            self.send_header('Content-Type', 'audio/wav')
+            self.send_header('Content-Length', str(end - start + 1))
+            self.end_headers()
+
+            chunk = max(1, bytes_per_sec // 20)
+            pos = start
+            while pos <= end:
+                piece = audio[pos:min(pos + chunk, end + 1)]
+                self.wfile.write(piece)
+                pos += len(piece)
+                time.sleep(len(piece) / bytes_per_sec)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            if not self.path.startswith('/_htmx/'):
+                self._send(404, b'not found', 'text/plain')
+                return
+            time.sleep(api_latency)
+            video_id = payload.get('url', '').split('v=')[-1][:11]
+            filler = '<div class="row">transcript placeholder</div>\n' * html_padding
+            link = f'{self._base_url()}/audio/{video_id}.wav?mime=audio%2Fwebm&amp;id={video_id}'
+            body = f'<html><body>{filler}<a href="{link}">Download</a>{filler}</body></html>'
+            self._send(200, body.encode(), 'text/html; charset=utf-8')
+
+        def log_message(self, format, *args):
+            pass
+
+    return _Handler
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Client yang berhenti membaca lebih awal (TurboScribe streaming parser) bukan error
+        pass
+
+
+def make_youtube_dl(base_url: str, postprocess: bool):
+    """
+    YoutubeDL dengan satu extractor lokal untuk youtube.com/watch dan youtube.com/@channel,
+    diarahkan ke local server. Format selection, HTTP downloader, progress hooks dan
+    postprocessors tetap milik yt-dlp.
+    """
+
+    class LocalTubeIE(InfoExtractor):
+        IE_NAME = 'localtube'
+        _VALID_URL = r'https?://(?:www\.)?youtube\.com/(?:watch\?v=(?P<id>[0-9A-Za-z_-]{11})|@(?P<channel>[^/?#]+))'
+
+        def _real_extract(self, url):
+            match = self._match_valid_url(url)
+            if match.group('channel'):
+                channel = match.group('channel')
+                return self.playlist_result(self._entries(channel), channel, channel)
+            video_id = match.group('id')
+            return self._download_json(f'{base_url}/api/player/{video_id}', video_id, note=False)
+
+        def _entries(self, channel):
+            page = 0
+            while page is not None:
+                data = self._download_json(f'{base_url}/api/channel/{channel}?page={page}',
+                                           channel, note=False)
+                for entry in data['entries']:
+                    yield self.url_result(f"https://www.youtube.com/watch?v={entry['id']}",
+                                          'LocalTube', entry['id'], entry['title'])
+                page = data['next']
+
+    class LocalYoutubeDL(_RealYoutubeDL):
+        def __init__(self, params=None, auto_init=True):
+            params = dict(params or {}, quiet=True, noprogress=True, no_warnings=True)
+            if not postprocess:
+                params['postprocessors'] = []
+            super().__init__(params, auto_init=False)
+            self.add_info_extractor(LocalTubeIE())
+
+    return LocalYoutubeDL
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def report(path: str, concurrency: int, latencies: List[float], ok: int, total_bytes: int,
+           elapsed: float, note: str = ""):
+    print(f"{path:<18} {concurrency:>4} {len(latencies):>6} {ok:>5} {elapsed:>8.2f} "
+          f"{len(latencies) / elapsed:>9.2f} {total_bytes / 1024 / 1024 / elapsed:>7.2f} "
+          f"{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 99) * 1000:>8.0f}  {note}")
+
+
+def bench_ytdl(base_url: str, workdir: Path, channels: int, concurrency: int, postprocess: bool):
+    """YTDownloader + ChannelScheduler: listing, download, probe, metadata, manifest-less"""
+    yt_dlp.YoutubeDL = make_youtube_dl(base_url, postprocess)
+    try:
+        metrics = MetricsRegistry()
+        downloader = YTDownloader(
+            output_base_dir=str(workdir / 'downloads'),
+            sleep_interval=0,
+            max_sleep_interval=0,
+            sleep_requests=0,
+            rate_limit=None,
+            metrics=metrics
+        )
+        latencies, lock = [], threading.Lock()
+        download_video_audio = downloader.download_video_audio
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = download_video_audio(*args, **kwargs)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+            return result
+
+        downloader.download_video_audio = timed
+        results: List[Dict] = []
+        channel_list = [(f"bench{idx}", f"https://www.youtube.com/@bench{idx:05d}") for idx in range(channels)]
+
+        start = time.perf_counter()
+        ChannelScheduler(downloader, max_workers=concurrency).run(
+            channel_list, on_result=lambda name, url, result: results.append(result))
+        downloader.close()
+        elapsed = time.perf_counter() - start
+    finally:
+        yt_dlp.YoutubeDL = _RealYoutubeDL
+
+    ok = [r for r in results if r['status'] == 'success']
+    total_bytes = sum(os.path.getsize(r['audio_file']) for r in ok if r.get('audio_file'))
+    stages = metrics.histogram("ytdl_stage_seconds", "Time spent per pipeline stage").stats()
+    breakdown = ", ".join(f"{dict(key)['stage']} {stage['sum'] / stage['count'] * 1000:.0f}ms"
+                          for key, stage in stages.items())
+    report("ytdownloader", concurrency, latencies, len(ok), total_bytes, elapsed, breakdown)
+
+
+def bench_turboscribe(base_url: str, workdir: Path, urls: int, concurrency: int):
+    """TurboScribeBatch: sync process_batch (concurrency 1) atau async resolve/download pools"""
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        processor = TurboScribeBatch(delay=0, headers_file='-', cookies_file='-')
+        processor.api_url = f"{base_url}/_htmx/bench"
+        youtube_urls = [f"https://www.youtube.com/watch?v=ts{concurrency:03d}{idx:06d}" for idx in range(urls)]
+
+        starts: Dict[str, float] = {}
+        latencies, lock = [], threading.Lock()
+        resolve_url, download_audio = processor._resolve_url, processor._download_audio
+
+        def timed_resolve(url, *args, **kwargs):
+            starts[processor._extract_video_id(url)] = time.perf_counter()
+            return resolve_url(url, *args, **kwargs)
+
+        def timed_download(audio_url, video_id):
+            path = download_audio(audio_url, video_id)
+            with lock:
+                latencies.append(time.perf_counter() - starts[video_id])
+            return path
+
+        processor._resolve_url, processor._download_audio = timed_resolve, timed_download
+
+        start = time.perf_counter()
+        if concurrency == 1:
+            results = processor.process_batch(youtube_urls, save_html=False)
+            mode = "turboscribe-sync"
+        else:
+            results = processor.run_batch_async(youtube_urls, save_html=False,
+                                                resolve_concurrency=concurrency,
+                                                download_concurrency=concurrency)
+            mode = "turboscribe-async"
+        elapsed = time.perf_counter() - start
+        ok = [r for r in results if r.get('audio_file')]
+        total_bytes = sum(os.path.getsize(r['audio_file']) for r in ok)
+    finally:
+        os.chdir(cwd)
+    report(mode, concurrency, latencies, len(ok), total_bytes, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark for YTDownloader and TurboScribeBatch')
+    parser.add_argument('--paths', nargs='+', choices=['ytdl', 'turboscribe'], default=['ytdl', 'turboscribe'],
+                        help='Pipelines to benchmark (default: both)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4],
+                        help='Concurrency settings to compare (default: 1 2 4)')
+    parser.add_argument('--channels', type=int, default=4, help='Channels for YTDownloader (default: 4)')
+    parser.add_argument('--videos-per-channel', type=int, default=8,
+                        help='Videos per channel (default: 8)')
+    parser.add_argument('--urls', type=int, default=32, help='URLs for TurboScribeBatch (default: 32)')
+    parser.add_argument('--audio-seconds', type=float, default=10, help='Audio length per video (default: 10)')
+    parser.add_argument('--per-conn-kbps', type=int, default=1024,
+                        help='Audio throttle per connection in KB/s (default: 1024)')
+    parser.add_argument('--api-latency-ms', type=float, default=20,
+                        help='Latency of listing / player / HTMX responses (default: 20)')
+    parser.add_argument('--page-size', type=int, default=30, help='Flat playlist page size (default: 30)')
+    parser.add_argument('--html-kb', type=int, default=64, help='Approximate HTMX response size (default: 64)')
+    parser.add_argument('--postprocess', action='store_true',
+                        help='Keep yt-dlp ffmpeg postprocessors (needs ffmpeg)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    if args.postprocess and not shutil.which('ffmpeg'):
+        parser.error("--postprocess needs ffmpeg on PATH")
+
+    audio = make_wav(args.audio_seconds)
+    handler = make_handler(audio, args.per_conn_kbps * 1024, args.api_latency_ms / 1000,
+                           args.page_size, args.videos_per_channel, args.html_kb * 1024 // 48)
+    server = _QuietServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"Audio: {len(audio) / 1024:.0f} KB/video, throttle {args.per_conn_kbps} KB/s per connection, "
+          f"API latency {args.api_latency_ms:.0f} ms")
+    print(f"{'path':<18} {'conc':>4} {'videos':>6} {'ok':>5} {'seconds':>8} {'videos/s':>9} "
+          f"{'MB/s':>7} {'p50 ms':>8} {'p99 ms':>8}")
+
+    for concurrency in args.concurrency:
+        with tempfile.TemporaryDirectory() as tmp:
+            if 'ytdl' in args.paths:
+                bench_ytdl(base_url, Path(tmp), args.channels, concurrency, args.postprocess)
+            if 'turboscribe' in args.paths:
+                bench_turboscribe(base_url, Path(tmp), args.urls, concurrency)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
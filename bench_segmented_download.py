@@ -0,0 +1,96 @@
+"""
+Benchmark: single-connection vs segmented audio download
+Local HTTP server yang mensimulasikan googlevideo (Range support + throttle per koneksi)
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from turboscribe_batch import TurboScribeBatch
+
+
+def make_handler(data: bytes, bytes_per_sec: int):
+    """Handler dengan Range support dan throttle per koneksi"""
+
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            total = len(data)
+            start, end = 0, total - 1
+            match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+            if match:
+                start = int(match.group(1))
+                end = min(int(match.group(2)), total - 1) if match.group(2) else total - 1
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{total}')
+            else:
+                self.send_response(200)
+            self.send_header('Content-Type', 'audio/webm')
+            self.send_header('Content-Length', str(end - start + 1))
+            self.end_headers()
+
+            chunk = max(1, bytes_per_sec // 20)
+            pos = start
+            while pos <= end:
+                piece = data[pos:min(pos + chunk, end + 1)]
+                self.wfile.write(piece)
+                pos += len(piece)
+                time.sleep(len(piece) / bytes_per_sec)
+
+        def log_message(self, format, *args):
+            pass
+
+    return _Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark segmented audio downloads')
+    parser.add_argument('--size-mb', type=float, default=16, help='Audio size in MB (default: 16)')
+    parser.add_argument('--per-conn-kbps', type=int, default=2048,
+                        help='Throttle per connection in KB/s (default: 2048)')
+    parser.add_argument('--segments', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Segment counts to compare (default: 1 2 4 8)')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    data = os.urandom(int(args.size_mb * 1024 * 1024))
+    expected = hashlib.sha256(data).hexdigest()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(data, args.per_conn_kbps * 1024))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    audio_url = f"http://127.0.0.1:{server.server_port}/videoplayback?mime=audio%2Fwebm"
+
+    print(f"Audio: {args.size_mb:.1f} MB, throttle: {args.per_conn_kbps} KB/s per connection")
+    print(f"{'segments':>8} {'seconds':>8} {'MB/s':>8}  ok")
+
+    cwd = os.getcwd()
+    for segments in args.segments:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                processor = TurboScribeBatch(delay=0, headers_file='-', cookies_file='-',
+                                             download_segments=segments,
+                                             min_segment_size=256 * 1024)
+                start = time.perf_counter()
+                path = processor._download_audio(audio_url, f"bench{segments}")
+                elapsed = time.perf_counter() - start
+                with open(path, 'rb') as f:
+                    ok = hashlib.sha256(f.read()).hexdigest() == expected
+            finally:
+                os.chdir(cwd)
+        print(f"{segments:>8} {elapsed:>8.2f} {args.size_mb / elapsed:>8.2f}  {'✓' if ok else '✗'}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
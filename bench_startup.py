@@ -0,0 +1,140 @@
+"""
+Benchmark: CLI startup time per entry point
+Mengukur import time, `--help`, dan time-to-first-request (waktu sampai request
+network pertama) untuk setiap entry point di process baru. Request pertama
+ditangkap oleh local proxy (HTTP(S)_PROXY) yang langsung membalas 502, jadi
+tidak ada koneksi ke YouTube / TurboScribe.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+
+REPO_DIR = Path(__file__).resolve().parent
+
+# Argumen untuk run sampai request pertama ({tmp} = working dir)
+ENTRY_POINTS = {
+    "batch_download_channels": {
+        "args": ["--channels-file", "{tmp}/channels.txt", "--output-dir", "{tmp}/downloads",
+                 "--sleep-min", "0", "--sleep-max", "0", "--no-listing-cache"],
+    },
+    "batch_from_file": {
+        "args": ["--urls-file", "{tmp}/urls.txt", "--delay", "0"],
+    },
+    "audio_probe": {
+        "args": None,  # tidak ada network; hanya import dan --help
+    },
+}
+
+
+class _RequestRecorder:
+    """Local proxy: catat waktu request pertama, balas 502"""
+
+    def __init__(self):
+        self.first_request: Optional[float] = None
+        self.event = threading.Event()
+        recorder = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def _record(self):
+                if recorder.first_request is None:
+                    recorder.first_request = time.perf_counter()
+                    recorder.event.set()
+                self.send_response(502)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            do_CONNECT = do_GET = do_POST = do_HEAD = _record
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def reset(self):
+        self.first_request = None
+        self.event.clear()
+
+
+def timed_run(cmd: List[str], cwd: str) -> float:
+    """Wall time (ms) sampai process selesai"""
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return (time.perf_counter() - start) * 1000
+
+
+def time_to_first_request(cmd: List[str], cwd: str, recorder: _RequestRecorder,
+                          timeout: float = 30.0) -> Optional[float]:
+    """Waktu (ms) dari spawn sampai request network pertama diterima proxy"""
+    env = dict(os.environ)
+    for key in ('HTTP_PROXY', 'HTTPS_PROXY', 'http_proxy', 'https_proxy', 'ALL_PROXY', 'all_proxy'):
+        env[key] = recorder.url
+    env.pop('NO_PROXY', None)
+    env.pop('no_proxy', None)
+
+    recorder.reset()
+    start = time.perf_counter()
+    process = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not recorder.event.wait(timeout):
+            return None
+        return (recorder.first_request - start) * 1000
+    finally:
+        process.kill()
+        process.wait()
+
+
+def median_ms(values: List[Optional[float]]) -> str:
+    values = [v for v in values if v is not None]
+    return f"{statistics.median(values):.0f}" if values else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CLI startup time per entry point')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, median reported (default: 5)')
+    parser.add_argument('--entry-points', nargs='+', choices=list(ENTRY_POINTS), default=list(ENTRY_POINTS),
+                        help='Entry points to measure (default: all)')
+    args = parser.parse_args()
+
+    python = sys.executable
+    recorder = _RequestRecorder()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        Path(tmp, "channels.txt").write_text("bench,https://www.youtube.com/@bench\n", encoding='utf-8')
+        Path(tmp, "urls.txt").write_text("https://www.youtube.com/watch?v=BFudEmWtgAc\n", encoding='utf-8')
+
+        baseline = [timed_run([python, '-c', 'pass'], tmp) for _ in range(args.repeat)]
+        print(f"Python interpreter startup: {median_ms(baseline)} ms (median of {args.repeat})")
+        print(f"{'entry point':<26} {'import ms':>10} {'--help ms':>10} {'first request ms':>17}")
+
+        for name in args.entry_points:
+            script = str(REPO_DIR / f"{name}.py")
+            import_code = f"import sys; sys.path.insert(0, {str(REPO_DIR)!r}); import {name}"
+            imports = [timed_run([python, '-c', import_code], tmp) for _ in range(args.repeat)]
+            helps = [timed_run([python, script, '--help'], tmp) for _ in range(args.repeat)]
+
+            first_requests: List[Optional[float]] = []
+            run_args = ENTRY_POINTS[name]["args"]
+            if run_args is not None:
+                cmd = [python, script] + [arg.format(tmp=tmp) for arg in run_args]
+                first_requests = [time_to_first_request(cmd, tmp, recorder) for _ in range(args.repeat)]
+
+            print(f"{name:<26} {median_ms(imports):>10} {median_ms(helps):>10} "
+                  f"{median_ms(first_requests):>17}")
+
+    recorder.server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: fresh YoutubeDL per video vs warm YoutubeDLPool
+Mengukur overhead per video (instance init, cookie jar loading, HTTP session setup)
+terhadap local HTTP server, jadi tidak perlu koneksi ke YouTube
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import yt_dlp
+
+from ydl_pool import YoutubeDLPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, supaya connection reuse terlihat
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def write_cookies_file(path: Path, count: int):
+    """Tulis Netscape cookies.txt dengan `count` cookies (simulasi browser export)"""
+    expires = int(time.time()) + 86400
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# Netscape HTTP Cookie File\n")
+        for i in range(count):
+            f.write(f".youtube.com\tTRUE\t/\tTRUE\t{expires}\tcookie_{i}\t{'v' * 64}\n")
+
+
+def bench_fresh(opts: dict, url: str, output_dir: Path, videos: int) -> float:
+    """Seperti kode lama: YoutubeDL baru untuk setiap video"""
+    start = time.perf_counter()
+    for _ in range(videos):
+        video_opts = dict(opts, outtmpl=str(output_dir / '%(id)s.%(ext)s'))
+        with yt_dlp.YoutubeDL(video_opts) as ydl:
+            ydl.urlopen(url).read()
+    return time.perf_counter() - start
+
+
+def bench_pooled(opts: dict, url: str, output_dir: Path, videos: int) -> float:
+    """YoutubeDLPool: instance, cookie jar dan connection dipakai ulang"""
+    pool = YoutubeDLPool(lambda: dict(opts))
+    start = time.perf_counter()
+    for _ in range(videos):
+        with pool.acquire(output_dir) as ydl:
+            ydl.urlopen(url).read()
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-video yt-dlp setup overhead')
+    parser.add_argument('--videos', type=int, default=50, help='Simulated videos (default: 50)')
+    parser.add_argument('--cookies', type=int, default=300, help='Cookies in cookies.txt (default: 300)')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/watch"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        cookies_file = tmp_path / 'cookies.txt'
+        write_cookies_file(cookies_file, args.cookies)
+
+        opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'cookiefile': str(cookies_file),
+            'outtmpl': str(tmp_path / '%(id)s.%(ext)s'),
+        }
+
+        # Warm-up (import caches, lazy extractors)
+        bench_fresh(opts, url, tmp_path, 2)
+
+        fresh = bench_fresh(opts, url, tmp_path, args.videos)
+        pooled = bench_pooled(opts, url, tmp_path, args.videos)
+
+    server.shutdown()
+
+    print(f"Videos: {args.videos}, cookies: {args.cookies}")
+    print(f"Fresh YoutubeDL per video : {fresh / args.videos * 1000:8.2f} ms/video")
+    print(f"Warm YoutubeDLPool        : {pooled / args.videos * 1000:8.2f} ms/video")
+    print(f"Overhead saved per video  : {(fresh - pooled) / args.videos * 1000:8.2f} ms "
+          f"({fresh / pooled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+Columnar Metadata Catalog
+Semua {video_id}.json (dan .info.json kalau .json tidak ada) dari downloads tree dan
+tar shards dilipat ke satu file columnar: Parquet kalau pyarrow tersedia, kalau tidak
+column-oriented JSON (gzip). Build berikutnya hanya membaca file yang berubah (mtime +
+size); query (filter + aggregasi per channel / tahun / sample rate) tanpa scan tree.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import time
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from tar_sink import iter_index, read_member
+
+logger = logging.getLogger(__name__)
+
+# pyarrow optional: di-import saat pertama kali dipakai
+pa = None
+pq = None
+_pyarrow_checked = False
+
+# (nama kolom, tipe): "str" / "int" / "float"
+COLUMNS = [
+    ("video_id", "str"),
+    ("channel_name", "str"),
+    ("title", "str"),
+    ("uploader", "str"),
+    ("upload_date", "str"),
+    ("duration_sec", "float"),
+    ("sample_rate", "int"),
+    ("channels", "int"),
+    ("bits_per_sample", "int"),
+    ("codec", "str"),
+    ("format", "str"),
+    ("file_size", "int"),
+    ("channel_layout", "str"),
+    ("view_count", "int"),
+    ("source", "str"),
+    ("source_mtime_ns", "int"),
+    ("source_size", "int"),
+]
+COLUMN_NAMES = [name for name, _ in COLUMNS]
+
+GROUP_KEYS = {
+    "channel": lambda row: row["channel_name"],
+    "year": lambda row: (row["upload_date"] or "")[:4] or None,
+    "month": lambda row: (row["upload_date"] or "")[:6] or None,
+    "sample_rate": lambda row: row["sample_rate"],
+    "format": lambda row: row["format"],
+    "channels": lambda row: row["channels"],
+    "none": lambda row: "all",
+}
+
+
+def _load_pyarrow():
+    """Import pyarrow sekali; None kalau tidak ter-install"""
+    global pa, pq, _pyarrow_checked
+    if not _pyarrow_checked:
+        _pyarrow_checked = True
+        try:
+            import pyarrow
+            import pyarrow.parquet
+            pa, pq = pyarrow, pyarrow.parquet
+        except ImportError:
+            pa = pq = None
+    return pa
+
+
+def default_catalog_path(base_dir: str) -> Path:
+    """downloads/catalog.parquet (pyarrow) atau downloads/catalog.json.gz"""
+    name = "catalog.parquet" if _load_pyarrow() is not None else "catalog.json.gz"
+    return Path(base_dir) / name
+
+
+def _row_from_metadata(metadata: Dict, channel_name: str) -> Dict:
+    """Row dari {video_id}.json (format _extract_metadata + hasil probe)"""
+    audio = metadata.get("audio_metadata") or {}
+    layout = metadata.get("channel_layout") or {}
+    return {
+        "video_id": metadata.get("video_id"),
+        "channel_name": metadata.get("channel_name") or channel_name,
+        "title": metadata.get("title"),
+        "uploader": metadata.get("uploader"),
+        "upload_date": metadata.get("upload_date"),
+        "duration_sec": audio.get("duration_sec") or metadata.get("duration_sec"),
+        "sample_rate": audio.get("sample_rate"),
+        "channels": audio.get("channels"),
+        "bits_per_sample": audio.get("bits_per_sample"),
+        "codec": audio.get("codec"),
+        "format": audio.get("format"),
+        "file_size": audio.get("file_size"),
+        "channel_layout": layout.get("decision") if isinstance(layout, dict) else None,
+        "view_count": metadata.get("view_count"),
+    }
+
+
+def _row_from_info(info: Dict, channel_name: str) -> Dict:
+    """Row dari {video_id}.info.json yt-dlp (kalau {video_id}.json belum ditulis)"""
+    return {
+        "video_id": info.get("id"),
+        "channel_name": channel_name,
+        "title": info.get("title"),
+        "uploader": info.get("uploader"),
+        "upload_date": info.get("upload_date"),
+        "duration_sec": info.get("duration"),
+        "sample_rate": info.get("asr"),
+        "channels": info.get("audio_channels"),
+        "bits_per_sample": None,
+        "codec": info.get("acodec"),
+        "format": info.get("ext"),
+        "file_size": info.get("filesize") or info.get("filesize_approx"),
+        "channel_layout": None,
+        "view_count": info.get("view_count"),
+    }
+
+
+def _coerce(value, kind: str):
+    if value is None or value == "":
+        return None
+    try:
+        if kind == "int":
+            return int(value)
+        if kind == "float":
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    return str(value)
+
+
+class Catalog:
+    """
+    Catalog columnar: dict nama kolom -> list value (satu row per video per channel)
+
+    Source setiap row dicatat (path JSON, atau "shard.tar#member" untuk tar output)
+    beserta mtime_ns dan size, jadi update() hanya mem-parse file yang berubah.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: File catalog; .parquet butuh pyarrow, selain itu JSON column layout (gzip)
+        """
+        self.path = Path(path)
+        self.columns: Dict[str, list] = {name: [] for name in COLUMN_NAMES}
+
+    def __len__(self) -> int:
+        return len(self.columns["video_id"])
+
+    @property
+    def is_parquet(self) -> bool:
+        return self.path.suffix == ".parquet"
+
+    def load(self, columns: Optional[List[str]] = None) -> "Catalog":
+        """
+        Baca catalog dari disk (kosong kalau belum ada)
+
+        Args:
+            columns: Hanya kolom ini (Parquet: column projection, tidak membaca kolom lain)
+        """
+        wanted = columns or COLUMN_NAMES
+        if not self.path.exists():
+            self.columns = {name: [] for name in wanted}
+            return self
+
+        if self.is_parquet:
+            if _load_pyarrow() is None:
+                raise RuntimeError(f"{self.path} is a Parquet catalog but pyarrow is not installed")
+            available = set(pq.read_schema(self.path).names)
+            table = pq.read_table(self.path, columns=[name for name in wanted if name in available])
+            data = table.to_pydict()
+        else:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)["columns"]
+
+        size = len(next(iter(data.values()), []))
+        self.columns = {name: data.get(name, [None] * size) for name in wanted}
+        return self
+
+    def save(self):
+        """Tulis catalog (atomic replace)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        if self.is_parquet:
+            if _load_pyarrow() is None:
+                raise RuntimeError("Writing a Parquet catalog needs pyarrow (use a .json.gz path instead)")
+            types = {"str": pa.string(), "int": pa.int64(), "float": pa.float64()}
+            table = pa.table({name: pa.array(self.columns[name], type=types[kind]) for name, kind in COLUMNS})
+            pq.write_table(table, tmp_path, compression='zstd')
+        else:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                json.dump({"version": 1, "columns": self.columns}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def rows(self, columns: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Iterate row sebagai dict (hanya kolom yang diminta)"""
+        names = columns or list(self.columns)
+        for values in zip(*(self.columns[name] for name in names)):
+            yield dict(zip(names, values))
+
+    def update(self, base_dir: str, shard_dir: Optional[str] = None) -> Dict[str, int]:
+        """
+        Sinkronkan catalog dengan downloads tree (dan tar shards)
+
+        Args:
+            base_dir: Base output directory (downloads/{channel}/{video_id}/)
+            shard_dir: Folder tar shards (default: <base_dir>/shards kalau ada)
+
+        Returns:
+            {"rows", "unchanged", "updated", "removed"}
+        """
+        self.load()
+        previous = {
+            source: idx for idx, source in enumerate(self.columns["source"])
+        }
+        shard_path = Path(shard_dir) if shard_dir else Path(base_dir) / "shards"
+
+        columns: Dict[str, list] = {name: [] for name in COLUMN_NAMES}
+        unchanged = updated = 0
+        for source, mtime_ns, size, read_row in _scan_sources(Path(base_dir), shard_path):
+            idx = previous.pop(source, None)
+            if (idx is not None and self.columns["source_mtime_ns"][idx] == mtime_ns
+                    and self.columns["source_size"][idx] == size):
+                for name in COLUMN_NAMES:
+                    columns[name].append(self.columns[name][idx])
+                unchanged += 1
+                continue
+            try:
+                row = read_row()
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping {source}: {e}")
+                continue
+            row.update(source=source, source_mtime_ns=mtime_ns, source_size=size)
+            for name, kind in COLUMNS:
+                columns[name].append(_coerce(row.get(name), kind))
+            updated += 1
+
+        self.columns = columns
+        return {"rows": len(self), "unchanged": unchanged, "updated": updated, "removed": len(previous)}
+
+
+def _read_json(path: Path) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _scan_sources(base_dir: Path, shard_dir: Path) -> Iterator[Tuple[str, int, int, Callable[[], Dict]]]:
+    """
+    Yields:
+        (source, mtime_ns, size, read_row) — read_row() hanya dipanggil untuk source yang berubah
+    """
+    if base_dir.is_dir():
+        for channel_entry in sorted(os.scandir(base_dir), key=lambda e: e.name):
+            if not channel_entry.is_dir() or channel_entry.name.startswith('.') \
+                    or Path(channel_entry.path) == shard_dir:
+                continue
+            channel_name = channel_entry.name
+            for video_entry in sorted(os.scandir(channel_entry.path), key=lambda e: e.name):
+                if not video_entry.is_dir():
+                    continue
+                video_id = video_entry.name
+                metadata_file = Path(video_entry.path) / f"{video_id}.json"
+                info_file = Path(video_entry.path) / f"{video_id}.info.json"
+                for path, builder in ((metadata_file, _row_from_metadata), (info_file, _row_from_info)):
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    yield (str(path), stat.st_mtime_ns, stat.st_size,
+                           lambda path=path, builder=builder, channel_name=channel_name:
+                           builder(_read_json(path), channel_name))
+                    break
+
+    # Tar output: shard tidak pernah diubah setelah ditulis, source = shard#member
+    if shard_dir.is_dir():
+        for entry in iter_index(str(shard_dir)):
+            member = entry["members"].get("json")
+            if not member:
+                continue
+            source = f"{entry['shard']}#{member['member']}"
+            yield (source, 0, member["size"],
+                   lambda entry=entry, member=member:
+                   _row_from_metadata(json.loads(read_member(entry["shard"], member)), entry["channel_name"]))
+
+
+def query(
+    catalog: Catalog,
+    min_sample_rate: Optional[int] = None,
+    channels: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    min_duration: Optional[float] = None,
+    audio_format: Optional[str] = None,
+    group_by: str = "channel"
+) -> List[Dict]:
+    """
+    Filter + aggregasi per group
+
+    Args:
+        catalog: Catalog yang sudah di-load
+        min_sample_rate: Sample rate minimum (e.g., 44100)
+        channels: Hanya channel ini
+        since: upload_date >= since (YYYYMMDD, prefix boleh: 2023)
+        until: upload_date <= until (YYYYMMDD, prefix boleh)
+        min_duration: Durasi minimum (detik)
+        audio_format: Format file (wav / flac / ...)
+        group_by: Key di GROUP_KEYS
+
+    Returns:
+        List {"group", "videos", "hours", "size_gb"} urut berdasarkan hours (desc)
+    """
+    key = GROUP_KEYS[group_by]
+    channel_set = set(channels) if channels else None
+    until_key = until.ljust(8, '9') if until else None
+    groups: Dict[object, Dict] = defaultdict(lambda: {"videos": 0, "seconds": 0.0, "bytes": 0})
+
+    for row in catalog.rows():
+        if min_sample_rate and (row["sample_rate"] or 0) < min_sample_rate:
+            continue
+        if channel_set is not None and row["channel_name"] not in channel_set:
+            continue
+        upload_date = row["upload_date"] or ""
+        if since and upload_date < since:
+            continue
+        if until_key and (not upload_date or upload_date > until_key):
+            continue
+        if min_duration and (row["duration_sec"] or 0) < min_duration:
+            continue
+        if audio_format and row["format"] != audio_format:
+            continue
+        group = groups[key(row)]
+        group["videos"] += 1
+        group["seconds"] += row["duration_sec"] or 0
+        group["bytes"] += row["file_size"] or 0
+
+    results = [
+        {"group": name, "videos": group["videos"], "hours": round(group["seconds"] / 3600, 3),
+         "size_gb": round(group["bytes"] / 1024 ** 3, 3)}
+        for name, group in groups.items()
+    ]
+    results.sort(key=lambda r: r["hours"], reverse=True)
+    return results
+
+
+QUERY_COLUMNS = ["channel_name", "upload_date", "duration_sec", "sample_rate", "channels", "format", "file_size"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Columnar metadata catalog for a downloads tree')
+    parser.add_argument('--catalog', type=str, default=None,
+                        help='Catalog file, .parquet (needs pyarrow) or .json.gz '
+                             '(default: <base_dir>/catalog.parquet or catalog.json.gz)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='Create or incrementally update the catalog')
+    build.add_argument('base_dir', nargs='?', default='downloads', help='Downloads directory (default: downloads)')
+    build.add_argument('--shard-dir', type=str, default=None,
+                       help='Tar shards from --output-format tar (default: <base_dir>/shards)')
+
+    query_parser = subparsers.add_parser('query', help='Filter and aggregate the catalog')
+    query_parser.add_argument('base_dir', nargs='?', default='downloads',
+                              help='Downloads directory, used to locate the default catalog (default: downloads)')
+    query_parser.add_argument('--min-sample-rate', type=int, default=None, help='e.g. 44100')
+    query_parser.add_argument('--channel', action='append', default=None, help='Channel name (repeatable)')
+    query_parser.add_argument('--since', type=str, default=None, help='Upload date from, YYYYMMDD or prefix')
+    query_parser.add_argument('--until', type=str, default=None, help='Upload date until, YYYYMMDD or prefix')
+    query_parser.add_argument('--min-duration', type=float, default=None, help='Minimum duration in seconds')
+    query_parser.add_argument('--format', type=str, default=None, help='Audio format (wav, flac, ...)')
+    query_parser.add_argument('--group-by', choices=list(GROUP_KEYS), default='channel',
+                              help='Aggregate per group (default: channel)')
+    query_parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    catalog = Catalog(args.catalog or str(default_catalog_path(args.base_dir)))
+
+    if args.command == 'build':
+        started = time.perf_counter()
+        stats = catalog.update(args.base_dir, args.shard_dir)
+        catalog.save()
+        logger.info(f"Catalog {catalog.path}: {stats['rows']} rows ({stats['updated']} updated, "
+                    f"{stats['unchanged']} unchanged, {stats['removed']} removed) "
+                    f"in {time.perf_counter() - started:.2f}s")
+        return
+
+    if not catalog.path.exists():
+        parser.error(f"Catalog not found: {catalog.path} (run the build command first)")
+    catalog.load(QUERY_COLUMNS)
+    results = query(catalog, min_sample_rate=args.min_sample_rate, channels=args.channel,
+                    since=args.since, until=args.until, min_duration=args.min_duration,
+                    audio_format=args.format, group_by=args.group_by)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    print(f"{args.group_by:<30} {'videos':>8} {'hours':>10} {'GB':>8}")
+    for row in results:
+        print(f"{str(row['group']):<30} {row['videos']:>8} {row['hours']:>10.2f} {row['size_gb']:>8.2f}")
+    print(f"{'total':<30} {sum(r['videos'] for r in results):>8} "
+          f"{sum(r['hours'] for r in results):>10.2f} {sum(r['size_gb'] for r in results):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Channel Layout Analysis
+Tentukan apakah audio multi-channel boleh di-downmix ke mono atau harus tetap
+multitrack (channel berisi speaker yang berbeda), sesuai notion.md 3.3
+"""
+
+import subprocess
+import tempfile
+import wave
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+# numpy di-import saat analisis pertama, bukan saat module di-import (startup CLI)
+np = None
+_numpy_checked = False
+
+logger = logging.getLogger(__name__)
+
+# Threshold keputusan
+CORRELATION_MONO = 0.7       # channel sangat mirip -> mono
+CORRELATION_INVERTED = -0.3  # di bawah ini downmix (rata-rata) saling meniadakan -> multitrack
+SOLO_RATIO = 0.9             # satu channel >= 90% energy frame -> frame "solo"
+SOLO_FRACTION_MULTITRACK = 0.1  # tiap channel solo di >= 10% active frames -> multitrack
+SILENCE_DBFS = -50.0         # frame di bawah ini dianggap hening
+
+
+def _load_numpy():
+    """Import numpy sekali; None kalau tidak terinstall (numpy optional: selalu mono, default notion.md)"""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+        _numpy_checked = True
+    return np
+
+
+def _iter_pcm_wave(path: Path, chunk_frames: int) -> Iterator["np.ndarray"]:
+    """Baca 16-bit PCM WAV secara bertahap pakai stdlib wave (tanpa subprocess)"""
+    with wave.open(str(path), 'rb') as wav:
+        channels = wav.getnchannels()
+        while True:
+            raw = wav.readframes(chunk_frames)
+            if not raw:
+                break
+            yield np.frombuffer(raw, dtype='<i2').reshape(-1, channels)
+
+
+def _iter_pcm_ffmpeg(path: Path, channels: int, sample_rate: int, chunk_frames: int,
+                     ffmpeg: str = 'ffmpeg') -> Iterator["np.ndarray"]:
+    """
+    Decode format apa saja ke 16-bit PCM lewat pipe ffmpeg, chunk demi chunk
+
+    Raises:
+        RuntimeError: ffmpeg exit non-zero (file rusak / format tidak didukung)
+    """
+    cmd = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-nostdin', '-i', str(path),
+           '-vn', '-f', 's16le', '-acodec', 'pcm_s16le',
+           '-ac', str(channels), '-ar', str(sample_rate), '-']
+    chunk_bytes = chunk_frames * channels * 2
+    # stderr ke temp file (bukan pipe): error yang panjang tidak bisa membuat ffmpeg block
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            while True:
+                raw = proc.stdout.read(chunk_bytes)
+                if not raw:
+                    break
+                usable = len(raw) - len(raw) % (channels * 2)
+                yield np.frombuffer(raw[:usable], dtype='<i2').reshape(-1, channels)
+            if proc.wait() != 0:
+                stderr.seek(0)
+                error = stderr.read().decode('utf-8', 'replace').strip().splitlines()
+                raise RuntimeError(f"ffmpeg decode failed: {error[-1] if error else f'exit {proc.returncode}'}")
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+
+def _wave_info(path: Path) -> Optional[Dict]:
+    """Channel count dan sample rate dari WAV 16-bit, atau None kalau bukan WAV PCM"""
+    try:
+        with wave.open(str(path), 'rb') as wav:
+            if wav.getsampwidth() != 2:
+                return None
+            return {"channels": wav.getnchannels(), "sample_rate": wav.getframerate()}
+    except (wave.Error, EOFError, OSError):
+        return None
+
+
+def analyze_channel_layout(
+    path: str,
+    channels: Optional[int] = None,
+    analysis_rate: int = 16000,
+    frame_ms: int = 50,
+    chunk_seconds: int = 30,
+    ffmpeg: str = 'ffmpeg'
+) -> Dict:
+    """
+    Hitung inter-channel correlation dan energy ratio per frame, lalu putuskan
+    mono downmix vs keep multitrack
+
+    Audio dibaca per chunk (default 30 detik), jadi memory tetap bounded walaupun
+    file-nya berjam-jam. Setiap chunk di-reshape menjadi frame (view, tanpa copy)
+    dan statistik dihitung vectorized per frame.
+
+    Keputusan:
+        - |correlation| >= CORRELATION_MONO dan positif: mono (channel identik)
+        - |correlation| >= CORRELATION_MONO dan negatif (phase-inverted, L = -R):
+          multitrack, karena downmix rata-rata akan menjadi hening
+        - Tiap channel solo di cukup banyak frame: multitrack (speaker berbeda)
+        - correlation <= CORRELATION_INVERTED: multitrack (downmix sebagian cancel)
+        - Selain itu: mono
+
+    Args:
+        path: File audio
+        channels: Jumlah channel source (default: dari header WAV, atau 2)
+        analysis_rate: Sample rate untuk decode non-WAV (cukup untuk speech)
+        frame_ms: Panjang frame analisis (ms)
+        chunk_seconds: Panjang chunk yang di-decode sekaligus
+        ffmpeg: Path ke ffmpeg binary
+
+    Returns:
+        Dict dengan decision ('mono' / 'multitrack'), reason, dan statistik
+    """
+    if _load_numpy() is None:
+        return {"decision": "mono", "reason": "numpy not installed, using default mono downmix"}
+
+    path = Path(path)
+    info = _wave_info(path) if path.suffix.lower() == '.wav' else None
+    if info:
+        channels = info["channels"]
+        sample_rate = info["sample_rate"]
+        chunks = _iter_pcm_wave(path, sample_rate * chunk_seconds)
+    else:
+        channels = channels or 2
+        sample_rate = analysis_rate
+        chunks = _iter_pcm_ffmpeg(path, channels, sample_rate, sample_rate * chunk_seconds, ffmpeg)
+
+    if channels < 2:
+        return {"decision": "mono", "reason": "source is already mono", "channels": channels}
+
+    frame_len = max(1, sample_rate * frame_ms // 1000)
+    silence = (10 ** (SILENCE_DBFS / 20) * 32768) ** 2 * frame_len
+    pairs = np.triu_indices(channels, k=1)
+
+    total_frames = 0
+    active_frames = 0
+    corr_weighted = 0.0
+    corr_weight = 0.0
+    solo_counts = np.zeros(channels, dtype=np.int64)
+    channel_energy = np.zeros(channels, dtype=np.float64)
+    leftover = np.empty((0, channels), dtype=np.float32)
+
+    try:
+        for pcm in chunks:
+            samples = np.concatenate([leftover, pcm.astype(np.float32)])
+            n_frames = len(samples) // frame_len
+            leftover = samples[n_frames * frame_len:]
+            if n_frames == 0:
+                continue
+
+            # (n_frames, frame_len, channels) view
+            frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len, channels)
+            # Covariance per frame: diagonal = energy per channel, off-diagonal = cross energy
+            cov = np.einsum('fti,ftj->fij', frames, frames, dtype=np.float64)
+            energy = np.diagonal(cov, axis1=1, axis2=2)
+            frame_total = energy.sum(axis=1)
+
+            active = frame_total > silence
+            total_frames += n_frames
+            if not active.any():
+                continue
+            active_frames += int(active.sum())
+
+            energy = energy[active]
+            frame_total = frame_total[active]
+            cross = cov[active][:, pairs[0], pairs[1]]
+            norm = np.sqrt(energy[:, pairs[0]] * energy[:, pairs[1]])
+            corr = np.divide(cross, norm, out=np.zeros_like(cross), where=norm > 0).mean(axis=1)
+
+            # Energy-weighted correlation (bagian yang keras lebih menentukan)
+            corr_weighted += float((corr * frame_total).sum())
+            corr_weight += float(frame_total.sum())
+
+            share = energy / frame_total[:, None]
+            solo_counts += (share >= SOLO_RATIO).sum(axis=0)
+            channel_energy += energy.sum(axis=0)
+    except RuntimeError as e:
+        # Decode gagal: jangan downmix berdasarkan data yang tidak lengkap
+        logger.warning(f"Channel analysis could not decode {path.name}, keeping channels: {e}")
+        return {"decision": "multitrack", "reason": f"decode failed, file kept unchanged ({e})",
+                "channels": channels}
+
+    stats = {
+        "channels": channels,
+        "analyzed_seconds": round(total_frames * frame_len / sample_rate, 2),
+        "active_frames": active_frames,
+    }
+    if active_frames == 0:
+        return {"decision": "mono", "reason": "no active audio", **stats}
+
+    correlation = corr_weighted / corr_weight
+    solo_fraction = solo_counts / active_frames
+    energy_db = 10 * np.log10(np.maximum(channel_energy, 1e-9) / max(channel_energy.max(), 1e-9))
+    stats.update({
+        "correlation": round(correlation, 4),
+        "solo_fraction": [round(float(x), 4) for x in solo_fraction],
+        "energy_ratio_db": [round(float(x), 2) for x in energy_db],
+    })
+
+    if abs(correlation) >= CORRELATION_MONO:
+        if correlation > 0:
+            return {"decision": "mono", "reason": "channels are highly correlated", **stats}
+        return {"decision": "multitrack", "reason": "channels are phase-inverted, downmix would cancel", **stats}
+    if (solo_fraction >= SOLO_FRACTION_MULTITRACK).sum() >= 2:
+        return {"decision": "multitrack", "reason": "channels carry separate speakers", **stats}
+    if correlation <= CORRELATION_INVERTED:
+        return {"decision": "multitrack", "reason": "channels are partly out of phase, downmix would cancel", **stats}
+    return {"decision": "mono", "reason": "no separate speaker tracks detected", **stats}
@@ -0,0 +1,81 @@
+"""
+Cached Per-Channel Video Listing
+Simpan newest video ID + full ID list (dan durasi dari flat entries) per channel
+supaya listing berikutnya cukup paging sampai ketemu video yang sudah dikenal
+"""
+
+import hashlib
+import json
+import os
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelListingCache:
+    """
+    JSON cache untuk hasil listing channel (1 file per channel)
+
+    Format file:
+        {
+            "channel_url": "...",
+            "newest_id": "Jq7llIkbJeA",
+            "video_ids": ["Jq7llIkbJeA", ...],   # newest first
+            "durations": {"Jq7llIkbJeA": 1834, ...},  # detik, hanya yang diketahui
+            "updated_at": 1700000000.0
+        }
+    """
+
+    def __init__(self, cache_dir: str):
+        """
+        Args:
+            cache_dir: Directory untuk menyimpan cache files
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path_for(self, channel_url: str) -> Path:
+        key = hashlib.sha1(channel_url.strip().rstrip('/').encode('utf-8')).hexdigest()[:16]
+        return self.cache_dir / f"{key}.json"
+
+    def load(self, channel_url: str) -> Optional[Dict]:
+        """
+        Load cached listing untuk channel
+
+        Returns:
+            Cache dict, atau None kalau belum ada / corrupt
+        """
+        path = self._path_for(channel_url)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable channel cache {path}: {e}")
+            return None
+
+    def save(self, channel_url: str, video_ids: List[str], durations: Optional[Dict[str, float]] = None):
+        """
+        Simpan full listing (newest first) secara atomic
+
+        Args:
+            channel_url: YouTube channel URL
+            video_ids: Semua video ID di channel, newest first
+            durations: Durasi per video ID (detik) dari flat playlist entries
+        """
+        path = self._path_for(channel_url)
+        data = {
+            "channel_url": channel_url,
+            "newest_id": video_ids[0] if video_ids else None,
+            "video_ids": video_ids,
+            "durations": durations or {},
+            "updated_at": time.time(),
+        }
+        tmp_path = path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
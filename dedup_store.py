@@ -0,0 +1,258 @@
+"""
+Content-Addressed Audio Store (cross-channel dedup)
+Audio disimpan sekali per SHA-256 di objects/{sha[:2]}/{sha}.{ext}; video yang muncul
+di beberapa channel (collab, reupload, playlist) cukup di-hardlink ke folder channel
+berikutnya (atau direferensikan lewat metadata kalau hardlink tidak bisa), tanpa
+download / transcode ulang.
+"""
+
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+from manifest import file_checksum
+
+logger = logging.getLogger(__name__)
+
+LINK_MODES = ("hardlink", "reference")
+
+
+class DedupStore:
+    """
+    Store audio per video_id + hash konten
+
+    Tables:
+    - objects: sha256 -> path object di store (satu file per konten)
+    - videos:  video_id -> sha256 + folder asal (metadata JSON pertama)
+    - refs:    (video_id, channel_name) -> path di folder channel + jenis link
+
+    Dua file dengan hash sama (reupload identik dengan video_id berbeda) juga
+    berbagi satu object. `claim()` / `release()` mencegah dua worker men-download
+    video yang sama secara bersamaan dari channel berbeda.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS objects (
+            sha256     TEXT PRIMARY KEY,
+            path       TEXT NOT NULL,
+            file_size  INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS videos (
+            video_id   TEXT PRIMARY KEY,
+            sha256     TEXT NOT NULL REFERENCES objects(sha256),
+            source_dir TEXT,
+            created_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS refs (
+            video_id     TEXT NOT NULL,
+            channel_name TEXT NOT NULL,
+            path         TEXT NOT NULL,
+            kind         TEXT NOT NULL,
+            created_at   REAL NOT NULL,
+            PRIMARY KEY (video_id, channel_name)
+        );
+    """
+
+    def __init__(self, store_dir: str, link_mode: str = "hardlink"):
+        """
+        Args:
+            store_dir: Folder store (e.g., downloads/.store); harus di filesystem
+                yang sama dengan output dir supaya hardlink bisa dipakai
+            link_mode: "hardlink" = file audio di folder channel berikutnya adalah
+                hardlink ke object (fallback ke reference kalau gagal),
+                "reference" = tidak ada file, metadata menunjuk ke object
+        """
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode: {link_mode} (choose from {', '.join(LINK_MODES)})")
+        self.store_dir = Path(store_dir)
+        self.objects_dir = self.store_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.link_mode = link_mode
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.store_dir / "store.sqlite"), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+
+        # video_id yang sedang di-download oleh worker lain
+        self._pending: Dict[str, threading.Event] = {}
+        self._pending_lock = threading.Lock()
+
+    def lookup(self, video_id: str) -> Optional[Dict]:
+        """
+        Object untuk video_id (None kalau belum ada atau file object hilang)
+
+        Returns:
+            {"video_id", "sha256", "path", "file_size", "source_dir"}
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT v.video_id, v.sha256, v.source_dir, o.path, o.file_size
+                FROM videos v JOIN objects o ON o.sha256 = v.sha256
+                WHERE v.video_id = ?
+                """,
+                (video_id,)
+            ).fetchone()
+        if not row or not Path(row['path']).exists():
+            return None
+        return dict(row)
+
+    def get_ref(self, video_id: str, channel_name: str) -> Optional[Dict]:
+        """Ref video_id di folder channel (None kalau belum ada atau file-nya hilang)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM refs WHERE video_id = ? AND channel_name = ?",
+                (video_id, channel_name)
+            ).fetchone()
+        if not row or not Path(row['path']).exists():
+            return None
+        return dict(row)
+
+    def _record_ref(self, video_id: str, channel_name: str, path: Path, kind: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO refs (video_id, channel_name, path, kind, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (video_id, channel_name, str(path), kind, time.time())
+            )
+
+    def ingest(self, video_id: str, channel_name: str, audio_file: Path) -> Dict:
+        """
+        Masukkan file audio hasil download ke store
+
+        Kalau konten yang sama sudah ada (video_id lain), audio_file diganti dengan
+        hardlink ke object yang ada; kalau belum, object dibuat sebagai hardlink ke
+        audio_file (copy kalau hardlink tidak bisa).
+
+        Args:
+            video_id: YouTube video ID
+            channel_name: Channel pemilik file ini
+            audio_file: File audio final di downloads/{channel}/{video_id}/
+
+        Returns:
+            Entry seperti lookup()
+        """
+        audio_file = Path(audio_file)
+        sha256 = file_checksum(audio_file)
+        object_path = self.objects_dir / sha256[:2] / f"{sha256}{audio_file.suffix}"
+
+        with self._lock:
+            row = self._conn.execute("SELECT path FROM objects WHERE sha256 = ?", (sha256,)).fetchone()
+        if row and Path(row['path']).exists():
+            object_path = Path(row['path'])
+            if not audio_file.samefile(object_path):
+                # Konten identik: satu inode untuk semua video_id
+                try:
+                    tmp_path = audio_file.with_name(audio_file.name + '.tmp')
+                    os.link(object_path, tmp_path)
+                    os.replace(tmp_path, audio_file)
+                except OSError as e:
+                    logger.debug(f"Could not hardlink {audio_file} to {object_path}: {e}")
+        else:
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(audio_file, object_path)
+            except FileExistsError:
+                pass
+            except OSError:
+                shutil.copy2(audio_file, object_path)
+
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO objects (sha256, path, file_size, created_at) VALUES (?, ?, ?, ?)",
+                (sha256, str(object_path), object_path.stat().st_size, now)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO videos (video_id, sha256, source_dir, created_at) VALUES (?, ?, ?, ?)",
+                (video_id, sha256, str(audio_file.parent), now)
+            )
+        self._record_ref(video_id, channel_name, audio_file, "source")
+        return self.lookup(video_id)
+
+    def materialize(self, video_id: str, channel_name: str, target_dir: Path) -> Dict:
+        """
+        Buat audio video_id tersedia di folder channel lain
+
+        Args:
+            video_id: YouTube video ID (harus sudah ada di store)
+            channel_name: Channel tujuan
+            target_dir: downloads/{channel}/{video_id}/
+
+        Returns:
+            {"path": file audio (hardlink) atau object (reference), "kind": "hardlink" | "reference",
+             "sha256", "object"}
+        """
+        entry = self.lookup(video_id)
+        if entry is None:
+            raise KeyError(f"{video_id} is not in the dedup store")
+        object_path = Path(entry['path'])
+
+        path, kind = object_path, "reference"
+        if self.link_mode == "hardlink":
+            target_dir.mkdir(parents=True, exist_ok=True)
+            target = target_dir / f"{video_id}{object_path.suffix}"
+            try:
+                if target.exists():
+                    target.unlink()
+                os.link(object_path, target)
+                path, kind = target, "hardlink"
+            except OSError as e:
+                logger.warning(f"Hardlink failed for {video_id} ({e}), using a store reference")
+
+        self._record_ref(video_id, channel_name, path, kind)
+        return {"path": path, "kind": kind, "sha256": entry['sha256'], "object": str(object_path)}
+
+    def claim(self, video_id: str) -> bool:
+        """
+        Klaim download video_id. Kalau worker lain sedang men-download video yang
+        sama, tunggu sampai selesai.
+
+        Returns:
+            True = caller yang download (wajib release()), False = sudah ada di store
+        """
+        while True:
+            if self.lookup(video_id):
+                return False
+            with self._pending_lock:
+                event = self._pending.get(video_id)
+                if event is None:
+                    self._pending[video_id] = threading.Event()
+                    return True
+            event.wait()
+
+    def release(self, video_id: str):
+        """Lepas klaim (sukses atau gagal); worker yang menunggu cek store lagi"""
+        with self._pending_lock:
+            event = self._pending.pop(video_id, None)
+        if event:
+            event.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Jumlah object, video dan ref per jenis link"""
+        with self._lock:
+            objects = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(file_size), 0) FROM objects").fetchone()
+            videos = self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+            refs = dict(self._conn.execute("SELECT kind, COUNT(*) FROM refs GROUP BY kind").fetchall())
+        return {
+            "objects": objects[0],
+            "object_bytes": objects[1],
+            "videos": videos,
+            "source_refs": refs.get("source", 0),
+            "hardlinks": refs.get("hardlink", 0),
+            "references": refs.get("reference", 0),
+        }
+
+    def close(self):
+        """Close SQLite connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,241 @@
+"""
+Identity Pool (Cookies + Headers)
+Sebar request ke beberapa identity (cookie file / cookie string + header set)
+secara round-robin. Setiap identity punya token bucket, failure counter dan
+cooldown sendiri, jadi identity yang kena rate limit diistirahatkan sementara
+identity lain tetap jalan.
+"""
+
+import json
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from scheduler import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+class Identity:
+    """Satu identity: cookies, headers, dan state kesehatan"""
+
+    def __init__(
+        self,
+        name: str,
+        cookies_file: Optional[str] = None,
+        cookie_string: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """
+        Args:
+            name: Nama identity (untuk log dan key per-identity resources)
+            cookies_file: Netscape cookies.txt (untuk yt-dlp)
+            cookie_string: Cookie header "a=1; b=2" (untuk requests)
+            headers: HTTP headers tambahan (User-Agent, dll)
+        """
+        self.name = name
+        self.cookies_file = cookies_file
+        self.cookie_string = cookie_string
+        self.headers = dict(headers or {})
+        self.bucket: Optional[TokenBucket] = None
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.strikes = 0
+        self.cooldown_until = 0.0
+
+    def cookies(self) -> Dict[str, str]:
+        """Parse cookie_string menjadi dict name -> value"""
+        cookies = {}
+        for cookie in (self.cookie_string or '').split(';'):
+            if '=' in cookie:
+                name, value = cookie.split('=', 1)
+                cookies[name.strip()] = value.strip()
+        return cookies
+
+    def to_dict(self) -> Dict:
+        """Ringkasan state untuk log / stats"""
+        return {
+            "name": self.name,
+            "successes": self.successes,
+            "failures": self.failures,
+            "cooling_down": max(0.0, self.cooldown_until - time.monotonic()),
+        }
+
+
+class IdentityPool:
+    """
+    Round-robin pool of identities dengan health-based rotation
+
+    `checkout()` memilih identity berikutnya yang tidak sedang cooldown dan
+    mengambil token dari bucket-nya. Setelah request, caller melapor lewat
+    `report_success` / `report_failure`; setelah `failure_threshold` kegagalan
+    berturut-turut (atau satu kali throttled) identity masuk cooldown yang
+    berlipat dua setiap kali terulang.
+    """
+
+    def __init__(
+        self,
+        identities: List[Identity],
+        rate: float = 0.2,
+        capacity: float = 1.0,
+        failure_threshold: int = 3,
+        cooldown: float = 300.0,
+        max_cooldown: float = 3600.0
+    ):
+        """
+        Args:
+            identities: List of Identity
+            rate: Request per detik untuk setiap identity
+            capacity: Burst size per identity
+            failure_threshold: Kegagalan berturut-turut sebelum cooldown
+            cooldown: Cooldown pertama (detik)
+            max_cooldown: Batas atas cooldown
+        """
+        if not identities:
+            raise ValueError("IdentityPool needs at least one identity")
+        self.identities = identities
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        for identity in identities:
+            identity.bucket = TokenBucket(rate, capacity)
+        self._cursor = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.identities)
+
+    def checkout(self) -> Tuple[Identity, float]:
+        """
+        Pilih identity berikutnya tanpa blocking
+
+        Returns:
+            (identity, detik yang harus ditunggu sebelum request)
+        """
+        with self._lock:
+            now = time.monotonic()
+            count = len(self.identities)
+            for offset in range(count):
+                identity = self.identities[(self._cursor + offset) % count]
+                if identity.cooldown_until <= now:
+                    self._cursor = (self._cursor + offset + 1) % count
+                    return identity, identity.bucket.reserve()
+
+            # Semua identity cooldown: pakai yang paling cepat pulih
+            identity = min(self.identities, key=lambda i: i.cooldown_until)
+            cooldown_wait = identity.cooldown_until - now
+        logger.warning(f"All {count} identities cooling down, "
+                       f"waiting {cooldown_wait:.0f}s for {identity.name}")
+        return identity, cooldown_wait + identity.bucket.reserve()
+
+    def acquire(self) -> Identity:
+        """Blocking checkout: tunggu cooldown / token lalu return identity"""
+        identity, wait = self.checkout()
+        if wait > 0:
+            time.sleep(wait)
+        return identity
+
+    def set_rate(self, rate: float):
+        """Ubah rate bucket semua identity (dipakai oleh AIMD controller)"""
+        for identity in self.identities:
+            identity.bucket.set_rate(rate)
+
+    def report_success(self, identity: Identity):
+        """Request sukses: reset failure streak"""
+        with self._lock:
+            identity.successes += 1
+            identity.consecutive_failures = 0
+            identity.strikes = max(0, identity.strikes - 1)
+
+    def report_failure(self, identity: Identity, throttled: bool = False):
+        """
+        Request gagal; throttled (403/429) langsung memicu cooldown
+
+        Args:
+            identity: Identity yang dipakai
+            throttled: True kalau server menolak karena rate limit / bot check
+        """
+        with self._lock:
+            identity.failures += 1
+            identity.consecutive_failures += 1
+            if not throttled and identity.consecutive_failures < self.failure_threshold:
+                return
+            identity.strikes += 1
+            identity.consecutive_failures = 0
+            duration = min(self.max_cooldown, self.cooldown * 2 ** (identity.strikes - 1))
+            identity.cooldown_until = time.monotonic() + duration
+        logger.warning(f"Identity {identity.name} cooling down for {duration:.0f}s "
+                       f"({'throttled' if throttled else 'repeated failures'})")
+
+    def stats(self) -> List[Dict]:
+        """State per identity"""
+        with self._lock:
+            return [identity.to_dict() for identity in self.identities]
+
+    @classmethod
+    def from_cookie_files(cls, cookies_files: List[str], headers: Optional[Dict[str, str]] = None,
+                          **kwargs) -> "IdentityPool":
+        """
+        Satu identity per Netscape cookies.txt (untuk yt-dlp)
+
+        Args:
+            cookies_files: List path cookies file
+            headers: Headers yang dipakai semua identity
+            **kwargs: Diteruskan ke IdentityPool
+        """
+        identities = []
+        for path in cookies_files:
+            if not Path(path).exists():
+                logger.warning(f"Cookies file not found, skipping identity: {path}")
+                continue
+            identities.append(Identity(Path(path).stem, cookies_file=str(path), headers=headers))
+        return cls(identities, **kwargs)
+
+    @classmethod
+    def from_cookie_lines(cls, cookies_file: str, headers: Optional[Dict[str, str]] = None,
+                          **kwargs) -> "IdentityPool":
+        """
+        Satu identity per baris cookie string (format config_cookies.txt)
+
+        Args:
+            cookies_file: File dengan satu "name=value; ..." per baris (# = komentar)
+            headers: Headers yang dipakai semua identity
+            **kwargs: Diteruskan ke IdentityPool
+        """
+        identities = []
+        path = Path(cookies_file)
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        identities.append(Identity(f"{path.stem}#{len(identities) + 1}",
+                                                   cookie_string=line, headers=headers))
+        if not identities:
+            identities.append(Identity("anonymous", headers=headers))
+        return cls(identities, **kwargs)
+
+    @classmethod
+    def from_config(cls, config_file: str, **kwargs) -> "IdentityPool":
+        """
+        Load dari JSON: [{"name": ..., "cookies_file": ..., "cookie_string": ..., "headers": {...}}]
+
+        Args:
+            config_file: Path JSON config
+            **kwargs: Diteruskan ke IdentityPool
+        """
+        with open(config_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        identities = [
+            Identity(
+                entry.get("name") or f"identity{idx}",
+                cookies_file=entry.get("cookies_file"),
+                cookie_string=entry.get("cookie_string"),
+                headers=entry.get("headers")
+            )
+            for idx, entry in enumerate(entries, 1)
+        ]
+        return cls(identities, **kwargs)
@@ -0,0 +1,220 @@
+"""
+Persistent Download Manifest (SQLite)
+Index video_id -> status, output path, size, checksum supaya video yang sudah selesai
+langsung di-skip tanpa request ke YouTube
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Extension yang bukan audio di dalam folder {video_id}/
+METADATA_SUFFIXES = ('.json', '.part', '.ytdl', '.tmp')
+
+
+def file_checksum(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Hitung SHA-256 dari file secara streaming
+
+    Args:
+        path: Path ke file
+        chunk_size: Ukuran chunk yang dibaca per iterasi
+
+    Returns:
+        Hex digest SHA-256
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_audio_file(video_dir: Path, video_id: str) -> Optional[Path]:
+    """
+    Cari file audio {video_id}.{ext} di dalam folder video
+
+    Args:
+        video_dir: Folder downloads/{channel}/{video_id}/
+        video_id: YouTube video ID
+
+    Returns:
+        Path ke file audio, atau None kalau belum ada
+    """
+    if not video_dir.is_dir():
+        return None
+    # Hanya {video_id}.{ext}: sisa intermediate yt-dlp ({id}.f251.webm, {id}.temp.wav)
+    # tidak boleh tercatat sebagai output
+    for path in sorted(video_dir.glob(f"{video_id}.*")):
+        if path.stem == video_id and path.is_file() and not path.name.endswith(METADATA_SUFFIXES):
+            return path
+    return None
+
+
+class DownloadManifest:
+    """
+    SQLite manifest untuk semua video yang pernah diproses
+
+    Primary key = video_id, jadi lookup `is_complete` adalah satu index lookup.
+    Aman dipakai dari beberapa worker thread (satu connection + lock).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS videos (
+            video_id     TEXT PRIMARY KEY,
+            channel_name TEXT,
+            status       TEXT NOT NULL,
+            output_path  TEXT,
+            file_size    INTEGER,
+            checksum     TEXT,
+            error        TEXT,
+            updated_at   REAL NOT NULL
+        )
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: Path ke file SQLite (dibuat kalau belum ada)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(self.SCHEMA)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_status ON videos(status)")
+
+    def get(self, video_id: str) -> Optional[Dict]:
+        """Get manifest entry untuk video_id (None kalau belum ada)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def is_complete(self, video_id: str) -> bool:
+        """
+        Check apakah video sudah selesai di-download dan file-nya masih ada
+
+        Args:
+            video_id: YouTube video ID
+
+        Returns:
+            True kalau status success dan output file masih ada di disk
+        """
+        entry = self.get(video_id)
+        if not entry or entry['status'] != 'success':
+            return False
+        output_path = entry.get('output_path')
+        return bool(output_path) and Path(output_path).exists()
+
+    def record(
+        self,
+        video_id: str,
+        status: str,
+        channel_name: Optional[str] = None,
+        output_path: Optional[str] = None,
+        file_size: Optional[int] = None,
+        checksum: Optional[str] = None,
+        error: Optional[str] = None
+    ):
+        """Insert atau update entry untuk video_id"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO videos (video_id, channel_name, status, output_path,
+                                    file_size, checksum, error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET
+                    channel_name = COALESCE(excluded.channel_name, channel_name),
+                    status       = excluded.status,
+                    output_path  = COALESCE(excluded.output_path, output_path),
+                    file_size    = COALESCE(excluded.file_size, file_size),
+                    checksum     = COALESCE(excluded.checksum, checksum),
+                    error        = excluded.error,
+                    updated_at   = excluded.updated_at
+                """,
+                (video_id, channel_name, status, output_path,
+                 file_size, checksum, error, time.time())
+            )
+
+    def record_file(self, video_id: str, channel_name: str, audio_file: Path, checksum: Optional[str] = None):
+        """
+        Record video yang sukses beserta size dan checksum dari file audio
+
+        Args:
+            video_id: YouTube video ID
+            channel_name: Channel name
+            audio_file: Path ke file audio hasil download
+            checksum: SHA-256 yang sudah dihitung (e.g., oleh DedupStore); None = hitung
+        """
+        self.record(
+            video_id,
+            status='success',
+            channel_name=channel_name,
+            output_path=str(audio_file),
+            file_size=audio_file.stat().st_size,
+            checksum=checksum or file_checksum(audio_file)
+        )
+
+    def entries(self, status: Optional[str] = None) -> Iterator[Dict]:
+        """Iterate semua entry (optional filter by status)"""
+        query = "SELECT * FROM videos"
+        params = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for row in rows:
+            yield dict(row)
+
+    def rebuild_from_tree(self, base_dir: str, with_checksum: bool = True) -> int:
+        """
+        Scan downloads/{channel}/{video_id}/ dan record semua audio yang sudah ada
+
+        Args:
+            base_dir: Base output directory (e.g., downloads)
+            with_checksum: Hitung SHA-256 untuk setiap file (lebih lambat)
+
+        Returns:
+            Jumlah video yang di-record
+        """
+        base_path = Path(base_dir)
+        count = 0
+        if not base_path.is_dir():
+            return 0
+
+        logger.info(f"Rebuilding manifest from: {base_path}")
+        for channel_dir in sorted(p for p in base_path.iterdir() if p.is_dir() and not p.name.startswith('.')):
+            for video_dir in sorted(p for p in channel_dir.iterdir() if p.is_dir()):
+                video_id = video_dir.name
+                audio_file = find_audio_file(video_dir, video_id)
+                if not audio_file:
+                    continue
+                self.record(
+                    video_id,
+                    status='success',
+                    channel_name=channel_dir.name,
+                    output_path=str(audio_file),
+                    file_size=audio_file.stat().st_size,
+                    checksum=file_checksum(audio_file) if with_checksum else None
+                )
+                count += 1
+
+        logger.info(f"Manifest rebuilt: {count} videos recorded")
+        return count
+
+    def close(self):
+        """Close SQLite connection"""
+        with self._lock:
+            self._conn.close()
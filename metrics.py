@@ -0,0 +1,299 @@
+"""
+Pipeline Metrics (Counters, Gauges, Histograms)
+Latency per stage (listing, extract, transfer, ffmpeg, metadata write), byte
+counters dan throughput gauges, di-export dalam Prometheus text format lewat
+HTTP endpoint (/metrics) dan/atau file yang di-flush secara periodik.
+"""
+
+import math
+import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bucket latency (detik): dari HTTP request kecil sampai download / transcode panjang
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        f'{name}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base class: satu nama metric dengan beberapa label set"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, lock: threading.Lock):
+        self.name = name
+        self.help = help_text
+        self._lock = lock
+        self._values: Dict[LabelKey, object] = {}
+
+    def _render_samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}"
+                for key, value in self._values.items()]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            samples = self._render_samples()
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + samples
+
+
+class Counter(_Metric):
+    """Nilai yang hanya naik (jumlah video, bytes)"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Nilai yang bisa naik turun (throughput, in-flight, queue depth)"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+
+class Histogram(_Metric):
+    """Distribusi latency dengan bucket tetap (cumulative, format Prometheus)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, lock: threading.Lock,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, lock)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][idx] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Context manager: observe durasi block (juga kalau block raise)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def stats(self) -> Dict[LabelKey, Dict[str, float]]:
+        """count dan sum per label set (untuk ringkasan di log)"""
+        with self._lock:
+            return {key: {"count": state["count"], "sum": state["sum"]}
+                    for key, state in self._values.items()}
+
+    def _render_samples(self) -> List[str]:
+        lines = []
+        for key, state in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {state['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Kumpulan metrics, thread-safe
+
+    `counter()` / `gauge()` / `histogram()` idempotent: nama yang sama
+    mengembalikan metric yang sama, jadi beberapa komponen bisa berbagi registry.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self.started_at = time.time()
+
+    def _register(self, cls, name: str, help_text: str, **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, threading.Lock(), **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._register(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, buckets=buckets)
+
+    def render(self) -> str:
+        """Semua metrics dalam Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = [
+            "# HELP process_start_time_seconds Start time of the process since unix epoch",
+            "# TYPE process_start_time_seconds gauge",
+            f"process_start_time_seconds {self.started_at:.3f}",
+        ]
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    """
+    Export registry lewat HTTP (GET /metrics) dan/atau file .prom
+
+    File ditulis atomic setiap `interval` detik (format sama dengan endpoint,
+    cocok untuk node_exporter textfile collector) dan sekali lagi saat close.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        port: Optional[int] = None,
+        host: str = "0.0.0.0",
+        file_path: Optional[str] = None,
+        interval: float = 15.0
+    ):
+        """
+        Args:
+            registry: MetricsRegistry yang di-export
+            port: Port HTTP untuk /metrics (None = tanpa HTTP server)
+            host: Bind address HTTP server
+            file_path: File output, e.g. downloads/metrics.prom (None = tanpa file)
+            interval: Interval flush file (detik)
+        """
+        self.registry = registry
+        self.port = port
+        self.host = host
+        self.file_path = Path(file_path) if file_path else None
+        self.interval = interval
+        self._server = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "MetricsExporter":
+        """Start HTTP server dan flush thread (daemon)"""
+        if self.port is not None:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                        self.send_error(404)
+                        return
+                    body = registry.render().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+            self._server.daemon_threads = True
+            self.port = self._server.server_address[1]
+            thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            logger.info(f"Metrics endpoint: http://{self.host}:{self.port}/metrics")
+
+        if self.file_path:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            thread = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            logger.info(f"Metrics file: {self.file_path} (every {self.interval:.0f}s)")
+        return self
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning(f"Could not write metrics file {self.file_path}: {e}")
+
+    def flush(self):
+        """Tulis metrics ke file (atomic replace)"""
+        if not self.file_path:
+            return
+        tmp_path = self.file_path.with_name(self.file_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.registry.render())
+        os.replace(tmp_path, self.file_path)
+
+    def close(self):
+        """Stop threads, flush terakhir ke file"""
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        self.flush()
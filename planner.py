@@ -0,0 +1,191 @@
+"""
+Hours-of-Audio Planner
+Pilih dan urutkan video berdasarkan durasi dari flat playlist entries (sudah ada di
+listing, tanpa request per video), supaya crawl mengisi target dataset (jam audio)
+secepat mungkin: global budget jam / bytes, quota per channel, dan filter durasi.
+"""
+
+import re
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bitrate bestaudio YouTube (opus 251 / m4a 140) untuk estimasi bytes dari durasi
+DEFAULT_AUDIO_KBPS = 130
+
+# longest:  durasi terpanjang dulu (jam audio per request paling besar)
+# balanced: round-robin antar channel, per channel durasi terpanjang dulu
+# listing:  round-robin antar channel, per channel urutan listing (newest first)
+PLAN_ORDERS = ("longest", "balanced", "listing")
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(value: str) -> int:
+    """
+    Convert "500M" / "1.5G" / "2T" ke bytes
+
+    Raises:
+        ValueError: Format tidak dikenal
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", str(value), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size: {value}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def collect_listings(downloader, channels: List[Tuple[str, str]], max_workers: int = 1) -> Dict[str, List[Dict]]:
+    """
+    Listing semua channel (dengan durasi) sebelum planning
+
+    Args:
+        downloader: YTDownloader instance (channel_cache membuat listing ulang murah)
+        channels: List of (channel_name, channel_url)
+        max_workers: Jumlah listing yang jalan bersamaan
+
+    Returns:
+        channel_name -> entries dari get_channel_entries (kosong kalau listing gagal)
+    """
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="listing") as executor:
+        futures = {
+            channel_name: executor.submit(downloader.get_channel_entries, channel_url)
+            for channel_name, channel_url in channels
+        }
+        return {channel_name: future.result() for channel_name, future in futures.items()}
+
+
+def _ordered(listings: Dict[str, List[Dict]], order: str) -> List[Tuple[str, Dict]]:
+    """(channel_name, entry) sesuai order; entry tanpa durasi selalu di belakang"""
+    def by_duration(entry: Dict):
+        return entry["duration"] is None, -(entry["duration"] or 0)
+
+    if order == "longest":
+        pairs = [(channel_name, entry) for channel_name, entries in listings.items() for entry in entries]
+        return sorted(pairs, key=lambda pair: by_duration(pair[1]))
+
+    queues = []
+    for channel_name, entries in listings.items():
+        entries = sorted(entries, key=by_duration) if order == "balanced" else list(entries)
+        queues.append((channel_name, entries))
+
+    pairs = []
+    for idx in range(max((len(entries) for _, entries in queues), default=0)):
+        for channel_name, entries in queues:
+            if idx < len(entries):
+                pairs.append((channel_name, entries[idx]))
+    return pairs
+
+
+def plan_downloads(
+    listings: Dict[str, List[Dict]],
+    max_seconds: Optional[float] = None,
+    max_bytes: Optional[int] = None,
+    channel_max_seconds: Optional[float] = None,
+    channel_max_videos: Optional[int] = None,
+    min_duration: Optional[float] = None,
+    max_duration: Optional[float] = None,
+    order: str = "longest",
+    audio_kbps: float = DEFAULT_AUDIO_KBPS,
+    done_ids: Optional[Set[str]] = None
+) -> Dict:
+    """
+    Pilih video sampai budget / quota penuh
+
+    Video yang sudah ada (done_ids, e.g. dari manifest) ikut dihitung ke target jam
+    dan quota channel, tapi tidak dijadwalkan dan tidak memakan budget bytes (bytes =
+    bandwidth run ini). Video tanpa durasi di listing diestimasi dengan median
+    durasi yang diketahui. Video yang tidak muat di sisa budget dilewati, video
+    berikutnya yang lebih pendek masih bisa mengisi sisanya.
+
+    Args:
+        listings: channel_name -> entries {"video_id", "video_url", "duration"}
+        max_seconds: Target total durasi (termasuk yang sudah di-download)
+        max_bytes: Budget download run ini (estimasi dari durasi x audio_kbps)
+        channel_max_seconds: Quota durasi per channel
+        channel_max_videos: Quota jumlah video per channel
+        min_duration: Lewati video lebih pendek dari ini (detik, e.g. Shorts)
+        max_duration: Lewati video lebih panjang dari ini (detik, e.g. livestream 10 jam)
+        order: Salah satu PLAN_ORDERS
+        audio_kbps: Bitrate untuk estimasi bytes
+        done_ids: Video ID yang sudah selesai
+
+    Returns:
+        {"video_urls": channel_name -> [url], "channels": channel urut jam terencana,
+         "videos", "seconds", "bytes", "existing": {"videos", "seconds"},
+         "skipped": {"filtered", "quota", "budget"}, "unknown_duration"}
+    """
+    if order not in PLAN_ORDERS:
+        raise ValueError(f"Unknown plan order: {order} (choose from {', '.join(PLAN_ORDERS)})")
+    done_ids = done_ids or set()
+    bytes_per_second = audio_kbps * 1000 / 8
+
+    known = sorted(entry["duration"] for entries in listings.values() for entry in entries
+                   if entry["duration"] is not None)
+    fallback = known[len(known) // 2] if known else 0.0
+
+    channel_seconds: Dict[str, float] = defaultdict(float)
+    channel_videos: Dict[str, int] = defaultdict(int)
+    total_seconds = 0.0
+    existing = {"videos": 0, "seconds": 0.0}
+
+    # Video yang sudah ada dihitung dulu, apapun urutannya
+    for channel_name, entries in listings.items():
+        for entry in entries:
+            if entry["video_id"] in done_ids:
+                duration = entry["duration"] if entry["duration"] is not None else fallback
+                channel_seconds[channel_name] += duration
+                channel_videos[channel_name] += 1
+                total_seconds += duration
+                existing["videos"] += 1
+                existing["seconds"] += duration
+
+    video_urls: Dict[str, List[str]] = defaultdict(list)
+    planned_seconds: Dict[str, float] = defaultdict(float)
+    skipped = {"filtered": 0, "quota": 0, "budget": 0}
+    total_bytes = 0
+    videos = unknown = 0
+
+    for channel_name, entry in _ordered(listings, order):
+        if entry["video_id"] in done_ids:
+            continue
+        duration = entry["duration"]
+        if duration is not None and ((min_duration and duration < min_duration)
+                                     or (max_duration and duration > max_duration)):
+            skipped["filtered"] += 1
+            continue
+        if duration is None:
+            duration = fallback
+        estimated_bytes = int(duration * bytes_per_second)
+
+        if ((channel_max_videos and channel_videos[channel_name] >= channel_max_videos)
+                or (channel_max_seconds and channel_seconds[channel_name] + duration > channel_max_seconds)):
+            skipped["quota"] += 1
+            continue
+        if ((max_seconds and total_seconds + duration > max_seconds)
+                or (max_bytes and total_bytes + estimated_bytes > max_bytes)):
+            skipped["budget"] += 1
+            continue
+
+        video_urls[channel_name].append(entry["video_url"])
+        planned_seconds[channel_name] += duration
+        channel_seconds[channel_name] += duration
+        channel_videos[channel_name] += 1
+        total_seconds += duration
+        total_bytes += estimated_bytes
+        videos += 1
+        if entry["duration"] is None:
+            unknown += 1
+
+    return {
+        "video_urls": dict(video_urls),
+        "channels": sorted(video_urls, key=lambda name: planned_seconds[name], reverse=True),
+        "videos": videos,
+        "seconds": sum(planned_seconds.values()),
+        "bytes": total_bytes,
+        "existing": existing,
+        "skipped": skipped,
+        "unknown_duration": unknown,
+    }
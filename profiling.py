@@ -0,0 +1,255 @@
+"""
+Built-in Profiler untuk Batch Entry Points
+CPU profile (cProfile) per worker thread + wall-clock sampler yang memetakan setiap
+sample ke pipeline stage (listing, extract, transfer, metadata, resolve, ...).
+Output: pstats per thread, folded stacks (flamegraph.pl / speedscope) dan summary JSON.
+"""
+
+import atexit
+import cProfile
+import io
+import json
+import pstats
+import re
+import sys
+import threading
+import time
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = str(Path(__file__).resolve().parent)
+
+# (module, function) di repo ini -> pipeline stage; frame repo terdalam yang cocok menang
+STAGE_FUNCTIONS = {
+    ("yt_downloader", "get_channel_videos"): "listing",
+    ("yt_downloader", "get_channel_entries"): "listing",
+    ("yt_downloader", "_iter_channel_entries"): "listing",
+    ("yt_downloader", "download_videos"): "sleep",
+    ("yt_downloader", "download_video_audio"): "download",
+    ("yt_downloader", "_apply_channel_layout"): "channel_layout",
+    ("yt_downloader", "_finish_download"): "metadata",
+    ("yt_downloader", "_queue_transcode"): "transcode_queue",
+    ("scheduler", "acquire"): "rate_wait",
+    ("identity_pool", "acquire"): "rate_wait",
+    ("tar_sink", "add"): "archive",
+    ("result_journal", "append_video"): "journal",
+    ("result_journal", "append_channel"): "journal",
+    ("result_journal", "compact_journal"): "compact",
+    ("turboscribe_batch", "_resolve_url"): "resolve",
+    ("turboscribe_batch", "_post_resolve"): "resolve",
+    ("turboscribe_batch", "_stream_audio_link"): "resolve",
+    ("turboscribe_batch", "_download_audio"): "audio_download",
+    ("turboscribe_batch", "_fetch_audio"): "audio_download",
+    ("turboscribe_batch", "_fetch_segment"): "audio_download",
+}
+
+
+# Frame terdalam di file ini tanpa stage = thread menunggu pekerjaan (pool idle, server loop)
+IDLE_FILES = {"threading.py", "queue.py", "selectors.py", "socketserver.py"}
+
+
+def _frame_label(code) -> str:
+    label = f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+    return label.replace(';', ':')
+
+
+def classify_stack(codes: List) -> str:
+    """
+    Tentukan pipeline stage dari call stack
+
+    Args:
+        codes: Code objects dari outermost ke innermost frame
+
+    Returns:
+        Nama stage; "download" dipecah menjadi extract / transfer / postprocess
+        berdasarkan frame yt-dlp di bawahnya
+    """
+    ytdlp_kind = None
+    for code in reversed(codes):
+        filename = code.co_filename.replace('\\', '/')
+        if ytdlp_kind is None and '/yt_dlp/' in filename:
+            if '/yt_dlp/downloader/' in filename:
+                ytdlp_kind = "transfer"
+            elif '/yt_dlp/postprocessor/' in filename:
+                ytdlp_kind = "postprocess"
+        if not filename.startswith(REPO_DIR.replace('\\', '/')):
+            continue
+        stage = STAGE_FUNCTIONS.get((Path(filename).stem, code.co_name))
+        if stage == "download":
+            return ytdlp_kind or ("extract" if any('/yt_dlp/' in c.co_filename.replace('\\', '/')
+                                                   for c in codes) else "download")
+        if stage:
+            return stage
+    if codes and Path(codes[-1].co_filename).name in IDLE_FILES:
+        return "idle"
+    return "other"
+
+
+class Profiler:
+    """
+    CPU + wall-clock profiler untuk seluruh proses
+
+    - CPU: satu cProfile.Profile per thread (dipasang lewat threading.setprofile
+      untuk thread yang dibuat setelah start). Di Python 3.12+ cProfile bersifat
+      global, jadi profile milik main thread sudah mencakup semua thread.
+    - Wall-clock: sampler thread membaca sys._current_frames() setiap `interval`
+      detik; waktu tunggu (network, sleep, lock) ikut terlihat, tidak seperti cProfile.
+
+    Files di output_dir:
+        cpu.prof, cpu-<thread>.prof  pstats (snakeviz / python -m pstats)
+        cpu.txt                      Top functions by cumulative time
+        wall.folded                  "thread;stage;frame;... count" (flamegraph.pl, speedscope)
+        summary.json                 Detik wall-clock per stage dan per thread
+    """
+
+    def __init__(self, output_dir: str, interval: float = 0.01, cpu: bool = True):
+        """
+        Args:
+            output_dir: Folder output profile
+            interval: Interval sampling wall-clock (detik)
+            cpu: Aktifkan cProfile (overhead lebih besar dari sampler)
+        """
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.cpu = cpu
+        self._samples: Counter = Counter()
+        self._stage_samples: Dict[Tuple[str, str], int] = Counter()
+        self._profiles: List[Tuple[str, cProfile.Profile]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._stopped = False
+
+    def _start_thread_profile(self, *args):
+        # Dipanggil sekali di thread baru (via threading.setprofile)
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+: profiler sudah aktif secara global
+            return
+        with self._lock:
+            self._profiles.append((threading.current_thread().name, profile))
+
+    def start(self) -> "Profiler":
+        """Mulai sampler dan CPU profiling; stop() otomatis dipanggil saat exit"""
+        self._started_at = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+        self._sampler.start()
+        if self.cpu:
+            profile = cProfile.Profile()
+            profile.enable()
+            self._profiles.append((threading.current_thread().name, profile))
+            threading.setprofile(self._start_thread_profile)
+        atexit.register(self.stop)
+        logger.info(f"Profiling enabled (sampling every {self.interval * 1000:.0f}ms), "
+                    f"output: {self.output_dir}")
+        return self
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                codes.reverse()
+                thread_name = names.get(thread_id, str(thread_id))
+                # channel_0 / turboscribe_3 dst: satu worker = satu flamegraph root
+                stage = classify_stack(codes)
+                stack = ";".join([thread_name, f"stage:{stage}"] + [_frame_label(c) for c in codes])
+                with self._lock:
+                    self._samples[stack] += 1
+                    self._stage_samples[(thread_name, stage)] += 1
+
+    def stop(self) -> Optional[Path]:
+        """
+        Stop profiling dan tulis semua output (idempotent)
+
+        Returns:
+            Folder output
+        """
+        if self._stopped:
+            return None
+        self._stopped = True
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join(timeout=5)
+        threading.setprofile(None)
+        elapsed = time.perf_counter() - self._started_at
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._write_wall(elapsed)
+        if self.cpu:
+            self._write_cpu()
+        logger.info(f"Profile written to {self.output_dir}/ (wall.folded, cpu.prof, summary.json)")
+        return self.output_dir
+
+    def _write_wall(self, elapsed: float):
+        with self._lock:
+            samples = dict(self._samples)
+            stage_samples = dict(self._stage_samples)
+
+        with open(self.output_dir / "wall.folded", 'w', encoding='utf-8') as f:
+            for stack, count in sorted(samples.items()):
+                f.write(f"{stack} {count}\n")
+
+        stages: Dict[str, float] = Counter()
+        threads: Dict[str, Dict[str, float]] = {}
+        for (thread_name, stage), count in stage_samples.items():
+            seconds = count * self.interval
+            stages[stage] += seconds
+            threads.setdefault(thread_name, {})[stage] = round(seconds, 3)
+        summary = {
+            "elapsed_sec": round(elapsed, 3),
+            "interval_sec": self.interval,
+            "samples": sum(samples.values()),
+            "stages_sec": {stage: round(seconds, 3) for stage, seconds in stages.most_common()},
+            "threads": threads,
+        }
+        with open(self.output_dir / "summary.json", 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+
+    def _write_cpu(self):
+        # Disable profile main thread dulu: create_stats() memanggil disable() di thread pemanggil
+        with self._lock:
+            profiles = list(self._profiles)
+        profiles[0][1].disable()
+
+        merged = None
+        for idx, (thread_name, profile) in enumerate(profiles):
+            try:
+                stats = pstats.Stats(profile)
+            except TypeError:
+                # Thread tanpa satu pun function call yang ter-profile
+                continue
+            safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', thread_name)
+            stats.dump_stats(str(self.output_dir / f"cpu-{safe_name}-{idx}.prof"))
+            if merged is None:
+                merged = stats
+            else:
+                merged.add(stats)
+        if merged is None:
+            return
+        merged.dump_stats(str(self.output_dir / "cpu.prof"))
+
+        report = io.StringIO()
+        pstats.Stats(str(self.output_dir / "cpu.prof"), stream=report).sort_stats('cumulative').print_stats(50)
+        with open(self.output_dir / "cpu.txt", 'w', encoding='utf-8') as f:
+            f.write(report.getvalue())
+
+
+def profile_dir_for(results_file: str) -> Path:
+    """Folder profile di sebelah results JSON: batch_results_final.json -> batch_results_final.profile/"""
+    path = Path(results_file)
+    return path.with_name(path.stem + ".profile")
@@ -0,0 +1,223 @@
+"""
+Adaptive Rate Controller (AIMD)
+Naikkan bandwidth dan persingkat sleep selama request sukses, turunkan secara
+multiplicative begitu YouTube mengirim 403 / 429 / throttling. Rate yang sudah
+dipelajari disimpan ke JSON supaya run berikutnya tidak mulai dari nol.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Optional
+
+from identity_pool import IdentityPool
+from scheduler import HostRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Error message yang berarti YouTube sedang menahan kita (bukan error video)
+THROTTLE_PATTERNS = re.compile(
+    r"HTTP Error 403|HTTP Error 429|Too Many Requests|rate.?limit|throttl|"
+    r"confirm you.?re not a bot|try again later",
+    re.IGNORECASE
+)
+
+
+def is_throttle_error(error) -> bool:
+    """
+    Cek apakah exception/message adalah sinyal throttling dari server
+
+    Args:
+        error: Exception atau string error
+
+    Returns:
+        True untuk 403, 429, bot check, atau pesan rate-limit
+    """
+    return bool(THROTTLE_PATTERNS.search(str(error)))
+
+
+class AIMDRateController:
+    """
+    Additive-increase / multiplicative-decrease untuk download rate dan sleep
+
+    Setiap sukses: rate += increase_step, sleep -= sleep_step.
+    Setiap throttle: rate *= decrease_factor, sleep /= decrease_factor.
+    Throttle yang datang bersamaan dari beberapa worker (dalam `cooldown` detik)
+    dihitung sebagai satu event, dan selama cooldown rate tidak dinaikkan.
+    """
+
+    def __init__(
+        self,
+        state_file: Optional[str] = None,
+        initial_rate: int = 500 * 1024,
+        min_rate: int = 100 * 1024,
+        max_rate: int = 8 * 1024 * 1024,
+        increase_step: int = 128 * 1024,
+        initial_sleep: float = 5.0,
+        min_sleep: float = 1.0,
+        max_sleep: float = 120.0,
+        sleep_step: float = 0.5,
+        sleep_spread: float = 2.0,
+        decrease_factor: float = 0.5,
+        cooldown: float = 60.0,
+        save_every: int = 20,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        identity_pool: Optional[IdentityPool] = None
+    ):
+        """
+        Args:
+            state_file: JSON file untuk menyimpan rate yang dipelajari (None = tidak disimpan)
+            initial_rate: Download rate awal (bytes/detik) kalau belum ada state
+            min_rate: Batas bawah download rate
+            max_rate: Batas atas download rate
+            increase_step: Tambahan rate per download sukses
+            initial_sleep: Sleep awal antara downloads (detik) kalau belum ada state
+            min_sleep: Batas bawah sleep
+            max_sleep: Batas atas sleep
+            sleep_step: Pengurangan sleep per download sukses
+            sleep_spread: max_sleep_interval = sleep_interval * sleep_spread
+            decrease_factor: Faktor pengali ketika throttled (0 < x < 1)
+            cooldown: Detik setelah throttle di mana event berikutnya diabaikan
+            save_every: Simpan state setiap N download sukses
+            rate_limiter: Shared HostRateLimiter; bucket host di-set ke 1/sleep_interval
+            identity_pool: IdentityPool; bucket setiap identity juga di-set ke 1/sleep_interval
+                (dengan identity pool, download tidak lewat bucket host)
+        """
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+
+        self.state_file = Path(state_file) if state_file else None
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.min_sleep = min_sleep
+        self.max_sleep = max_sleep
+        self.sleep_step = sleep_step
+        self.sleep_spread = sleep_spread
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.save_every = max(1, save_every)
+        self.rate_limiter = rate_limiter
+        self.identity_pool = identity_pool
+
+        self.rate = float(initial_rate)
+        self.sleep_interval = float(initial_sleep)
+        self.successes = 0
+        self.throttles = 0
+        self._last_throttle: Optional[float] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+        self._load()
+        self._clamp()
+        if self.rate_limiter:
+            # Bucket per host dibuat lazily dengan rate ini
+            self.rate_limiter.rate = 1.0 / self.sleep_interval
+        if self.identity_pool:
+            self.identity_pool.set_rate(1.0 / self.sleep_interval)
+
+    def _clamp(self):
+        self.rate = min(self.max_rate, max(self.min_rate, self.rate))
+        self.sleep_interval = min(self.max_sleep, max(self.min_sleep, self.sleep_interval))
+
+    def _load(self):
+        if not self.state_file or not self.state_file.exists():
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.rate = float(state["rate"])
+            self.sleep_interval = float(state["sleep_interval"])
+            logger.info(f"Loaded learned rate: {self.rate / 1024:.0f} KB/s, "
+                        f"sleep {self.sleep_interval:.1f}s ({self.state_file})")
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable rate state {self.state_file}: {e}")
+
+    def save(self):
+        """Tulis state ke JSON (atomic replace)"""
+        if not self.state_file:
+            return
+        with self._lock:
+            state = {
+                "rate": round(self.rate),
+                "sleep_interval": round(self.sleep_interval, 2),
+                "successes": self.successes,
+                "throttles": self.throttles,
+                "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            self._dirty = False
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.state_file.with_name(self.state_file.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    def _in_cooldown(self, now: float) -> bool:
+        return self._last_throttle is not None and now - self._last_throttle < self.cooldown
+
+    def _sync_bucket(self, url: Optional[str]):
+        if self.rate_limiter and url:
+            self.rate_limiter.bucket_for(url).set_rate(1.0 / self.sleep_interval)
+        if self.identity_pool:
+            self.identity_pool.set_rate(1.0 / self.sleep_interval)
+
+    def on_success(self, url: Optional[str] = None):
+        """Download sukses: additive increase (kecuali masih dalam cooldown)"""
+        with self._lock:
+            self.successes += 1
+            if self._in_cooldown(time.monotonic()):
+                return
+            self.rate += self.increase_step
+            self.sleep_interval -= self.sleep_step
+            self._clamp()
+            self._dirty = True
+            self._sync_bucket(url)
+            save_due = self.successes % self.save_every == 0
+        if save_due:
+            self.save()
+
+    def on_throttle(self, url: Optional[str] = None, reason: str = ""):
+        """Server menolak/menahan request: multiplicative decrease"""
+        with self._lock:
+            now = time.monotonic()
+            if self._in_cooldown(now):
+                return
+            self._last_throttle = now
+            self.throttles += 1
+            self.rate *= self.decrease_factor
+            self.sleep_interval /= self.decrease_factor
+            self._clamp()
+            self._sync_bucket(url)
+            logger.warning(f"Throttled ({reason[:80] or 'unknown'}), backing off to "
+                           f"{self.rate / 1024:.0f} KB/s, sleep {self.sleep_interval:.1f}s")
+        self.save()
+
+    def on_error(self, url: Optional[str], error) -> bool:
+        """
+        Classify error; kalau throttling, panggil on_throttle
+
+        Returns:
+            True kalau error dianggap throttling
+        """
+        if is_throttle_error(error):
+            self.on_throttle(url, str(error))
+            return True
+        return False
+
+    def ydl_params(self) -> Dict:
+        """yt-dlp params untuk download berikutnya"""
+        with self._lock:
+            return {
+                'ratelimit': int(self.rate),
+                'sleep_interval': self.sleep_interval,
+                'max_sleep_interval': self.sleep_interval * self.sleep_spread,
+            }
+
+    def close(self):
+        """Simpan state terakhir"""
+        if self._dirty:
+            self.save()
@@ -0,0 +1,268 @@
+"""
+Append-only Result Journal (JSONL)
+Setiap video result ditulis sebagai satu baris JSON + fsync, jadi checkpoint
+berbiaya O(1) per video dan crash di tengah write hanya merusak baris terakhir.
+Summary final dibuat dengan streaming compaction dari journal.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import textwrap
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResultJournal:
+    """
+    Thread-safe JSONL journal
+
+    Record types:
+    - {"type": "video", "channel_name", "channel_url", "result": {...}}
+    - {"type": "channel", "channel_name", "channel_url", "error": str | None}
+
+    Result terakhir untuk video_id yang sama menang (retry / transcode selesai).
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        """
+        Args:
+            path: File journal (e.g., batch_results.jsonl), di-append antar run
+            fsync: fsync setiap record (matikan hanya untuk benchmark)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'a+b')
+
+        # Crash di tengah write: tutup baris yang terpotong supaya record baru tetap valid
+        if self._file.tell() > 0:
+            self._file.seek(-1, os.SEEK_END)
+            if self._file.read(1) != b'\n':
+                self._file.write(b'\n')
+
+    def _append(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def append_video(self, channel_name: str, channel_url: str, result: Dict):
+        """Record satu video result (status final: success / failed / skipped)"""
+        self._append({
+            "type": "video",
+            "channel_name": channel_name,
+            "channel_url": channel_url,
+            "result": result,
+        })
+
+    def append_channel(self, channel_name: str, channel_url: str, error: Optional[str] = None):
+        """Record channel selesai (atau gagal dengan error)"""
+        self._append({
+            "type": "channel",
+            "channel_name": channel_name,
+            "channel_url": channel_url,
+            "error": error,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+
+    def close(self):
+        """Close file handle"""
+        with self._lock:
+            self._file.close()
+
+
+def iter_journal(path: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    Baca journal baris demi baris
+
+    Args:
+        path: File journal
+
+    Yields:
+        (byte offset, record) — baris rusak (crash mid-write) di-skip
+    """
+    journal_path = Path(path)
+    if not journal_path.exists():
+        return
+    with open(journal_path, 'rb') as f:
+        offset = 0
+        for line in f:
+            line_offset = offset
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                yield line_offset, json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping corrupt journal line at byte {line_offset} in {journal_path}")
+
+
+def _build_compaction_index(index: sqlite3.Connection, journal_path: str):
+    """
+    Pass 1 compaction: channel dan video (urutan pertama kali muncul, result terakhir
+    menang) ke SQLite, bukan ke dict di memory
+    """
+    index.executescript("""
+        CREATE TABLE channels (
+            seq   INTEGER PRIMARY KEY,
+            name  TEXT UNIQUE,
+            url   TEXT,
+            error TEXT
+        );
+        CREATE TABLE videos (
+            seq         INTEGER PRIMARY KEY,
+            channel_seq INTEGER NOT NULL,
+            key         TEXT,
+            offset      INTEGER NOT NULL,
+            status      TEXT,
+            UNIQUE (channel_seq, key)
+        );
+    """)
+    channel_seqs: Dict[str, int] = {}
+    with index:
+        for offset, record in iter_journal(journal_path):
+            name = record.get("channel_name")
+            seq = channel_seqs.get(name)
+            if seq is None:
+                seq = index.execute("INSERT INTO channels (name, url) VALUES (?, ?)",
+                                    (name, record.get("channel_url"))).lastrowid
+                channel_seqs[name] = seq
+            if record.get("type") == "video":
+                result = record["result"]
+                key = result.get("video_id") or result.get("video_url")
+                index.execute(
+                    """
+                    INSERT INTO videos (channel_seq, key, offset, status) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (channel_seq, key) DO UPDATE SET
+                        offset = excluded.offset, status = excluded.status
+                    """,
+                    (seq, key, offset, result.get("status"))
+                )
+            elif record.get("type") == "channel":
+                index.execute("UPDATE channels SET error = ? WHERE seq = ?", (record.get("error"), seq))
+
+
+def compact_journal(journal_path: str, output_file: str) -> Dict[str, Dict]:
+    """
+    Streaming compaction: journal -> JSON summary dengan format lama
+    {channel_name: {channel_url, total_videos, successful, failed, skipped, videos: [...]}}
+
+    Pass 1 menulis index (offset + status per video) ke SQLite sementara di disk,
+    pass 2 membaca result satu per satu lewat offset dan langsung menulis ke
+    output, jadi memory tidak bergantung pada jumlah maupun ukuran result.
+    Output ditulis atomic.
+
+    Args:
+        journal_path: File journal
+        output_file: File JSON output (e.g., batch_results_final.json)
+
+    Returns:
+        Summary per channel tanpa "videos" (counts saja)
+    """
+    summaries = {}
+    Path(journal_path).touch()
+    output_path = Path(output_file)
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    with tempfile.TemporaryDirectory(prefix=".compact-", dir=str(output_path.parent)) as index_dir:
+        index = sqlite3.connect(str(Path(index_dir) / "index.sqlite"))
+        try:
+            _build_compaction_index(index, journal_path)
+            with open(journal_path, 'rb') as journal, open(tmp_path, 'w', encoding='utf-8') as out:
+                out.write("{")
+                channels = index.execute(
+                    "SELECT seq, name, url, error FROM channels ORDER BY seq").fetchall()
+                for idx, (seq, name, url, error) in enumerate(channels):
+                    counts = dict(index.execute(
+                        "SELECT status, COUNT(*) FROM videos WHERE channel_seq = ? GROUP BY status",
+                        (seq,)).fetchall())
+                    total = sum(counts.values())
+                    if error and not total:
+                        summary = {"channel_url": url, "status": "error", "error": error}
+                    else:
+                        summary = {
+                            "channel_url": url,
+                            "total_videos": total,
+                            "successful": counts.get("success", 0),
+                            "failed": counts.get("failed", 0),
+                            "skipped": counts.get("skipped", 0),
+                        }
+                    summaries[name] = summary
+
+                    fields = [f"\n    {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}"
+                              for key, value in summary.items()]
+                    out.write("," if idx else "")
+                    out.write(f"\n  {json.dumps(name, ensure_ascii=False)}: {{")
+                    out.write(",".join(fields))
+                    if summary.get("status") != "error":
+                        out.write(',\n    "videos": [')
+                        offsets = index.execute(
+                            "SELECT offset FROM videos WHERE channel_seq = ? ORDER BY seq", (seq,))
+                        for video_idx, (offset,) in enumerate(offsets):
+                            journal.seek(offset)
+                            result = json.loads(journal.readline())["result"]
+                            body = textwrap.indent(json.dumps(result, ensure_ascii=False, indent=2), "      ")
+                            out.write(("," if video_idx else "") + "\n" + body)
+                        out.write("\n    ]" if total else "]")
+                    out.write("\n  }")
+                out.write("\n}\n" if channels else "}\n")
+        finally:
+            index.close()
+    os.replace(tmp_path, output_path)
+
+    logger.info(f"Compacted {journal_path} -> {output_file} ({len(summaries)} channels)")
+    return summaries
+
+
+def load_video_states(journal_path: str, results_file: Optional[str] = None) -> Tuple[Dict[str, Dict[str, Dict]], Set[str]]:
+    """
+    Status terakhir setiap video dari final results (lama) + journal (baru)
+
+    Args:
+        journal_path: File journal
+        results_file: batch_results_final.json dari run sebelumnya (optional)
+
+    Returns:
+        ({channel_name: {video_id: {"status", "video_url"}}}, nama channel yang selesai)
+    """
+    states: Dict[str, Dict[str, Dict]] = {}
+    completed: Set[str] = set()
+
+    def record(channel_name: str, result: Dict):
+        video_id = result.get("video_id")
+        if video_id:
+            states.setdefault(channel_name, {})[video_id] = {
+                "status": result.get("status"),
+                "video_url": result.get("video_url"),
+            }
+
+    if results_file and Path(results_file).exists():
+        with open(results_file, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        for channel_name, summary in previous.items():
+            if summary.get("status") == "error":
+                continue
+            completed.add(channel_name)
+            for result in summary.get("videos", []):
+                record(channel_name, result)
+
+    for _, entry in iter_journal(journal_path):
+        channel_name = entry.get("channel_name")
+        if entry.get("type") == "video":
+            record(channel_name, entry["result"])
+        elif entry.get("type") == "channel":
+            if entry.get("error"):
+                completed.discard(channel_name)
+            else:
+                completed.add(channel_name)
+
+    return states, completed
@@ -0,0 +1,423 @@
+"""
+Concurrent Channel Scheduler dengan Per-Host Token Bucket
+Menjalankan beberapa channel sekaligus, politeness dijaga oleh token bucket per host
+"""
+
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Token diisi ulang dengan kecepatan `rate` token/detik sampai `capacity`.
+    Caller yang datang saat bucket kosong mendapat giliran berikutnya (FIFO),
+    jadi request tetap tersebar rata walaupun banyak worker menunggu.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: Token per detik (e.g., 0.2 = 1 request tiap 5 detik)
+            capacity: Maximum burst size
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float):
+        """Ubah refill rate (dipakai oleh controller yang adaptif)"""
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def _refill(self, now: float):
+        elapsed = now - self._last
+        self._last = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Ambil token sekarang dan return berapa lama caller harus menunggu
+
+        Returns:
+            Waktu tunggu dalam detik (0 jika token tersedia)
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Block sampai token tersedia
+
+        Returns:
+            Waktu yang dihabiskan untuk menunggu (detik)
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class HostRateLimiter:
+    """Token bucket terpisah untuk setiap host, di-share oleh semua worker"""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1.0,
+        jitter: float = 0.0,
+        host_rates: Optional[Dict[str, float]] = None
+    ):
+        """
+        Args:
+            rate: Default request per detik untuk setiap host
+            capacity: Burst size per host
+            jitter: Tambahan random sleep 0..jitter detik setelah token didapat
+            host_rates: Override rate untuk host tertentu
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.jitter = jitter
+        self.host_rates = dict(host_rates or {})
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        """Normalisasi host dari URL (youtube.com, www.youtube.com, m.youtube.com -> sama)"""
+        host = urlparse(url).netloc.lower() or url.lower()
+        for prefix in ("www.", "m."):
+            if host.startswith(prefix):
+                host = host[len(prefix):]
+        return host
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        """Get (atau buat) token bucket untuk host dari URL"""
+        host = self.host_of(url)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.host_rates.get(host, self.rate), self.capacity)
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url: str) -> float:
+        """
+        Tunggu giliran untuk request ke host dari URL
+
+        Returns:
+            Total waktu tunggu (detik)
+        """
+        waited = self.bucket_for(url).acquire()
+        if self.jitter > 0:
+            extra = random.uniform(0, self.jitter)
+            time.sleep(extra)
+            waited += extra
+        return waited
+
+
+class ChannelScheduler:
+    """
+    Jalankan download_from_channel untuk beberapa channel secara paralel
+
+    Setiap worker memproses satu channel; semua worker berbagi HostRateLimiter
+    milik downloader, jadi total request ke YouTube tetap dibatasi.
+    """
+
+    def __init__(self, downloader, max_workers: int = 1):
+        """
+        Args:
+            downloader: YTDownloader instance (dengan rate_limiter)
+            max_workers: Jumlah channel yang diproses bersamaan
+        """
+        self.downloader = downloader
+        self.max_workers = max(1, max_workers)
+
+    @staticmethod
+    def _bind_result(on_result, channel_name: str, channel_url: str):
+        if on_result is None:
+            return None
+        return lambda result: on_result(channel_name, channel_url, result)
+
+    def run(
+        self,
+        channels: List[Tuple[str, str]],
+        max_videos: Optional[int] = None,
+        on_channel_done: Optional[Callable[[str, str, Optional[Dict[str, int]], Optional[str]], None]] = None,
+        on_result: Optional[Callable[[str, str, Dict], None]] = None,
+        skip_ids: Optional[Dict[str, Set[str]]] = None,
+        video_urls: Optional[Dict[str, List[str]]] = None
+    ):
+        """
+        Proses semua channel
+
+        Args:
+            channels: List of (channel_name, channel_url)
+            max_videos: Maximum videos per channel (None = all)
+            on_channel_done: Callback(channel_name, channel_url, summary, error),
+                dipanggil dari thread utama setiap kali satu channel selesai;
+                summary = jumlah video per status (None kalau channel error)
+            on_result: Callback(channel_name, channel_url, result) per video ketika
+                statusnya final, dipanggil dari worker / transcode thread. Result
+                tidak disimpan di scheduler, jadi memory tetap flat
+            skip_ids: Per channel, video ID yang sudah selesai (resume)
+            video_urls: Per channel, daftar video eksplisit (tanpa channel listing,
+                e.g., retry failed)
+        """
+        logger.info(f"Scheduling {len(channels)} channels with {self.max_workers} workers")
+        skip_ids = skip_ids or {}
+        video_urls = video_urls or {}
+
+        def submit(executor, channel_name: str, channel_url: str, summary: Dict[str, int]):
+            callback = self._bind_result(on_result, channel_name, channel_url)
+            if channel_name in video_urls:
+                return executor.submit(self.downloader.download_videos,
+                                       video_urls[channel_name], channel_name,
+                                       on_result=callback, summary=summary)
+            return executor.submit(
+                self.downloader.download_from_channel,
+                channel_url=channel_url,
+                channel_name=channel_name,
+                max_videos=max_videos,
+                on_result=callback,
+                skip_ids=skip_ids.get(channel_name),
+                summary=summary
+            )
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="channel") as executor:
+            futures = {}
+            for channel_name, channel_url in channels:
+                summary: Dict[str, int] = {}
+                future = submit(executor, channel_name, channel_url, summary)
+                futures[future] = (channel_name, channel_url, summary)
+
+            for future in as_completed(futures):
+                channel_name, channel_url, summary = futures.pop(future)
+                try:
+                    future.result()
+                    error = None
+                except Exception as e:
+                    logger.error(f"Error processing channel {channel_name}: {e}")
+                    summary, error = None, str(e)
+
+                if on_channel_done:
+                    on_channel_done(channel_name, channel_url, summary, error)
+
+
+class QueueScheduler:
+    """
+    Worker loop di atas WorkQueue (work_queue.py) untuk crawling multi-process / multi-node
+
+    Task "channel" = listing channel lalu enqueue satu task "video" per video ID
+    (sekali walaupun di-list beberapa channel); task "video" = download satu video. Setiap task di-lease, lease diperpanjang
+    oleh LeaseKeeper selama video di-download / di-transcode, dan task baru selesai
+    ketika result final masuk (on_result). Lease yang habis (node mati) otomatis
+    diambil worker lain, jadi tidak ada video yang di-download dua kali selama
+    worker masih hidup.
+    """
+
+    def __init__(
+        self,
+        downloader,
+        queue,
+        max_workers: int = 1,
+        worker_id: Optional[str] = None,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        poll_interval: float = 5.0,
+        retry_backoff: Optional[float] = None
+    ):
+        """
+        Args:
+            downloader: YTDownloader instance
+            queue: WorkQueue (SQLiteWorkQueue di shared file, atau MemoryWorkQueue)
+            max_workers: Jumlah worker thread di process ini
+            worker_id: ID process ini di queue (default: hostname-pid)
+            lease_seconds: Durasi lease; heartbeat setiap lease_seconds / 3
+            max_attempts: Task yang gagal sebanyak ini ditandai failed (tidak di-retry lagi)
+            poll_interval: Detik menunggu ketika tidak ada task tapi node lain masih
+                memegang lease (listing bisa menambah video) atau task gagal masih backoff
+            retry_backoff: Backoff dasar sebelum task gagal di-lease lagi, berlipat dua
+                per attempt (default: work_queue.RETRY_BACKOFF)
+        """
+        from work_queue import RETRY_BACKOFF, default_worker_id
+
+        self.downloader = downloader
+        self.queue = queue
+        self.max_workers = max(1, max_workers)
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.retry_backoff = RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self.summary: Dict[str, int] = {}
+        self._summary_lock = threading.Lock()
+
+    def seed(self, channels: List[Tuple[str, str]], max_videos: Optional[int] = None) -> int:
+        """
+        Enqueue satu task listing per channel (idempotent: channel yang sudah ada diabaikan)
+
+        Returns:
+            Jumlah channel yang baru masuk queue
+        """
+        added = 0
+        for channel_name, channel_url in channels:
+            payload = {"channel_name": channel_name, "channel_url": channel_url, "max_videos": max_videos}
+            if self.queue.enqueue("channel", f"channel:{channel_name}", payload):
+                added += 1
+        logger.info(f"Queue seeded: {added} new channels ({len(channels) - added} already queued)")
+        return added
+
+    def seed_videos(self, channels: List[Tuple[str, str]], video_urls: Dict[str, List[str]]) -> int:
+        """
+        Enqueue video secara langsung (hasil planner), tanpa task listing
+
+        Task di-lease sesuai urutan enqueue, jadi urutan plan tetap berlaku.
+
+        Returns:
+            Jumlah video yang baru masuk queue
+        """
+        channel_urls = dict(channels)
+        added = total = 0
+        for channel_name, urls in video_urls.items():
+            for video_url in urls:
+                if self._enqueue_video(channel_name, channel_urls.get(channel_name), video_url):
+                    added += 1
+                total += 1
+        logger.info(f"Queue seeded: {added} new videos ({total - added} already queued)")
+        return added
+
+    def _enqueue_video(self, channel_name: str, channel_url: Optional[str], video_url: str) -> bool:
+        """
+        Satu task per video ID, bukan per (channel, video): video yang di-list oleh
+        beberapa channel hanya di-download sekali. Channel lain dicatat di payload
+        "refs" task yang sudah ada.
+
+        Returns:
+            True kalau task baru
+        """
+        video_id = self.downloader._extract_video_id(video_url) or video_url
+        key = f"video:{video_id}"
+        payload = {"channel_name": channel_name, "channel_url": channel_url, "video_url": video_url}
+        if self.queue.enqueue("video", key, payload):
+            return True
+        if self.queue.add_ref(key, [channel_name, channel_url]):
+            logger.debug(f"{video_id} from {channel_name} is already queued under another channel")
+        return False
+
+    def run(
+        self,
+        on_result: Optional[Callable[[str, str, Dict], None]] = None,
+        on_channel_listed: Optional[Callable[[str, str, int, Optional[str]], None]] = None
+    ) -> Dict[str, int]:
+        """
+        Tarik task sampai queue habis (termasuk lease milik node lain)
+
+        Args:
+            on_result: Callback(channel_name, channel_url, result) per video final
+            on_channel_listed: Callback(channel_name, channel_url, jumlah video, error)
+                setelah task listing selesai atau gagal permanen
+
+        Returns:
+            Jumlah video per status yang diproses process ini
+        """
+        from work_queue import LeaseKeeper
+
+        logger.info(f"Queue worker {self.worker_id}: {self.max_workers} threads, "
+                    f"lease {self.lease_seconds:.0f}s")
+        keeper = LeaseKeeper(self.queue, self.lease_seconds)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="queue") as executor:
+                futures = [executor.submit(self._worker_loop, keeper, on_result, on_channel_listed)
+                           for _ in range(self.max_workers)]
+                for future in as_completed(futures):
+                    future.result()
+        finally:
+            keeper.close()
+        return dict(self.summary)
+
+    def _worker_loop(self, keeper, on_result, on_channel_listed):
+        while True:
+            task = self.queue.lease(self.worker_id, self.lease_seconds)
+            if task is None:
+                if not self.queue.has_open_work():
+                    return
+                time.sleep(self.poll_interval)
+                continue
+
+            keeper.add(task)
+            if task["kind"] == "channel":
+                self._run_channel(task, keeper, on_channel_listed)
+            else:
+                self._run_video(task, keeper, on_result)
+
+    def _run_channel(self, task: Dict, keeper, on_channel_listed):
+        payload = task["payload"]
+        channel_name, channel_url = payload["channel_name"], payload["channel_url"]
+        error = None
+        try:
+            video_urls = self.downloader.get_channel_videos(channel_url, payload.get("max_videos"))
+        except Exception as e:
+            video_urls, error = [], str(e)
+
+        keeper.remove(task)
+        if not video_urls:
+            error = error or "No videos found"
+            self.queue.fail(task, error, self.max_attempts, self.retry_backoff)
+            if task["attempts"] >= self.max_attempts and on_channel_listed:
+                on_channel_listed(channel_name, channel_url, 0, error)
+            return
+
+        added = 0
+        for video_url in video_urls:
+            if self._enqueue_video(channel_name, channel_url, video_url):
+                added += 1
+        self.queue.complete(task, {"videos": len(video_urls)})
+        logger.info(f"Queued {added} videos from {channel_name} ({len(video_urls) - added} already queued)")
+        if on_channel_listed:
+            on_channel_listed(channel_name, channel_url, len(video_urls), None)
+
+    def _run_video(self, task: Dict, keeper, on_result):
+        payload = task["payload"]
+
+        def on_final(result: Dict):
+            # Dipanggil sekali per video (dengan transcode pool: dari callback thread)
+            keeper.remove(task)
+            if result["status"] == "failed":
+                alive = self.queue.fail(task, result.get("error") or "failed", self.max_attempts,
+                                       self.retry_backoff)
+            else:
+                alive = self.queue.complete(task, {"status": result["status"]})
+            if not alive:
+                logger.warning(f"Lease on {task['key']} was lost before the result was recorded")
+            with self._summary_lock:
+                self.summary[result["status"]] = self.summary.get(result["status"], 0) + 1
+            if on_result:
+                on_result(payload["channel_name"], payload["channel_url"], result)
+
+        try:
+            self.downloader.download_videos([payload["video_url"]], payload["channel_name"],
+                                            on_result=on_final, summary={})
+        except Exception as e:
+            logger.error(f"Error processing {payload['video_url']}: {e}")
+            keeper.remove(task)
+            self.queue.fail(task, str(e), self.max_attempts, self.retry_backoff)
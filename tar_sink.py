@@ -0,0 +1,178 @@
+"""
+Sharded Tar Output Sink
+Audio + {video_id}.json dari setiap video di-pack ke tar shard berukuran tetap yang
+ditulis secara sequential (WebDataset-style: satu key = satu sample), dengan sidecar
+index JSONL berisi offset data setiap member. Menggantikan satu folder + tiga file
+per video, jadi inode tetap sedikit dan training read jadi sequential.
+"""
+
+import json
+import re
+import shutil
+import tarfile
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = tarfile.BLOCKSIZE
+
+
+def _padded(size: int) -> int:
+    return (size + BLOCK_SIZE - 1) // BLOCK_SIZE * BLOCK_SIZE
+
+
+class TarShardSink:
+    """
+    Thread-safe writer untuk tar shards
+
+    Files di shard_dir:
+        {prefix}-000000.tar          Members "{channel}/{video_id}.{ext}" dan "{channel}/{video_id}.json"
+        {prefix}-000000.index.jsonl  Satu baris per sample: key, video_id, channel_name dan
+                                     {"ext": {"member", "offset", "size"}} (offset = byte data)
+
+    Setiap run mulai di shard baru (nomor setelah shard terakhir), shard lama tidak
+    pernah di-append. Shard yang terpotong karena crash tetap terbaca sampai sample
+    terakhir yang ada di index.
+    """
+
+    def __init__(self, shard_dir: str, shard_size: int = 1024 * 1024 * 1024, prefix: str = "shard"):
+        """
+        Args:
+            shard_dir: Folder output shards
+            shard_size: Target ukuran per shard (bytes); sample yang tidak muat masuk shard berikutnya
+            prefix: Prefix nama file shard
+        """
+        self.shard_dir = Path(shard_dir)
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self.shard_size = shard_size
+        self.prefix = prefix
+
+        existing = []
+        for path in self.shard_dir.glob(f"{prefix}-*.tar"):
+            match = re.fullmatch(rf"{re.escape(prefix)}-(\d+)\.tar", path.name)
+            if match:
+                existing.append(int(match.group(1)))
+        self._next_shard = max(existing) + 1 if existing else 0
+        self._lock = threading.Lock()
+        self._tar: Optional[tarfile.TarFile] = None
+        self._index = None
+        self._shard_path: Optional[Path] = None
+        self.samples = 0
+        self.bytes_written = 0
+
+    def _open_shard(self):
+        self._shard_path = self.shard_dir / f"{self.prefix}-{self._next_shard:06d}.tar"
+        self._next_shard += 1
+        self._tar = tarfile.open(self._shard_path, 'w', format=tarfile.PAX_FORMAT)
+        self._index = open(self._shard_path.with_suffix('.index.jsonl'), 'w', encoding='utf-8')
+        logger.info(f"Writing tar shard: {self._shard_path}")
+
+    def _close_shard(self):
+        if self._tar:
+            self._tar.close()
+            self._index.close()
+            self._tar, self._index = None, None
+
+    def _add_member(self, name: str, path: Path) -> Dict:
+        info = self._tar.gettarinfo(str(path), arcname=name)
+        info.uid = info.gid = 0
+        info.uname = info.gname = ""
+        with open(path, 'rb') as f:
+            self._tar.addfile(info, f)
+        return {"member": name, "offset": self._tar.offset - _padded(info.size), "size": info.size}
+
+    def add(self, video_id: str, channel_name: str, files: List[Path]) -> Dict:
+        """
+        Pack satu sample ke shard aktif
+
+        Args:
+            video_id: YouTube video ID
+            channel_name: Channel name (prefix key di dalam tar)
+            files: File sample, e.g. [audio, {video_id}.json]; extension jadi nama field
+
+        Returns:
+            {"shard": path shard, "key": key sample, "members": {ext: {"member", "offset", "size"}}}
+        """
+        key = f"{channel_name}/{video_id}"
+        sample_size = sum(_padded(Path(path).stat().st_size) + BLOCK_SIZE for path in files)
+
+        with self._lock:
+            if self._tar and self._tar.offset > 0 and self._tar.offset + sample_size > self.shard_size:
+                self._close_shard()
+            if not self._tar:
+                self._open_shard()
+
+            members = {}
+            for path in files:
+                path = Path(path)
+                ext = path.name[len(video_id) + 1:] if path.name.startswith(video_id + '.') else path.suffix[1:]
+                members[ext] = self._add_member(f"{key}.{ext}", path)
+            self._tar.fileobj.flush()
+
+            entry = {"key": key, "video_id": video_id, "channel_name": channel_name, "members": members}
+            self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index.flush()
+            self.samples += 1
+            self.bytes_written += sum(member["size"] for member in members.values())
+            shard_path = self._shard_path
+
+        return {"shard": str(shard_path), "key": key, "members": members}
+
+    def add_video_dir(self, video_dir: Path, video_id: str, channel_name: str, audio_file: Path) -> Dict:
+        """
+        Pack audio + {video_id}.json dari folder video, lalu hapus folder tersebut
+
+        Folder channel sengaja tidak dihapus: worker lain bisa saja baru membuat
+        folder video di channel yang sama.
+
+        Returns:
+            Hasil add()
+        """
+        files = [audio_file]
+        metadata_file = video_dir / f"{video_id}.json"
+        if metadata_file.exists():
+            files.append(metadata_file)
+        packed = self.add(video_id, channel_name, files)
+
+        shutil.rmtree(video_dir, ignore_errors=True)
+        return packed
+
+    def close(self):
+        """Tutup shard aktif (tulis end-of-archive)"""
+        with self._lock:
+            self._close_shard()
+        if self.samples:
+            logger.info(f"Tar shards: {self.samples} samples, {self.bytes_written / 1024 / 1024:.1f} MB "
+                        f"in {self.shard_dir}")
+
+
+def iter_index(shard_dir: str, prefix: str = "shard") -> Iterator[Dict]:
+    """
+    Baca semua sidecar index di shard_dir (urut per shard)
+
+    Yields:
+        Index entry + "shard" (path ke tar)
+    """
+    for index_path in sorted(Path(shard_dir).glob(f"{prefix}-*.index.jsonl")):
+        shard_path = index_path.with_name(index_path.name[:-len('.index.jsonl')] + '.tar')
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping corrupt index line in {index_path}")
+                    continue
+                entry["shard"] = str(shard_path)
+                yield entry
+
+
+def read_member(shard: str, member: Dict) -> bytes:
+    """Baca satu member langsung lewat offset di index (tanpa scan tar)"""
+    with open(shard, 'rb') as f:
+        f.seek(member["offset"])
+        return f.read(member["size"])
@@ -0,0 +1,58 @@
+"""
+Offline test untuk planner.py: budget jam / bytes, quota per channel, dan video
+yang sudah ada (done_ids) ikut dihitung
+"""
+
+from planner import parse_size, plan_downloads
+
+
+def _entries(prefix: str, durations):
+    return [{"video_id": f"{prefix}{idx:010d}", "video_url": f"https://www.youtube.com/watch?v={prefix}{idx:010d}",
+             "duration": duration}
+            for idx, duration in enumerate(durations)]
+
+
+LISTINGS = {
+    "alpha": _entries("a", [3600, 1800, 600]),
+    "beta": _entries("b", [2400, 1200, None]),
+}
+
+
+def test_plan_respects_max_seconds():
+    """Longest first, video yang tidak muat dilewati, yang lebih pendek mengisi sisa"""
+    plan = plan_downloads(LISTINGS, max_seconds=5000)
+    assert plan["video_urls"] == {"alpha": [LISTINGS["alpha"][0]["video_url"]],
+                                  "beta": [LISTINGS["beta"][1]["video_url"]]}
+    assert plan["seconds"] == 4800
+    assert plan["skipped"]["budget"] == 4
+
+
+def test_plan_respects_channel_quota_and_bytes():
+    """Quota per channel dan budget bytes (durasi x audio_kbps)"""
+    plan = plan_downloads(LISTINGS, channel_max_videos=1)
+    assert {name: len(urls) for name, urls in plan["video_urls"].items()} == {"alpha": 1, "beta": 1}
+    assert plan["skipped"]["quota"] == 4
+
+    plan = plan_downloads(LISTINGS, max_bytes=parse_size("50M"), audio_kbps=128)
+    assert plan["bytes"] <= parse_size("50M")
+    assert plan["videos"] == 2
+
+
+def test_done_ids_count_toward_budget_and_quota():
+    """Video yang sudah ada tidak dijadwalkan tapi memakan target jam dan quota channel"""
+    done = {LISTINGS["alpha"][0]["video_id"]}
+    plan = plan_downloads(LISTINGS, max_seconds=5000, channel_max_seconds=4000, done_ids=done)
+
+    assert plan["existing"] == {"videos": 1, "seconds": 3600}
+    planned = [url for urls in plan["video_urls"].values() for url in urls]
+    assert LISTINGS["alpha"][0]["video_url"] not in planned
+    # Sisa target 1400 detik: 1200 (beta) muat; alpha sudah 3600 dari quota 4000, 600 tidak muat
+    assert plan["video_urls"] == {"beta": [LISTINGS["beta"][1]["video_url"]]}
+    assert plan["existing"]["seconds"] + plan["seconds"] <= 5000
+
+
+if __name__ == "__main__":
+    test_plan_respects_max_seconds()
+    test_plan_respects_channel_quota_and_bytes()
+    test_done_ids_count_toward_budget_and_quota()
+    print("✓ planner tests passed")
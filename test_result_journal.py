@@ -0,0 +1,72 @@
+"""
+Offline test untuk result_journal.py: result terakhir per video menang dan baris
+terakhir yang terpotong (crash mid-write) diperbaiki
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from result_journal import ResultJournal, compact_journal
+
+
+def _result(video_id: str, status: str) -> dict:
+    return {"video_id": video_id, "video_url": f"https://www.youtube.com/watch?v={video_id}",
+            "status": status}
+
+
+def test_compaction_keeps_last_result_per_video():
+    """Retry yang sukses menggantikan result gagal sebelumnya, urutan video tetap"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        journal_path = str(Path(tmp_dir) / "results.jsonl")
+        output_path = str(Path(tmp_dir) / "results_final.json")
+
+        journal = ResultJournal(journal_path, fsync=False)
+        journal.append_video("alpha", "https://www.youtube.com/@alpha", _result("aaaaaaaaaa1", "failed"))
+        journal.append_video("alpha", "https://www.youtube.com/@alpha", _result("aaaaaaaaaa2", "success"))
+        journal.append_video("alpha", "https://www.youtube.com/@alpha", _result("aaaaaaaaaa1", "success"))
+        journal.append_channel("alpha", "https://www.youtube.com/@alpha")
+        journal.append_channel("beta", "https://www.youtube.com/@beta", error="No videos found")
+        journal.close()
+
+        summaries = compact_journal(journal_path, output_path)
+        assert summaries["alpha"] == {"channel_url": "https://www.youtube.com/@alpha", "total_videos": 2,
+                                      "successful": 2, "failed": 0, "skipped": 0}
+        assert summaries["beta"]["status"] == "error"
+
+        with open(output_path, 'r', encoding='utf-8') as f:
+            final = json.load(f)
+        videos = final["alpha"]["videos"]
+        assert [video["video_id"] for video in videos] == ["aaaaaaaaaa1", "aaaaaaaaaa2"]
+        assert [video["status"] for video in videos] == ["success", "success"]
+
+
+def test_truncated_last_line_is_repaired():
+    """Baris terpotong di-skip saat compaction, dan record berikutnya tetap valid"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        journal_path = str(Path(tmp_dir) / "results.jsonl")
+        output_path = str(Path(tmp_dir) / "results_final.json")
+
+        journal = ResultJournal(journal_path, fsync=False)
+        journal.append_video("alpha", "https://www.youtube.com/@alpha", _result("aaaaaaaaaa1", "success"))
+        journal.close()
+        with open(journal_path, 'ab') as f:
+            f.write(b'{"type": "video", "channel_name": "alpha", "result": {"video_id": "aaaa')
+
+        summaries = compact_journal(journal_path, output_path)
+        assert summaries["alpha"]["total_videos"] == 1
+
+        # Journal dibuka lagi: baris terpotong ditutup, append berikutnya tidak ikut rusak
+        journal = ResultJournal(journal_path, fsync=False)
+        journal.append_video("alpha", "https://www.youtube.com/@alpha", _result("aaaaaaaaaa2", "failed"))
+        journal.close()
+
+        summaries = compact_journal(journal_path, output_path)
+        assert summaries["alpha"]["total_videos"] == 2
+        assert summaries["alpha"]["failed"] == 1
+
+
+if __name__ == "__main__":
+    test_compaction_keeps_last_result_per_video()
+    test_truncated_last_line_is_repaired()
+    print("✓ result journal tests passed")
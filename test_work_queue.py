@@ -0,0 +1,126 @@
+"""
+Offline test untuk work_queue.py dan QueueScheduler: lease token, retry backoff,
+migrasi kolom not_before, dan satu task per video ID
+"""
+
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from scheduler import QueueScheduler
+from work_queue import DONE, FAILED, MemoryWorkQueue, SQLiteWorkQueue
+
+
+def _queues(tmp_dir: str):
+    """Kedua backend bawaan dengan semantics yang sama"""
+    return [MemoryWorkQueue(), SQLiteWorkQueue(str(Path(tmp_dir) / "queue.sqlite"))]
+
+
+def test_stale_token_is_rejected():
+    """Worker yang lease-nya sudah diambil alih tidak bisa complete / fail / heartbeat"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for queue in _queues(tmp_dir):
+            queue.enqueue("video", "video:abc", {"video_url": "https://www.youtube.com/watch?v=abc"})
+            stale = queue.lease("w1", lease_seconds=0.05)
+            time.sleep(0.1)
+            fresh = queue.lease("w2", lease_seconds=60)
+
+            assert fresh is not None and fresh["key"] == stale["key"]
+            assert fresh["token"] != stale["token"]
+            assert queue.heartbeat(stale, 60) is False
+            assert queue.complete(stale, {"status": "success"}) is False
+            assert queue.fail(stale, "boom") is False
+
+            assert queue.complete(fresh, {"status": "success"}) is True
+            assert queue.counts() == {"video": {DONE: 1}}
+            queue.close()
+
+
+def test_failed_task_waits_for_not_before():
+    """Task yang gagal baru bisa di-lease lagi setelah backoff, lalu FAILED di max_attempts"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for queue in _queues(tmp_dir):
+            queue.enqueue("video", "video:abc", {})
+            task = queue.lease("w1", lease_seconds=60)
+            assert queue.fail(task, "HTTP Error 429", max_attempts=2, backoff=0.3) is True
+
+            assert queue.lease("w1", lease_seconds=60) is None
+            assert queue.has_open_work() is True
+
+            time.sleep(0.35)
+            retry = queue.lease("w1", lease_seconds=60)
+            assert retry is not None and retry["attempts"] == 2
+
+            assert queue.fail(retry, "HTTP Error 429", max_attempts=2, backoff=0.3) is True
+            assert queue.lease("w1", lease_seconds=60) is None
+            assert queue.counts() == {"video": {FAILED: 1}}
+            assert queue.has_open_work() is False
+            queue.close()
+
+
+def test_sqlite_queue_migrates_old_schema():
+    """Queue file tanpa kolom not_before tetap bisa dipakai"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = str(Path(tmp_dir) / "queue.sqlite")
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            CREATE TABLE tasks (
+                id INTEGER PRIMARY KEY, kind TEXT NOT NULL, key TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL, status TEXT NOT NULL, worker TEXT, token TEXT,
+                lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0, error TEXT,
+                result TEXT, updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("INSERT INTO tasks (kind, key, payload, status, updated_at) "
+                     "VALUES ('video', 'video:abc', '{}', 'pending', 0)")
+        conn.commit()
+        conn.close()
+
+        queue = SQLiteWorkQueue(db_path)
+        task = queue.lease("w1", lease_seconds=60)
+        assert task is not None and task["key"] == "video:abc"
+        assert queue.fail(task, "boom", max_attempts=3, backoff=60) is True
+        assert queue.lease("w1", lease_seconds=60) is None
+        queue.close()
+
+
+class _FakeDownloader:
+    """Dua channel yang sama-sama me-list satu video"""
+
+    def __init__(self):
+        self.fetched = []
+
+    def _extract_video_id(self, url):
+        return url.rsplit("v=", 1)[-1]
+
+    def get_channel_videos(self, channel_url, max_videos=None):
+        return ["https://www.youtube.com/watch?v=shared00001",
+                f"https://www.youtube.com/watch?v=own{channel_url[-1] * 8}"]
+
+    def download_videos(self, video_urls, channel_name, on_result=None, summary=None):
+        self.fetched.append(video_urls[0])
+        on_result({"status": "success", "video_url": video_urls[0]})
+
+
+def test_video_listed_by_two_channels_is_fetched_once():
+    """Task video di-key per video ID; channel kedua dicatat di refs"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for queue in _queues(tmp_dir):
+            downloader = _FakeDownloader()
+            scheduler = QueueScheduler(downloader, queue, max_workers=2, poll_interval=0.05)
+            scheduler.seed([("A", "https://www.youtube.com/@a"), ("B", "https://www.youtube.com/@b")])
+            assert scheduler.run() == {"success": 3}
+
+            assert sorted(downloader.fetched) == sorted(set(downloader.fetched))
+            assert len(downloader.fetched) == 3
+            assert queue.add_ref("video:shared00001", ["B", "https://www.youtube.com/@b"]) is False
+            queue.close()
+
+
+if __name__ == "__main__":
+    test_stale_token_is_rejected()
+    test_failed_task_waits_for_not_before()
+    test_sqlite_queue_migrates_old_schema()
+    test_video_listed_by_two_channels_is_fetched_once()
+    print("✓ work queue tests passed")
@@ -0,0 +1,315 @@
+"""
+Transcode Worker Pool
+Download (network) dan konversi ffmpeg (CPU) dipisah: hasil download masuk staging,
+process pool sebesar jumlah core melakukan konversi WAV/FLAC, mono downmix (kecuali
+channel berisi speaker terpisah), dan resampling >= 16 kHz. Queue yang bounded
+memberi backpressure ke download workers.
+"""
+
+import os
+import subprocess
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from channel_analysis import analyze_channel_layout
+
+logger = logging.getLogger(__name__)
+
+# Pilihan channel layout: auto (analisis), mono (selalu downmix), keep (tidak downmix)
+CHANNEL_LAYOUTS = ('auto', 'mono', 'keep')
+
+# Codec ffmpeg per output format
+AUDIO_CODECS = {
+    'wav': 'pcm_s16le',
+    'flac': 'flac',
+}
+
+
+def build_ffmpeg_command(
+    src: str,
+    dst: str,
+    audio_format: str = 'wav',
+    sample_rate: Optional[int] = None,
+    channels: Optional[int] = 1,
+    tags: Optional[Dict[str, str]] = None,
+    ffmpeg: str = 'ffmpeg'
+) -> List[str]:
+    """
+    Build command ffmpeg untuk konversi audio
+
+    Args:
+        src: Input file (hasil download)
+        dst: Output file
+        audio_format: 'wav' atau 'flac'
+        sample_rate: Target sample rate (None = ikut source)
+        channels: Jumlah channel output (1 = mono downmix, None = ikut source)
+        tags: Metadata tags yang di-embed (title, artist, ...)
+        ffmpeg: Path ke ffmpeg binary
+
+    Returns:
+        List argument untuk subprocess
+    """
+    cmd = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-nostdin', '-y', '-i', src, '-vn']
+    if channels:
+        cmd += ['-ac', str(channels)]
+    if sample_rate:
+        cmd += ['-ar', str(sample_rate)]
+    for key, value in (tags or {}).items():
+        if value:
+            cmd += ['-metadata', f'{key}={value}']
+    cmd += ['-c:a', AUDIO_CODECS[audio_format], '-f', audio_format, dst]
+    return cmd
+
+
+def resolve_channel_layout(src: str, channel_layout: str = 'auto',
+                           source_channels: Optional[int] = None, ffmpeg: str = 'ffmpeg') -> Dict:
+    """
+    Tentukan mono downmix vs keep multitrack untuk satu file
+
+    Args:
+        src: File audio
+        channel_layout: 'auto' (analisis audio), 'mono', atau 'keep'
+        source_channels: Jumlah channel source kalau diketahui
+        ffmpeg: Path ke ffmpeg binary
+
+    Returns:
+        Dict dengan decision ('mono' / 'multitrack') dan reason
+    """
+    if channel_layout not in CHANNEL_LAYOUTS:
+        raise ValueError(f"Unsupported channel layout: {channel_layout}")
+    if channel_layout == 'auto':
+        return analyze_channel_layout(src, channels=source_channels, ffmpeg=ffmpeg)
+    return {
+        "decision": "mono" if channel_layout == 'mono' else "multitrack",
+        "reason": f"forced by channel_layout={channel_layout}",
+        "channels": source_channels,
+    }
+
+
+def downmix_to_mono(path: str, ffmpeg: str = 'ffmpeg'):
+    """
+    Downmix WAV/FLAC ke mono in-place (tulis ke .tmp lalu replace)
+
+    Args:
+        path: File audio (.wav atau .flac)
+        ffmpeg: Path ke ffmpeg binary
+    """
+    path = Path(path)
+    audio_format = path.suffix.lower().lstrip('.')
+    if audio_format not in AUDIO_CODECS:
+        raise ValueError(f"Cannot downmix {path.name}: unsupported format")
+    tmp_path = path.with_name(path.name + '.tmp')
+    cmd = build_ffmpeg_command(str(path), str(tmp_path), audio_format=audio_format,
+                               channels=1, ffmpeg=ffmpeg)
+    completed = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if completed.returncode != 0:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        error = completed.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise RuntimeError(f"ffmpeg downmix failed: {error[-1] if error else 'unknown error'}")
+    os.replace(tmp_path, path)
+
+
+def transcode_audio(
+    src: str,
+    output_dir: str,
+    video_id: str,
+    audio_format: str = 'wav',
+    source_sample_rate: Optional[int] = None,
+    min_sample_rate: int = 16000,
+    sample_rate: Optional[int] = None,
+    channel_layout: str = 'auto',
+    source_channels: Optional[int] = None,
+    tags: Optional[Dict[str, str]] = None,
+    ffmpeg: str = 'ffmpeg'
+) -> Dict:
+    """
+    Konversi satu file ke {output_dir}/{video_id}.{audio_format} (jalan di worker process)
+
+    Args:
+        src: File hasil download di staging
+        output_dir: Folder output final (downloads/{channel}/{video_id}/)
+        video_id: YouTube video ID
+        audio_format: 'wav' atau 'flac'
+        source_sample_rate: Sample rate source dari yt-dlp (asr), kalau diketahui
+        min_sample_rate: Sample rate minimum; source di bawah ini di-upsample
+        sample_rate: Paksa sample rate tertentu (override)
+        channel_layout: 'auto' (analisis correlation/energy), 'mono', atau 'keep'
+        source_channels: Jumlah channel source kalau diketahui
+        tags: Metadata tags
+        ffmpeg: Path ke ffmpeg binary
+
+    Returns:
+        Dict dengan audio_file, file_size, sample_rate, channels, format,
+        channel_layout, seconds
+    """
+    if audio_format not in AUDIO_CODECS:
+        raise ValueError(f"Unsupported audio format: {audio_format}")
+
+    start = time.perf_counter()
+    layout = resolve_channel_layout(src, channel_layout, source_channels, ffmpeg)
+    mono = layout["decision"] == "mono"
+
+    target_rate = sample_rate
+    if target_rate is None and source_sample_rate and source_sample_rate < min_sample_rate:
+        target_rate = min_sample_rate
+
+    dst = Path(output_dir) / f"{video_id}.{audio_format}"
+    tmp_dst = dst.with_name(dst.name + '.tmp')
+    cmd = build_ffmpeg_command(
+        src, str(tmp_dst),
+        audio_format=audio_format,
+        sample_rate=target_rate,
+        channels=1 if mono else None,
+        tags=tags,
+        ffmpeg=ffmpeg
+    )
+
+    completed = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if completed.returncode != 0:
+        if tmp_dst.exists():
+            tmp_dst.unlink()
+        error = completed.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise RuntimeError(f"ffmpeg failed ({completed.returncode}): {error[-1] if error else 'unknown error'}")
+    os.replace(tmp_dst, dst)
+
+    return {
+        "audio_file": str(dst),
+        "file_size": dst.stat().st_size,
+        "sample_rate": target_rate or source_sample_rate,
+        "channels": 1 if mono else (layout.get("channels") or source_channels),
+        "format": audio_format,
+        "codec": AUDIO_CODECS[audio_format],
+        "channel_layout": layout,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+class TranscodePool:
+    """
+    Process pool untuk konversi audio dengan bounded queue
+
+    `submit` block kalau jumlah job yang belum selesai sudah mencapai
+    `max_pending`, jadi download workers otomatis melambat ketika CPU penuh.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        audio_format: str = 'wav',
+        min_sample_rate: int = 16000,
+        sample_rate: Optional[int] = None,
+        channel_layout: str = 'auto',
+        ffmpeg: str = 'ffmpeg',
+        callback_workers: Optional[int] = None
+    ):
+        """
+        Args:
+            max_workers: Jumlah worker process (default: jumlah CPU core)
+            max_pending: Maximum job di queue + sedang jalan (default: 2x workers)
+            audio_format: Output format, 'wav' atau 'flac'
+            min_sample_rate: Sample rate minimum output
+            sample_rate: Paksa sample rate tertentu (None = ikut source)
+            channel_layout: 'auto' (analisis per file), 'mono', atau 'keep'
+            ffmpeg: Path ke ffmpeg binary
+            callback_workers: Thread untuk callback post-processing (default: min(4, workers))
+        """
+        if audio_format not in AUDIO_CODECS:
+            raise ValueError(f"Unsupported audio format: {audio_format}")
+        if channel_layout not in CHANNEL_LAYOUTS:
+            raise ValueError(f"Unsupported channel layout: {channel_layout}")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 2
+        self.audio_format = audio_format
+        self.min_sample_rate = min_sample_rate
+        self.sample_rate = sample_rate
+        self.channel_layout = channel_layout
+        self.ffmpeg = ffmpeg
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        # Callback (probe, hash, dedup, tar, SQLite) tidak boleh jalan di thread
+        # result-handling ProcessPoolExecutor: itu menahan hasil semua job lain
+        self._callbacks = ThreadPoolExecutor(max_workers=callback_workers or min(4, self.max_workers),
+                                             thread_name_prefix="transcode-callback")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def submit(
+        self,
+        src: Path,
+        output_dir: Path,
+        video_id: str,
+        source_sample_rate: Optional[int] = None,
+        source_channels: Optional[int] = None,
+        tags: Optional[Dict[str, str]] = None,
+        callback: Optional[Callable[[Future], None]] = None
+    ) -> Future:
+        """
+        Queue satu file untuk dikonversi (block kalau queue penuh)
+
+        Args:
+            src: File hasil download di staging
+            output_dir: Folder output final
+            video_id: YouTube video ID
+            source_sample_rate: Sample rate source (optional)
+            source_channels: Jumlah channel source (optional)
+            tags: Metadata tags
+            callback: Dipanggil dengan Future ketika job selesai
+
+        Returns:
+            Future dengan hasil transcode_audio
+        """
+        waited = time.perf_counter()
+        self._slots.acquire()
+        waited = time.perf_counter() - waited
+        if waited > 1.0:
+            logger.info(f"Transcode queue full, waited {waited:.1f}s before queueing {video_id}")
+
+        try:
+            future = self._executor.submit(
+                transcode_audio,
+                str(src), str(output_dir), video_id,
+                audio_format=self.audio_format,
+                source_sample_rate=source_sample_rate,
+                min_sample_rate=self.min_sample_rate,
+                sample_rate=self.sample_rate,
+                channel_layout=self.channel_layout,
+                source_channels=source_channels,
+                tags=tags,
+                ffmpeg=self.ffmpeg
+            )
+        except Exception:
+            self._slots.release()
+            raise
+
+        def _run_callback(fut: Future):
+            # Slot baru dilepas setelah callback selesai: max_pending membatasi
+            # semua pekerjaan in-flight, termasuk post-processing
+            try:
+                callback(fut)
+            except Exception as e:
+                logger.error(f"Transcode callback failed for {video_id}: {e}")
+            finally:
+                self._slots.release()
+
+        def _done(fut: Future):
+            if not callback:
+                self._slots.release()
+                return
+            try:
+                self._callbacks.submit(_run_callback, fut)
+            except RuntimeError:
+                # Callback pool sudah shutdown (shutdown(wait=False)): jalankan di sini
+                _run_callback(fut)
+
+        future.add_done_callback(_done)
+        return future
+
+    def shutdown(self, wait: bool = True):
+        """Tunggu semua job (dan callback-nya) selesai dan stop worker processes"""
+        self._executor.shutdown(wait=wait)
+        self._callbacks.shutdown(wait=wait)
@@ -1,12 +1,21 @@
 import requests
+from requests.adapters import HTTPAdapter
+import os
 import json
 import time
-from typing import List, Dict, Optional
+import codecs
+import asyncio
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple
 import logging
 from pathlib import Path
 from html.parser import HTMLParser
 import html
 
+from identity_pool import Identity, IdentityPool
+from metrics import MetricsRegistry
+
 # 設定日誌
 logging.basicConfig(
     level=logging.INFO,
@@ -23,10 +32,15 @@ class AudioLinkExtractor(HTMLParser):
         self.audio_link = None
         self.found = False
     
+    @staticmethod
+    def _is_audio_link(href: str) -> bool:
+        """判斷 href 是否為音訊串流連結（mime=audio/...，可能已 URL 編碼）"""
+        return 'mime=audio%2F' in href or 'mime=audio/' in href
+    
     def handle_starttag(self, tag, attrs):
         if tag == 'a' and not self.found:
             for attr_name, attr_value in attrs:
-                if attr_name == 'href' and attr_value and 'mime=audio%2Fwebm' in attr_value:
+                if attr_name == 'href' and attr_value and self._is_audio_link(attr_value):
                     # 找到音訊連結，解碼 HTML 實體
                     self.audio_link = html.unescape(attr_value)
                     self.found = True
@@ -38,7 +52,11 @@ class TurboScribeBatch:
     
     def __init__(self, delay: float = 1.0, 
                  headers_file: str = "config_headers.json",
-                 cookies_file: str = "config_cookies.txt"):
+                 cookies_file: str = "config_cookies.txt",
+                 download_retries: int = 5,
+                 download_segments: int = 1,
+                 min_segment_size: int = 1024 * 1024,
+                 metrics: Optional[MetricsRegistry] = None):
         """
         初始化
         
@@ -46,10 +64,37 @@ class TurboScribeBatch:
             delay: 每次請求之間的延遲時間（秒）
             headers_file: Headers 設定檔路徑
             cookies_file: Cookies 設定檔路徑
+            download_retries: 音訊下載中斷時的最大續傳次數
+            download_segments: 分段下載的連線數（1 = 單一連線循序下載）
+            min_segment_size: 每段最小位元組數，檔案太小時自動減少段數
+            metrics: 共用的 MetricsRegistry（預設建立新的）
+        
+        cookies_file 中每一行非註解的 cookie 字串都是一個身分 (identity)，
+        各自使用獨立的 session、速率限制（每個身分每 delay 秒一個請求）與冷卻時間。
         """
         self.api_url = "https://turboscribe.ai/_htmx/NCN20gAEkZMBzQPXkQc"
         self.delay = delay
-        self.session = requests.Session()
+        self.download_retries = download_retries
+        self.download_segments = max(1, download_segments)
+        self.min_segment_size = min_segment_size
+        self.headers: Dict[str, str] = {}
+        
+        # 效能指標：各階段耗時（rate_wait / resolve / audio_download）、位元組數與吞吐量
+        self.metrics = metrics or MetricsRegistry()
+        self._stage_seconds = self.metrics.histogram(
+            "turboscribe_stage_seconds", "Time spent per TurboScribe stage")
+        self._requests_total = self.metrics.counter(
+            "turboscribe_requests_total", "TurboScribe API requests by result status")
+        self._downloaded_bytes = self.metrics.counter(
+            "turboscribe_downloaded_bytes_total", "Audio bytes downloaded")
+        self._throughput = self.metrics.gauge(
+            "turboscribe_download_bytes_per_second", "Throughput of the last finished audio download")
+        
+        # 音訊下載用獨立 session（不帶 TurboScribe 的 cookies，可重用連線）
+        self.download_session = requests.Session()
+        pool_size = max(10, self.download_segments * 2)
+        self.download_session.mount('https://', HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        self.download_session.mount('http://', HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
         
         # 從檔案載入 headers
         self._load_headers(headers_file)
@@ -69,12 +114,12 @@ class TurboScribeBatch:
             if headers_path.exists():
                 with open(headers_path, 'r', encoding='utf-8') as f:
                     headers = json.load(f)
-                    self.session.headers.update(headers)
+                    self.headers.update(headers)
                     logger.info(f"✓ 已載入 headers 從 {headers_file}")
             else:
                 logger.warning(f"⚠ Headers 檔案不存在: {headers_file}，使用預設 headers")
                 # 使用預設 headers
-                self.session.headers.update({
+                self.headers.update({
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
                     'Content-Type': 'application/json',
                     'Accept': '*/*'
@@ -85,41 +130,48 @@ class TurboScribeBatch:
     
     def _load_cookies(self, cookies_file: str):
         """
-        從文字檔案載入 cookies
+        從文字檔案載入 cookies：每一行建立一個身分與對應的 session
         
         Args:
             cookies_file: Cookies 檔案路徑
         """
         try:
-            cookies_path = Path(cookies_file)
-            if cookies_path.exists():
-                with open(cookies_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip()
-                        # 跳過空行和註解
-                        if line and not line.startswith('#'):
-                            self._set_cookies(line)
-                            logger.info(f"✓ 已載入 cookies 從 {cookies_file}")
-                            break
-            else:
+            if not Path(cookies_file).exists():
                 logger.warning(f"⚠ Cookies 檔案不存在: {cookies_file}")
                 logger.warning("⚠ 請在 config_cookies.txt 中設定你的 Cookie")
+            
+            # delay = 0 表示不限速
+            rate = 1.0 / self.delay if self.delay > 0 else 1e9
+            self.identity_pool = IdentityPool.from_cookie_lines(cookies_file, self.headers, rate=rate)
+            self.sessions: Dict[str, requests.Session] = {}
+            for identity in self.identity_pool.identities:
+                session = requests.Session()
+                session.headers.update(identity.headers)
+                self._set_cookies(identity.cookie_string or '', session)
+                self.sessions[identity.name] = session
+            
+            # 相容舊程式：self.session 為第一個身分的 session
+            self.session = self.sessions[self.identity_pool.identities[0].name]
+            if Path(cookies_file).exists():
+                logger.info(f"✓ 已載入 {len(self.identity_pool)} 組 cookies 從 {cookies_file}")
         except Exception as e:
             logger.error(f"✗ 載入 cookies 失敗: {e}")
             raise
     
-    def _set_cookies(self, cookie_string: str):
+    def _set_cookies(self, cookie_string: str, session: Optional[requests.Session] = None):
         """
         從 cookie 字串設定 cookies
         
         Args:
             cookie_string: Cookie 字串（格式: "name1=value1; name2=value2")
+            session: 目標 session（預設 self.session）
         """
+        session = session or self.session
         for cookie in cookie_string.split(';'):
             cookie = cookie.strip()
             if '=' in cookie:
                 name, value = cookie.split('=', 1)
-                self.session.cookies.set(name.strip(), value.strip())
+                session.cookies.set(name.strip(), value.strip())
     
     def _extract_audio_link(self, html_content: str) -> Optional[str]:
         """
@@ -135,128 +187,466 @@ class TurboScribeBatch:
         parser.feed(html_content)
         return parser.audio_link
     
-    def _download_audio(self, audio_url: str, video_id: str) -> Optional[str]:
+    @staticmethod
+    def _audio_extension(audio_url: str) -> str:
+        """從 URL 的 mime 參數判斷副檔名"""
+        if 'mime=audio%2Fwebm' in audio_url or 'mime=audio/webm' in audio_url:
+            return 'weba'
+        elif 'mime=audio%2Fmp4' in audio_url or 'mime=audio/mp4' in audio_url:
+            return 'm4a'
+        return 'audio'
+    
+    @staticmethod
+    def _content_range_total(content_range: Optional[str]) -> Optional[int]:
+        """解析 Content-Range 標頭中的檔案總大小（"bytes 0-99/1234" -> 1234）"""
+        if not content_range or '/' not in content_range:
+            return None
+        total = content_range.rsplit('/', 1)[1].strip()
+        return int(total) if total.isdigit() else None
+    
+    def _fetch_to_part(self, audio_url: str, part_path: Path) -> Optional[int]:
         """
-        下載音訊檔案
+        將音訊寫入 .part 檔案；若 .part 已有內容則以 Range 請求續傳
         
         Args:
             audio_url: 音訊檔案 URL
-            video_id: YouTube 影片 ID
+            part_path: .part 暫存檔路徑
             
         Returns:
-            下載的檔案路徑，失敗則返回 None
+            伺服器回報的檔案總大小（未知則為 None）
+            
+        Raises:
+            requests.exceptions.RequestException: 網路錯誤
+            IOError: 下載後大小與 Content-Length 不符
         """
-        try:
-            # 建立輸出目錄
-            output_dir = Path("audio_downloads")
-            output_dir.mkdir(exist_ok=True)
+        # 分段下載留下的 .part 中間可能有空洞，不能直接接續
+        segments_file = self._segments_file(part_path)
+        if segments_file.exists():
+            segments_file.unlink()
+            if part_path.exists():
+                part_path.unlink()
+        
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        
+        response = self.download_session.get(audio_url, headers=headers, stream=True, timeout=60)
+        with response:
+            if response.status_code == 416:
+                # Range 超出範圍：.part 可能已經完整
+                total = self._content_range_total(response.headers.get('Content-Range'))
+                if total is not None and total == offset:
+                    return total
+                part_path.unlink()
+                raise IOError(f"Range {offset}- 無效，已刪除 .part 重新下載")
+            
+            response.raise_for_status()
             
-            # 從 URL 判斷檔案格式
-            if 'mime=audio%2Fwebm' in audio_url or 'mime=audio/webm' in audio_url:
-                ext = 'weba'
-            elif 'mime=audio%2Fmp4' in audio_url or 'mime=audio/mp4' in audio_url:
-                ext = 'm4a'
+            if response.status_code == 206:
+                total = self._content_range_total(response.headers.get('Content-Range'))
+                mode = 'ab'
+                logger.info(f"↻ 從 {offset} bytes 續傳")
             else:
-                ext = 'audio'
+                # 伺服器忽略 Range，從頭開始
+                content_length = response.headers.get('Content-Length')
+                total = int(content_length) if content_length and content_length.isdigit() else None
+                mode = 'wb'
             
-            # 生成檔案名稱
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            filename = f"{video_id}_{timestamp}.{ext}"
-            filepath = output_dir / filename
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=65536):
+                    if chunk:
+                        f.write(chunk)
+        
+        size = part_path.stat().st_size
+        if total is not None and size != total:
+            if size > total:
+                part_path.unlink()
+            raise IOError(f"檔案大小不符: {size}/{total} bytes")
+        return total
+    
+    @staticmethod
+    def _segments_file(part_path: Path) -> Path:
+        """分段下載進度檔路徑（{file}.part.segments.json）"""
+        return part_path.with_name(part_path.name + '.segments.json')
+    
+    def _probe_size(self, audio_url: str) -> Optional[int]:
+        """
+        以 Range: bytes=0-0 探測檔案大小，同時確認伺服器支援 Range
+        
+        Returns:
+            檔案總大小；伺服器不支援 Range 則為 None
+        """
+        response = self.download_session.get(audio_url, headers={'Range': 'bytes=0-0'},
+                                             stream=True, timeout=30)
+        with response:
+            if response.status_code != 206:
+                return None
+            return self._content_range_total(response.headers.get('Content-Range'))
+    
+    def _fetch_segment(self, audio_url: str, part_path: Path, fd: int, start: int, end: int):
+        """
+        下載 [start, end] 位元組範圍並以 pwrite 寫入對應位置，中斷時從已寫入的位置續傳
+        
+        沒有 os.pwrite 的平台（Windows）改用區段自己的檔案 handle，以 seek/write 寫入。
+        
+        Args:
+            audio_url: 音訊檔案 URL
+            part_path: .part 暫存檔路徑
+            fd: 已預先配置大小的 .part 檔案描述符
+            start: 起始位元組（含）
+            end: 結束位元組（含）
+        """
+        pos = start
+        for attempt in range(1, self.download_retries + 1):
+            try:
+                response = self.download_session.get(
+                    audio_url, headers={'Range': f'bytes={pos}-{end}'}, stream=True, timeout=60)
+                with response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise IOError(f"伺服器未回傳 206 (狀態碼 {response.status_code})")
+                    with (nullcontext() if hasattr(os, 'pwrite') else open(part_path, 'r+b')) as handle:
+                        for chunk in response.iter_content(chunk_size=65536):
+                            if chunk:
+                                if handle is None:
+                                    os.pwrite(fd, chunk, pos)
+                                else:
+                                    handle.seek(pos)
+                                    handle.write(chunk)
+                                pos += len(chunk)
+                if pos != end + 1:
+                    raise IOError(f"區段大小不符: {pos - start}/{end - start + 1} bytes")
+                return
+            except (requests.exceptions.RequestException, IOError) as e:
+                logger.warning(f"⚠ 區段 {start}-{end} 中斷 ({attempt}/{self.download_retries}): {e}")
+                if attempt == self.download_retries:
+                    raise
+                time.sleep(min(2 ** attempt, 30))
+    
+    def _fetch_segmented(self, audio_url: str, part_path: Path, total: int) -> int:
+        """
+        多連線分段下載到預先配置大小的 .part 檔案
+        
+        已完成的區段記錄在 .part.segments.json，下次執行時只下載剩餘區段。
+        
+        Args:
+            audio_url: 音訊檔案 URL
+            part_path: .part 暫存檔路徑
+            total: 檔案總大小
             
-            logger.info(f"開始下載音訊: {filename}")
+        Returns:
+            檔案總大小
+        """
+        count = max(1, min(self.download_segments, total // self.min_segment_size))
+        step = -(-total // count)
+        ranges = [(start, min(start + step, total) - 1) for start in range(0, total, step)]
+        
+        # 讀取先前的進度（檔案大小或分段方式不同則重新開始）
+        segments_file = self._segments_file(part_path)
+        done = set()
+        if segments_file.exists() and part_path.exists():
+            try:
+                with open(segments_file, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if state.get('total') == total and [tuple(r) for r in state.get('ranges', [])] == ranges:
+                    done = set(state.get('done', []))
+            except (OSError, ValueError):
+                pass
+        
+        def save_state():
+            with open(segments_file, 'w', encoding='utf-8') as f:
+                json.dump({"total": total, "ranges": ranges, "done": sorted(done)}, f)
+        
+        fd = os.open(part_path, os.O_RDWR | os.O_CREAT)
+        try:
+            # 預先配置檔案大小，各區段以 pwrite 寫入自己的位置
+            if os.fstat(fd).st_size != total:
+                os.ftruncate(fd, total)
+            save_state()
             
-            # 下載檔案
-            response = requests.get(audio_url, stream=True, timeout=60)
-            response.raise_for_status()
+            pending = [idx for idx in range(len(ranges)) if idx not in done]
+            logger.info(f"分段下載: {len(ranges)} 段 ({len(pending)} 段待下載), {total} bytes")
             
-            # 寫入檔案
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="segment") as executor:
+                futures = {executor.submit(self._fetch_segment, audio_url, part_path, fd, *ranges[idx]): idx
+                           for idx in pending}
+                errors = []
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+                    done.add(futures[future])
+                    save_state()
+            if errors:
+                raise IOError(f"{len(errors)} 個區段下載失敗: {errors[0]}")
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        
+        segments_file.unlink()
+        return total
+    
+    def _download_audio(self, audio_url: str, video_id: str) -> Optional[str]:
+        """
+        下載音訊檔案並記錄耗時、位元組數與吞吐量（實際下載見 _fetch_audio）
+        
+        Args:
+            audio_url: 音訊檔案 URL
+            video_id: YouTube 影片 ID
             
-            logger.info(f"✓ 音訊已下載: {filepath}")
+        Returns:
+            下載的檔案路徑，失敗則返回 None
+        """
+        existing = Path("audio_downloads") / f"{video_id}.{self._audio_extension(audio_url)}"
+        if existing.exists():
+            return self._fetch_audio(audio_url, video_id)
+        
+        start = time.perf_counter()
+        filepath = self._fetch_audio(audio_url, video_id)
+        elapsed = time.perf_counter() - start
+        self._stage_seconds.observe(elapsed, stage="audio_download")
+        if filepath:
+            size = Path(filepath).stat().st_size
+            self._downloaded_bytes.inc(size)
+            if elapsed > 0:
+                self._throughput.set(size / elapsed)
+        return filepath
+    
+    def _fetch_audio(self, audio_url: str, video_id: str) -> Optional[str]:
+        """
+        下載音訊檔案（可續傳）
+        
+        先寫入固定名稱的 audio_downloads/{video_id}.{ext}.part，連線中斷時以
+        HTTP Range 從已下載的位置續傳；大小與 Content-Length 相符後才改名為
+        正式檔名。已存在的完整檔案會直接沿用。
+        
+        Args:
+            audio_url: 音訊檔案 URL
+            video_id: YouTube 影片 ID
+            
+        Returns:
+            下載的檔案路徑，失敗則返回 None
+        """
+        # 建立輸出目錄
+        output_dir = Path("audio_downloads")
+        output_dir.mkdir(exist_ok=True)
+        
+        filename = f"{video_id}.{self._audio_extension(audio_url)}"
+        filepath = output_dir / filename
+        part_path = output_dir / f"{filename}.part"
+        
+        if filepath.exists():
+            logger.info(f"✓ 音訊已存在，略過下載: {filepath}")
             return str(filepath)
+        
+        logger.info(f"開始下載音訊: {filename}")
+        
+        # 分段模式：伺服器支援 Range 且檔案夠大時才使用
+        if self.download_segments > 1:
+            try:
+                total = self._probe_size(audio_url)
+                if total and total >= 2 * self.min_segment_size:
+                    self._fetch_segmented(audio_url, part_path, total)
+                    os.replace(part_path, filepath)
+                    logger.info(f"✓ 音訊已下載: {filepath}")
+                    return str(filepath)
+                logger.info("檔案太小或伺服器不支援 Range，改用單一連線下載")
+            except (requests.exceptions.RequestException, IOError) as e:
+                logger.error(f"✗ 分段下載失敗: {e}（已保留 {part_path} 供下次續傳）")
+                return None
+        
+        for attempt in range(1, self.download_retries + 1):
+            try:
+                total = self._fetch_to_part(audio_url, part_path)
+                if total is None:
+                    logger.warning("⚠ 伺服器未提供 Content-Length，無法驗證檔案大小")
+                os.replace(part_path, filepath)
+                logger.info(f"✓ 音訊已下載: {filepath}")
+                return str(filepath)
+            except (requests.exceptions.RequestException, IOError) as e:
+                logger.warning(f"⚠ 下載中斷 ({attempt}/{self.download_retries}): {e}")
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if status is not None and 400 <= status < 500 and status not in (408, 429):
+                    # 連結失效或被拒絕，重試沒有意義
+                    break
+                if attempt < self.download_retries:
+                    time.sleep(min(2 ** attempt, 30))
+        
+        logger.error(f"✗ 下載音訊失敗: {filename}（已保留 {part_path} 供下次續傳）")
+        return None
+    
+    def _resolve_url(self, youtube_url: str, save_html: bool = True,
+                     identity: Optional[Identity] = None) -> Tuple[Dict, Optional[str]]:
+        """
+        呼叫 TurboScribe API 並從回應中提取音訊連結（不下載音訊）
+        
+        回應以串流方式讀取：找到第一個 mime=audio 連結後就停止解析，
+        完整 HTML 不會保留在記憶體或結果字典中。
+        
+        Args:
+            youtube_url: YouTube 影片網址
+            save_html: 是否將回應儲存為 HTML 檔案
+            identity: 使用的身分（None = 從 identity pool 輪流取得，必要時等待）
             
-        except Exception as e:
-            logger.error(f"✗ 下載音訊失敗: {e}")
-            return None
+        Returns:
+            (結果字典, 音訊下載連結或 None)
+        """
+        if identity is None:
+            waited = time.perf_counter()
+            identity = self.identity_pool.acquire()
+            self._stage_seconds.observe(time.perf_counter() - waited, stage="rate_wait")
+        
+        with self._stage_seconds.time(stage="resolve"):
+            result, audio_link = self._post_resolve(youtube_url, save_html, identity)
+        self._requests_total.inc(status=result["status"])
+        return result, audio_link
     
-    def process_single_url(self, youtube_url: str, save_html: bool = True, download_audio: bool = True) -> Dict:
+    def _post_resolve(self, youtube_url: str, save_html: bool,
+                      identity: Identity) -> Tuple[Dict, Optional[str]]:
         """
-        處理單個 YouTube URL
+        以指定身分送出 TurboScribe 請求並串流解析回應
         
         Args:
             youtube_url: YouTube 影片網址
             save_html: 是否將回應儲存為 HTML 檔案
+            identity: 使用的身分
             
         Returns:
-            包含結果的字典
+            (結果字典, 音訊下載連結或 None)
         """
         payload = {"url": youtube_url}
+        session = self.sessions[identity.name]
         
         try:
             logger.info(f"正在處理: {youtube_url}")
-            response = self.session.post(
+            response = session.post(
                 self.api_url,
                 json=payload,
-                timeout=30
+                timeout=30,
+                stream=True
             )
             
-            if response.status_code == 200:
-                logger.info(f"✓ 成功: {youtube_url}")
-                
-                # 儲存 HTML 回應
-                html_file = None
-                if save_html and response.text:
-                    html_file = self._save_html_response(youtube_url, response.text)
-                
-                # 提取並下載音訊
-                audio_file = None
-                if download_audio and response.text:
-                    audio_link = self._extract_audio_link(response.text)
-                    if audio_link:
-                        video_id = self._extract_video_id(youtube_url)
-                        audio_file = self._download_audio(audio_link, video_id)
-                    else:
-                        logger.warning("⚠ 未找到音訊下載連結")
-                
-                return {
-                    "url": youtube_url,
-                    "status": "success",
-                    "response": response.text,
-                    "status_code": response.status_code,
-                    "html_file": html_file,
-                    "audio_file": audio_file
-                }
-            else:
-                logger.warning(f"✗ 失敗 (狀態碼 {response.status_code}): {youtube_url}")
-                return {
-                    "url": youtube_url,
-                    "status": "failed",
-                    "error": f"HTTP {response.status_code}",
-                    "response": response.text
-                }
+            with response:
+                if response.status_code == 200:
+                    logger.info(f"✓ 成功: {youtube_url}")
+                    
+                    # 串流解析（並視需要同步寫入 HTML 檔案）
+                    audio_link, html_file = self._stream_audio_link(youtube_url, response, save_html)
+                    self.identity_pool.report_success(identity)
+                    
+                    return {
+                        "url": youtube_url,
+                        "status": "success",
+                        "status_code": response.status_code,
+                        "identity": identity.name,
+                        "audio_link": audio_link,
+                        "html_file": html_file,
+                        "audio_file": None
+                    }, audio_link
+                else:
+                    logger.warning(f"✗ 失敗 (狀態碼 {response.status_code}): {youtube_url}")
+                    # 403 / 429：此身分被限速，進入冷卻
+                    self.identity_pool.report_failure(identity, throttled=response.status_code in (403, 429))
+                    return {
+                        "url": youtube_url,
+                        "status": "failed",
+                        "error": f"HTTP {response.status_code}",
+                        "status_code": response.status_code,
+                        "identity": identity.name
+                    }, None
                 
         except requests.exceptions.RequestException as e:
             logger.error(f"✗ 錯誤: {youtube_url} - {str(e)}")
+            self.identity_pool.report_failure(identity)
             return {
                 "url": youtube_url,
                 "status": "error",
-                "error": str(e)
-            }
+                "error": str(e),
+                "identity": identity.name
+            }, None
     
-    def _save_html_response(self, youtube_url: str, html_content: str) -> str:
+    def _stream_audio_link(self, youtube_url: str, response: requests.Response,
+                           save_html: bool, chunk_size: int = 16384) -> Tuple[Optional[str], Optional[str]]:
         """
-        將 HTML 回應儲存為檔案
+        逐塊讀取回應並增量解析，找到第一個音訊連結即停止解析
+        
+        不儲存 HTML 時，找到連結後立即中斷讀取；儲存 HTML 時繼續把剩餘
+        內容直接寫入檔案（不再解析），記憶體用量與回應大小無關。
+        
+        Args:
+            youtube_url: YouTube 影片網址
+            response: 以 stream=True 發出的回應
+            save_html: 是否將回應儲存為 HTML 檔案
+            chunk_size: 每次讀取的位元組數
+            
+        Returns:
+            (音訊下載連結或 None, HTML 檔案路徑或 None)
+        """
+        decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+        parser = AudioLinkExtractor()
+        html_path = None
+        html_fp = None
+        
+        try:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                text = decoder.decode(chunk)
+                if not text:
+                    continue
+                
+                if save_html:
+                    if html_fp is None:
+                        html_path = self._html_output_path(youtube_url)
+                        html_fp = open(html_path, 'w', encoding='utf-8')
+                    html_fp.write(text)
+                
+                if not parser.found:
+                    parser.feed(text)
+                    if parser.found and not save_html:
+                        break
+            
+            if html_fp is not None:
+                html_fp.write(decoder.decode(b'', final=True))
+        finally:
+            if html_fp is not None:
+                html_fp.close()
+                logger.info(f"✓ HTML 已儲存: {html_path}")
+        
+        return parser.audio_link, str(html_path) if html_path else None
+    
+    def process_single_url(self, youtube_url: str, save_html: bool = True, download_audio: bool = True) -> Dict:
+        """
+        處理單個 YouTube URL
+        
+        Args:
+            youtube_url: YouTube 影片網址
+            save_html: 是否將回應儲存為 HTML 檔案
+            download_audio: 是否自動下載音訊檔案
+            
+        Returns:
+            包含結果的字典
+        """
+        result, audio_link = self._resolve_url(youtube_url, save_html=save_html)
+        
+        # 下載音訊
+        if download_audio and result["status"] == "success":
+            if audio_link:
+                video_id = self._extract_video_id(youtube_url)
+                result["audio_file"] = self._download_audio(audio_link, video_id)
+            else:
+                logger.warning("⚠ 未找到音訊下載連結")
+        
+        return result
+    
+    def _html_output_path(self, youtube_url: str) -> Path:
+        """
+        產生 HTML 回應的儲存路徑 html_responses/{video_id}_{timestamp}.html
         
         Args:
             youtube_url: YouTube 影片網址
-            html_content: HTML 內容
             
         Returns:
-            儲存的檔案路徑
+            檔案路徑
         """
         # 從 YouTube URL 提取影片 ID
         video_id = self._extract_video_id(youtube_url)
@@ -268,14 +658,7 @@ class TurboScribeBatch:
         # 生成檔案名稱
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         filename = f"{video_id}_{timestamp}.html"
-        filepath = output_dir / filename
-        
-        # 儲存 HTML 檔案
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        logger.info(f"✓ HTML 已儲存: {filepath}")
-        return str(filepath)
+        return output_dir / filename
     
     def _extract_video_id(self, youtube_url: str) -> str:
         """
@@ -319,16 +702,104 @@ class TurboScribeBatch:
         for idx, url in enumerate(youtube_urls, 1):
             logger.info(f"進度: {idx}/{total}")
             
+            # 請求間隔由 identity pool 控制（每個身分每 delay 秒一個請求）
             result = self.process_single_url(url, save_html=save_html, download_audio=download_audio)
             results.append(result)
+        
+        logger.info("批量處理完成")
+        return results
+    
+    async def process_batch_async(self, youtube_urls: List[str], save_html: bool = True,
+                                  download_audio: bool = True, resolve_concurrency: int = 4,
+                                  download_concurrency: int = 2) -> List[Dict]:
+        """
+        非同步批量處理：同時解析 N 個 URL、同時下載 M 個音訊
+        
+        解析 (TurboScribe API) 與下載 (googlevideo) 各自有獨立的 semaphore，
+        API 請求輪流使用各個身分，每個身分有自己的 rate limiter（每秒 1/delay 個請求）。
+        結果字典與檔案和同步的 process_batch 相同，順序與輸入一致。
+        
+        Args:
+            youtube_urls: YouTube 影片網址列表
+            save_html: 是否將回應儲存為 HTML 檔案
+            download_audio: 是否自動下載音訊檔案
+            resolve_concurrency: 同時進行的 URL 解析數量 (N)
+            download_concurrency: 同時進行的音訊下載數量 (M)
             
-            # 如果不是最後一個，則等待
-            if idx < total:
-                time.sleep(self.delay)
+        Returns:
+            包含所有結果的列表
+        """
+        total = len(youtube_urls)
+        results: List[Optional[Dict]] = [None] * total
+        loop = asyncio.get_running_loop()
+        
+        # requests 是同步的，放到專用的 thread pool 執行
+        executor = ThreadPoolExecutor(max_workers=resolve_concurrency + download_concurrency,
+                                      thread_name_prefix="turboscribe")
+        resolve_sem = asyncio.Semaphore(resolve_concurrency)
+        download_sem = asyncio.Semaphore(download_concurrency)
+        
+        # URL 佇列：每次只有固定數量的 task 存在，適合數萬行的 urls.txt
+        url_queue: asyncio.Queue = asyncio.Queue()
+        for item in enumerate(youtube_urls):
+            url_queue.put_nowait(item)
+        done = 0
+        
+        async def handle(idx: int, url: str):
+            nonlocal done
+            async with resolve_sem:
+                identity, wait = self.identity_pool.checkout()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._stage_seconds.observe(max(0.0, wait), stage="rate_wait")
+                result, audio_link = await loop.run_in_executor(
+                    executor, self._resolve_url, url, save_html, identity)
+            
+            if download_audio and result["status"] == "success":
+                if audio_link:
+                    video_id = self._extract_video_id(url)
+                    async with download_sem:
+                        result["audio_file"] = await loop.run_in_executor(
+                            executor, self._download_audio, audio_link, video_id)
+                else:
+                    logger.warning("⚠ 未找到音訊下載連結")
+            
+            results[idx] = result
+            done += 1
+            logger.info(f"進度: {done}/{total}")
+        
+        async def worker():
+            while True:
+                try:
+                    idx, url = url_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await handle(idx, url)
+        
+        logger.info(f"開始非同步批量處理 {total} 個 URL "
+                    f"(解析 {resolve_concurrency} / 下載 {download_concurrency})")
+        
+        # worker 數量 = 解析 + 下載 上限，讓解析不會被下載卡住
+        try:
+            await asyncio.gather(*(worker() for _ in range(resolve_concurrency + download_concurrency)))
+        finally:
+            executor.shutdown(wait=False)
         
         logger.info("批量處理完成")
         return results
     
+    def run_batch_async(self, youtube_urls: List[str], **kwargs) -> List[Dict]:
+        """
+        process_batch_async 的同步包裝，參數同 process_batch_async
+        
+        Args:
+            youtube_urls: YouTube 影片網址列表
+            
+        Returns:
+            包含所有結果的列表
+        """
+        return asyncio.run(self.process_batch_async(youtube_urls, **kwargs))
+    
     def save_results(self, results: List[Dict], output_file: str = "results.json"):
         """
         儲存結果到 JSON 檔案
@@ -392,7 +863,7 @@ def main():
         if result['status'] == 'success':
             print(f"HTML 檔案: {result.get('html_file', 'N/A')}")
             print(f"音訊檔案: {result.get('audio_file', 'N/A')}")
-            print(f"回應預覽: {result['response'][:100]}...")  # 只顯示前 100 字元
+            print(f"音訊連結: {(result.get('audio_link') or 'N/A')[:100]}...")  # 只顯示前 100 字元
         else:
             print(f"錯誤: {result.get('error', 'Unknown')}")
 
@@ -0,0 +1,457 @@
+"""
+Work Queue dengan Lease (distributed crawling)
+Beberapa worker process / node menarik pekerjaan dari satu channel list: task
+"channel" (listing) menghasilkan task "video"; setiap task di-lease oleh satu
+worker, diperpanjang lewat heartbeat, dan otomatis kembali ke antrian kalau lease
+habis (worker mati / hang). Backend: SQLite file yang di-share antar process, atau
+in-memory stand-in untuk satu process; backend lain bisa didaftarkan lewat
+register_backend().
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Task status
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+# Backoff sebelum task yang gagal boleh di-lease lagi: base * 2 ** (attempts - 1), max cap
+RETRY_BACKOFF = 60.0
+MAX_RETRY_BACKOFF = 3600.0
+
+
+def retry_delay(attempts: int, backoff: float = RETRY_BACKOFF) -> float:
+    """Detik sebelum retry ke-`attempts` (attempts >= 1) boleh di-lease"""
+    return min(MAX_RETRY_BACKOFF, backoff * 2 ** max(0, attempts - 1))
+
+
+def _append_ref(payload: Dict, ref: List) -> bool:
+    """Tambah ref ke payload["refs"] kalau belum ada (dan bukan pemilik task)"""
+    ref = list(ref)
+    refs = payload.get("refs", [])
+    if ref[0] == payload.get("channel_name") or ref in refs:
+        return False
+    payload["refs"] = refs + [ref]
+    return True
+
+
+def default_worker_id() -> str:
+    """hostname-pid: unik per process, terbaca di log dan di tabel tasks"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    Interface work queue
+
+    Task = dict {"id", "kind", "key", "payload", "attempts", "worker", "token"}.
+    `key` unik per queue: enqueue() dengan key yang sudah ada diabaikan, jadi
+    seeding dan listing ulang (setelah lease channel habis) aman diulang.
+    `token` berubah setiap lease; heartbeat / complete / fail dengan token lama
+    (lease sudah diambil worker lain) ditolak.
+    """
+
+    def enqueue(self, kind: str, key: str, payload: Dict) -> bool:
+        """Tambah task (True kalau baru)"""
+        raise NotImplementedError
+
+    def add_ref(self, key: str, ref: List) -> bool:
+        """
+        Catat referensi tambahan di payload["refs"] task yang sudah ada (e.g. channel
+        lain yang juga me-list video yang sama)
+
+        Returns:
+            True kalau ref baru ditambahkan
+        """
+        raise NotImplementedError
+
+    def lease(self, worker_id: str, lease_seconds: float, kinds: Optional[List[str]] = None) -> Optional[Dict]:
+        """
+        Ambil satu task pending (atau yang lease-nya sudah habis)
+
+        Args:
+            worker_id: ID worker yang memegang lease
+            lease_seconds: Durasi lease; perpanjang dengan heartbeat()
+            kinds: Hanya kind ini, urutan = prioritas (default: video dulu, lalu channel)
+
+        Returns:
+            Task, atau None kalau tidak ada yang bisa diambil sekarang
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, task: Dict, lease_seconds: float) -> bool:
+        """Perpanjang lease (False kalau lease sudah hilang)"""
+        raise NotImplementedError
+
+    def complete(self, task: Dict, result: Optional[Dict] = None) -> bool:
+        """Tandai task selesai (False kalau lease sudah hilang)"""
+        raise NotImplementedError
+
+    def fail(self, task: Dict, error: str, max_attempts: int = 3, backoff: float = RETRY_BACKOFF) -> bool:
+        """
+        Kembalikan task ke antrian, atau FAILED kalau attempts >= max_attempts
+
+        Task yang dikembalikan baru bisa di-lease lagi setelah retry_delay(attempts, backoff),
+        jadi video yang sedang di-throttle tidak langsung diambil ulang oleh semua worker.
+        """
+        raise NotImplementedError
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """{kind: {status: jumlah}}; lease yang sudah habis dihitung pending"""
+        raise NotImplementedError
+
+    def has_open_work(self) -> bool:
+        """Masih ada task pending atau sedang di-lease (di node mana pun)"""
+        counts = self.counts()
+        return any(by_status.get(PENDING, 0) or by_status.get(LEASED, 0) for by_status in counts.values())
+
+    def close(self):
+        pass
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    Queue di satu SQLite file (shared filesystem / satu host dengan banyak process)
+
+    Lease diambil dalam transaksi BEGIN IMMEDIATE, jadi dua process tidak pernah
+    mendapat task yang sama. Lease yang habis langsung bisa di-lease ulang.
+
+    Default journal_mode=DELETE (rollback journal, hanya butuh file lock) supaya
+    file bisa di-share antar mesin lewat NFS / SMB dengan locking yang benar.
+    WAL memakai shared memory di satu host: hanya aman kalau semua process ada
+    di mesin yang sama.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id            INTEGER PRIMARY KEY,
+            kind          TEXT NOT NULL,
+            key           TEXT NOT NULL UNIQUE,
+            payload       TEXT NOT NULL,
+            status        TEXT NOT NULL,
+            worker        TEXT,
+            token         TEXT,
+            lease_expires REAL,
+            not_before    REAL,
+            attempts      INTEGER NOT NULL DEFAULT 0,
+            error         TEXT,
+            result        TEXT,
+            updated_at    REAL NOT NULL
+        )
+    """
+
+    def __init__(self, db_path: str, busy_timeout: float = 30.0, journal_mode: str = "DELETE"):
+        """
+        Args:
+            db_path: File SQLite (dibuat kalau belum ada)
+            busy_timeout: Detik menunggu lock dari process lain
+            journal_mode: "DELETE" / "TRUNCATE" (shared antar mesin) atau "WAL" (satu host saja)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=busy_timeout,
+                                     check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute(f"PRAGMA journal_mode={journal_mode}")
+            self._conn.execute(self.SCHEMA)
+            # Queue file dari versi tanpa backoff
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+            if 'not_before' not in columns:
+                self._conn.execute("ALTER TABLE tasks ADD COLUMN not_before REAL")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, kind)")
+
+    @staticmethod
+    def _task(row) -> Dict:
+        return {
+            "id": row['id'],
+            "kind": row['kind'],
+            "key": row['key'],
+            "payload": json.loads(row['payload']),
+            "attempts": row['attempts'],
+            "worker": row['worker'],
+            "token": row['token'],
+        }
+
+    def enqueue(self, kind: str, key: str, payload: Dict) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO tasks (kind, key, payload, status, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, key, json.dumps(payload, ensure_ascii=False), PENDING, time.time())
+            )
+        return cursor.rowcount > 0
+
+    def add_ref(self, key: str, ref: List) -> bool:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT payload FROM tasks WHERE key = ?", (key,)).fetchone()
+                payload = json.loads(row['payload']) if row else None
+                added = payload is not None and _append_ref(payload, ref)
+                if added:
+                    self._conn.execute("UPDATE tasks SET payload = ? WHERE key = ?",
+                                       (json.dumps(payload, ensure_ascii=False), key))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def lease(self, worker_id: str, lease_seconds: float, kinds: Optional[List[str]] = None) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = None
+                for kind in kinds or ["video", "channel"]:
+                    row = self._conn.execute(
+                        """
+                        SELECT * FROM tasks
+                        WHERE kind = ? AND ((status = ? AND (not_before IS NULL OR not_before <= ?))
+                                            OR (status = ? AND lease_expires < ?))
+                        ORDER BY id LIMIT 1
+                        """,
+                        (kind, PENDING, now, LEASED, now)
+                    ).fetchone()
+                    if row:
+                        break
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                if row['status'] == LEASED:
+                    logger.warning(f"Lease of {row['key']} held by {row['worker']} expired, re-queued")
+                token = uuid.uuid4().hex
+                self._conn.execute(
+                    """
+                    UPDATE tasks SET status = ?, worker = ?, token = ?, lease_expires = ?,
+                                     attempts = attempts + 1, updated_at = ?
+                    WHERE id = ?
+                    """,
+                    (LEASED, worker_id, token, now + lease_seconds, now, row['id'])
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        task = self._task(row)
+        task.update(worker=worker_id, token=token, attempts=row['attempts'] + 1)
+        return task
+
+    def _update_leased(self, task: Dict, sql: str, params: tuple) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                sql + " WHERE id = ? AND token = ? AND status = ?",
+                params + (task["id"], task["token"], LEASED)
+            )
+        return cursor.rowcount > 0
+
+    def heartbeat(self, task: Dict, lease_seconds: float) -> bool:
+        now = time.time()
+        return self._update_leased(task, "UPDATE tasks SET lease_expires = ?, updated_at = ?",
+                                   (now + lease_seconds, now))
+
+    def complete(self, task: Dict, result: Optional[Dict] = None) -> bool:
+        return self._update_leased(
+            task, "UPDATE tasks SET status = ?, lease_expires = NULL, error = NULL, result = ?, updated_at = ?",
+            (DONE, json.dumps(result, ensure_ascii=False) if result is not None else None, time.time()))
+
+    def fail(self, task: Dict, error: str, max_attempts: int = 3, backoff: float = RETRY_BACKOFF) -> bool:
+        now = time.time()
+        status = FAILED if task["attempts"] >= max_attempts else PENDING
+        not_before = now + retry_delay(task["attempts"], backoff) if status == PENDING else None
+        return self._update_leased(
+            task, "UPDATE tasks SET status = ?, lease_expires = NULL, not_before = ?, error = ?, updated_at = ?",
+            (status, not_before, error, now))
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT kind,
+                       CASE WHEN status = ? AND lease_expires < ? THEN ? ELSE status END AS state,
+                       COUNT(*)
+                FROM tasks GROUP BY kind, state
+                """,
+                (LEASED, time.time(), PENDING)
+            ).fetchall()
+        counts: Dict[str, Dict[str, int]] = {}
+        for kind, state, count in rows:
+            counts.setdefault(kind, {})[state] = counts.get(kind, {}).get(state, 0) + count
+        return counts
+
+    def close(self):
+        """Close SQLite connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class MemoryWorkQueue(WorkQueue):
+    """
+    In-memory stand-in dengan semantics yang sama (satu process, banyak thread):
+    untuk test, benchmark dan menjalankan worker loop tanpa shared file
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, Dict] = {}
+
+    def enqueue(self, kind: str, key: str, payload: Dict) -> bool:
+        with self._lock:
+            if key in self._tasks:
+                return False
+            self._tasks[key] = {"id": len(self._tasks) + 1, "kind": kind, "key": key, "payload": payload,
+                                "status": PENDING, "worker": None, "token": None,
+                                "lease_expires": None, "not_before": None, "attempts": 0,
+                                "error": None, "result": None}
+            return True
+
+    def add_ref(self, key: str, ref: List) -> bool:
+        with self._lock:
+            state = self._tasks.get(key)
+            return state is not None and _append_ref(state["payload"], ref)
+
+    def lease(self, worker_id: str, lease_seconds: float, kinds: Optional[List[str]] = None) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            for kind in kinds or ["video", "channel"]:
+                for state in self._tasks.values():
+                    if state["kind"] != kind:
+                        continue
+                    expired = state["status"] == LEASED and state["lease_expires"] < now
+                    ready = state["status"] == PENDING and (state["not_before"] or 0) <= now
+                    if ready or expired:
+                        if expired:
+                            logger.warning(f"Lease of {state['key']} held by {state['worker']} expired, re-queued")
+                        state.update(status=LEASED, worker=worker_id, token=uuid.uuid4().hex,
+                                     lease_expires=now + lease_seconds, attempts=state["attempts"] + 1)
+                        return {name: state[name] for name in
+                                ("id", "kind", "key", "payload", "attempts", "worker", "token")}
+        return None
+
+    def _leased_state(self, task: Dict) -> Optional[Dict]:
+        state = self._tasks.get(task["key"])
+        if state and state["status"] == LEASED and state["token"] == task["token"]:
+            return state
+        return None
+
+    def heartbeat(self, task: Dict, lease_seconds: float) -> bool:
+        with self._lock:
+            state = self._leased_state(task)
+            if state:
+                state["lease_expires"] = time.time() + lease_seconds
+            return state is not None
+
+    def complete(self, task: Dict, result: Optional[Dict] = None) -> bool:
+        with self._lock:
+            state = self._leased_state(task)
+            if state:
+                state.update(status=DONE, lease_expires=None, error=None, result=result)
+            return state is not None
+
+    def fail(self, task: Dict, error: str, max_attempts: int = 3, backoff: float = RETRY_BACKOFF) -> bool:
+        with self._lock:
+            state = self._leased_state(task)
+            if state:
+                retry = task["attempts"] < max_attempts
+                state.update(status=PENDING if retry else FAILED, lease_expires=None, error=error,
+                             not_before=time.time() + retry_delay(task["attempts"], backoff) if retry else None)
+            return state is not None
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        now = time.time()
+        counts: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            for state in self._tasks.values():
+                status = state["status"]
+                if status == LEASED and state["lease_expires"] < now:
+                    status = PENDING
+                by_status = counts.setdefault(state["kind"], {})
+                by_status[status] = by_status.get(status, 0) + 1
+        return counts
+
+
+# scheme -> factory(location); e.g. register_backend("redis", RedisWorkQueue)
+QUEUE_BACKENDS: Dict[str, Callable[[str], WorkQueue]] = {
+    "sqlite": SQLiteWorkQueue,
+    "memory": lambda location: MemoryWorkQueue(),
+}
+
+
+def register_backend(scheme: str, factory: Callable[[str], WorkQueue]):
+    """Daftarkan broker lain (factory menerima bagian URL setelah scheme://)"""
+    QUEUE_BACKENDS[scheme] = factory
+
+
+def open_queue(spec: str) -> WorkQueue:
+    """
+    Buka queue dari spec
+
+    Args:
+        spec: "sqlite:///shared/queue.sqlite", "memory://", atau path SQLite biasa
+
+    Returns:
+        WorkQueue
+    """
+    scheme, sep, location = spec.partition("://")
+    if not sep:
+        scheme, location = "sqlite", spec
+    if scheme not in QUEUE_BACKENDS:
+        raise ValueError(f"Unknown queue backend: {scheme} (available: {', '.join(QUEUE_BACKENDS)})")
+    return QUEUE_BACKENDS[scheme](location)
+
+
+class LeaseKeeper:
+    """
+    Satu heartbeat thread untuk semua lease yang dipegang process ini
+
+    Lease diperpanjang setiap lease_seconds / 3; task yang lease-nya hilang
+    (diambil worker lain setelah expired) di-log dan dilepas dari keeper.
+    """
+
+    def __init__(self, queue: WorkQueue, lease_seconds: float):
+        self.queue = queue
+        self.lease_seconds = lease_seconds
+        self._held: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="lease-heartbeat", daemon=True)
+        self._thread.start()
+
+    def add(self, task: Dict):
+        with self._lock:
+            self._held[task["token"]] = task
+
+    def remove(self, task: Dict):
+        with self._lock:
+            self._held.pop(task["token"], None)
+
+    def _loop(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._lock:
+                tasks = list(self._held.values())
+            for task in tasks:
+                try:
+                    alive = self.queue.heartbeat(task, self.lease_seconds)
+                except sqlite3.Error as e:
+                    logger.warning(f"Heartbeat for {task['key']} failed: {e}")
+                    continue
+                if not alive:
+                    logger.warning(f"Lost lease on {task['key']} (taken over by another worker)")
+                    self.remove(task)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
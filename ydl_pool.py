@@ -0,0 +1,100 @@
+"""
+Pool of Warm yt-dlp Instances
+Satu YoutubeDL per worker yang dipakai ulang antar video, supaya extractor init,
+cookie jar loading dan HTTP session setup tidak dibayar ulang setiap video
+"""
+
+import queue
+import threading
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    import yt_dlp
+
+logger = logging.getLogger(__name__)
+
+
+class YoutubeDLPool:
+    """
+    Thread-safe pool of long-lived yt_dlp.YoutubeDL instances
+
+    Instance dibuat on-demand (maksimal satu per worker yang aktif bersamaan)
+    dan dikembalikan ke pool setelah dipakai. Output template di-set per video
+    lewat `acquire(output_dir)`.
+    """
+
+    def __init__(self, opts_factory: Callable[[], dict], max_size: Optional[int] = None):
+        """
+        Args:
+            opts_factory: Function yang return yt-dlp options untuk instance baru
+            max_size: Maximum jumlah instance (None = sebanyak worker yang ada)
+        """
+        self.opts_factory = opts_factory
+        self.max_size = max_size
+        self._idle: "queue.LifoQueue[yt_dlp.YoutubeDL]" = queue.LifoQueue()
+        self._created = 0
+        self._all = []
+        self._lock = threading.Lock()
+
+    def _create(self) -> "yt_dlp.YoutubeDL":
+        # Lazy import: yt-dlp (~150ms) baru di-load untuk instance pertama
+        import yt_dlp
+
+        ydl = yt_dlp.YoutubeDL(self.opts_factory())
+        with self._lock:
+            self._created += 1
+            self._all.append(ydl)
+        logger.info(f"Created yt-dlp instance #{self._created}")
+        return ydl
+
+    def _checkout(self) -> "yt_dlp.YoutubeDL":
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self.max_size is None or self._created < self.max_size
+        if can_create:
+            return self._create()
+        return self._idle.get()
+
+    @contextmanager
+    def acquire(self, output_dir: Path, **params):
+        """
+        Pinjam satu instance dengan output template untuk output_dir
+
+        Args:
+            output_dir: Directory untuk file video ini
+            **params: Override yt-dlp params lain untuk video ini
+
+        Yields:
+            yt_dlp.YoutubeDL instance
+        """
+        ydl = self._checkout()
+        try:
+            ydl.params['outtmpl']['default'] = str(Path(output_dir) / '%(id)s.%(ext)s')
+            ydl.params.update(params)
+            yield ydl
+        finally:
+            self._idle.put(ydl)
+
+    @property
+    def size(self) -> int:
+        """Jumlah instance yang sudah dibuat"""
+        return self._created
+
+    def close(self):
+        """Close semua instance (save cookies, close HTTP connections)"""
+        with self._lock:
+            instances, self._all = self._all, []
+            self._idle = queue.LifoQueue()
+            self._created = 0
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception as e:
+                logger.warning(f"Error closing yt-dlp instance: {e}")
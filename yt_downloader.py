@@ -3,14 +3,29 @@ YouTube Audio Downloader dengan Rate Limiting & Sleep Interval
 Menggunakan yt-dlp untuk download audio dengan anti-ban mechanism
 """
 
-import yt_dlp
+import os
 import json
 import time
+import shutil
+import random
 import logging
+import threading
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Set
 import re
 
+from scheduler import HostRateLimiter
+from rate_controller import AIMDRateController, is_throttle_error
+from identity_pool import Identity, IdentityPool
+from dedup_store import DedupStore
+from tar_sink import TarShardSink
+from manifest import DownloadManifest, find_audio_file
+from channel_cache import ChannelListingCache
+from ydl_pool import YoutubeDLPool
+from transcode import TranscodePool, downmix_to_mono, resolve_channel_layout
+from audio_probe import ProbeError, probe_audio
+from metrics import MetricsRegistry
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -18,6 +33,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Uploads playlist channel (UU + channel_id[2:]): semua upload dalam satu list newest first
+UPLOADS_PLAYLIST_URL = "https://www.youtube.com/playlist?list=UU{}"
+_CHANNEL_ROOT_RE = re.compile(r'/channel/(UC[0-9A-Za-z_-]{22})/?(?:[?#].*)?$')
+_VIDEO_ID_RE = re.compile(r'[0-9A-Za-z_-]{11}')
+
 
 class YTDownloader:
     """
@@ -38,7 +58,17 @@ class YTDownloader:
         sleep_requests: int = 1,
         rate_limit: str = "500K",  # 500KB/s to avoid detection
         max_retries: int = 3,
-        cookies_file: Optional[str] = None
+        cookies_file: Optional[str] = None,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        manifest: Optional[DownloadManifest] = None,
+        channel_cache: Optional[ChannelListingCache] = None,
+        transcoder: Optional[TranscodePool] = None,
+        channel_layout: str = "auto",
+        rate_controller: Optional[AIMDRateController] = None,
+        identity_pool: Optional[IdentityPool] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        dedup_store: Optional[DedupStore] = None,
+        output_sink: Optional[TarShardSink] = None
     ):
         """
         Initialize YT Downloader
@@ -51,6 +81,29 @@ class YTDownloader:
             rate_limit: Download rate limit (e.g., "500K" = 500KB/s)
             max_retries: Maximum retry attempts untuk failed downloads
             cookies_file: Path ke cookies file dari browser (optional)
+            rate_limiter: Shared per-host token bucket (optional). Kalau diset,
+                menggantikan random sleep antara downloads
+            manifest: SQLite download manifest (optional). Video yang sudah
+                sukses langsung di-skip tanpa request ke YouTube
+            channel_cache: Cache listing per channel (optional). Listing berikutnya
+                berhenti paging di video yang sudah dikenal
+            transcoder: Transcode process pool (optional). Kalau diset, yt-dlp hanya
+                download ke staging dan konversi ffmpeg jalan di pool terpisah
+            channel_layout: "auto" = analisis audio (mono kecuali channel berisi
+                speaker terpisah), "mono" = selalu downmix, "keep" = tidak downmix
+            rate_controller: AIMD controller (optional). Kalau diset, rate_limit dan
+                sleep interval per video diambil dari controller dan disesuaikan
+                berdasarkan sukses / 403 / 429
+            identity_pool: Pool of cookies/headers (optional). Kalau diset, setiap video
+                memakai identity berikutnya (round-robin) dengan token bucket sendiri,
+                menggantikan cookies_file dan shared rate_limiter
+            metrics: Shared MetricsRegistry (optional). Latency per stage, bytes dan
+                throughput dicatat di sini; default registry baru milik downloader ini
+            dedup_store: Content-addressed audio store (optional). Video yang sudah
+                di-download untuk channel lain di-hardlink (atau direferensikan)
+                ke folder channel ini tanpa download ulang
+            output_sink: Tar shard sink (optional). Audio + {video_id}.json di-pack ke
+                shard setelah selesai dan folder per video dihapus; default folder layout
         """
         self.output_base_dir = Path(output_base_dir)
         self.output_base_dir.mkdir(exist_ok=True)
@@ -61,21 +114,122 @@ class YTDownloader:
         self.rate_limit = rate_limit
         self.max_retries = max_retries
         self.cookies_file = cookies_file
-
-        # Stats tracking
+        self.rate_limiter = rate_limiter
+        self.manifest = manifest
+        self.channel_cache = channel_cache
+        self.transcoder = transcoder
+        self.channel_layout = channel_layout
+        self.rate_controller = rate_controller
+        self.identity_pool = identity_pool
+        self.dedup_store = dedup_store
+        self.output_sink = output_sink
+
+        # Warm yt-dlp instances, dipakai ulang antar video (1 per worker)
+        self.ydl_pool = YoutubeDLPool(lambda: self._get_ydl_opts(self.output_base_dir))
+        # Dengan identity pool: satu YoutubeDLPool per identity (cookie jar terpisah)
+        self._identity_ydl_pools: Dict[str, YoutubeDLPool] = {}
+        self._identity_lock = threading.Lock()
+
+        # Stats tracking (di-update dari beberapa worker thread)
         self.stats = {
             "total_videos": 0,
             "successful": 0,
             "failed": 0,
-            "skipped": 0
+            "skipped": 0,
+            "deduplicated": 0
         }
+        self._stats_lock = threading.Lock()
+
+        # Metrics per stage: listing, rate_wait, extract, transfer, postprocess,
+        # channel_layout, transcode, metadata, archive
+        self.metrics = metrics or MetricsRegistry()
+        self._stage_seconds = self.metrics.histogram(
+            "ytdl_stage_seconds", "Time spent per pipeline stage")
+        self._videos_total = self.metrics.counter(
+            "ytdl_videos_total", "Videos finished by status")
+        self._downloaded_bytes = self.metrics.counter(
+            "ytdl_downloaded_bytes_total", "Bytes transferred by yt-dlp")
+        self._audio_bytes = self.metrics.counter(
+            "ytdl_audio_bytes_total", "Bytes of final audio files written")
+        self._throughput = self.metrics.gauge(
+            "ytdl_transfer_bytes_per_second", "Transfer throughput of the last finished download")
+        self._in_flight = self.metrics.gauge(
+            "ytdl_downloads_in_flight", "yt-dlp downloads currently running")
+        self._rate_gauge = self.metrics.gauge(
+            "ytdl_rate_limit_bytes_per_second", "Current per-download rate limit")
+        # Progress hook marks per video_id: start / end transfer dan bytes
+        self._transfers: Dict[str, Dict] = {}
+
+    def _bump_stat(self, key: str, amount: int = 1):
+        """Increment stats counter secara thread-safe"""
+        with self._stats_lock:
+            self.stats[key] += amount
+        if key != "total_videos":
+            self._videos_total.inc(amount, status=key)
+
+    def _on_progress(self, progress: dict):
+        """
+        yt-dlp progress hook: tandai awal/akhir transfer per video, supaya waktu
+        extract_info bisa dipecah menjadi extract, transfer dan postprocess
+        """
+        video_id = (progress.get('info_dict') or {}).get('id')
+        if not video_id:
+            return
+        now = time.perf_counter()
+        with self._stats_lock:
+            marks = self._transfers.setdefault(video_id, {"bytes": 0})
+            if progress['status'] == 'downloading':
+                marks.setdefault('start', now)
+            elif progress['status'] == 'finished':
+                marks.setdefault('start', now - (progress.get('elapsed') or 0))
+                marks['end'] = now
+                marks['bytes'] += progress.get('total_bytes') or progress.get('downloaded_bytes') or 0
+
+    def _record_transfer(self, video_id: str, started: float):
+        """
+        Observe stage extract / transfer / postprocess untuk satu extract_info call
 
-    def _get_ydl_opts(self, output_dir: Path) -> dict:
+        Args:
+            video_id: YouTube video ID
+            started: perf_counter() sebelum extract_info
+        """
+        ended = time.perf_counter()
+        with self._stats_lock:
+            marks = self._transfers.pop(video_id, {})
+        if 'start' not in marks:
+            # Tidak ada progress (gagal sebelum transfer): semua waktu = extract
+            self._stage_seconds.observe(ended - started, stage="extract")
+            return
+
+        transfer_end = marks.get('end', ended)
+        transfer = transfer_end - marks['start']
+        self._stage_seconds.observe(max(0.0, marks["start"] - started), stage="extract")
+        self._stage_seconds.observe(transfer, stage="transfer")
+        if 'end' in marks:
+            self._stage_seconds.observe(ended - marks['end'], stage="postprocess")
+        if marks['bytes']:
+            self._downloaded_bytes.inc(marks['bytes'])
+            if transfer > 0:
+                self._throughput.set(marks['bytes'] / transfer)
+
+    @staticmethod
+    def _parse_rate(rate_limit) -> Optional[int]:
+        """Convert "500K" / "1.5M" ke bytes/detik (yt-dlp butuh angka)"""
+        if rate_limit is None or isinstance(rate_limit, (int, float)):
+            return rate_limit
+        from yt_dlp.utils import parse_bytes
+        parsed = parse_bytes(str(rate_limit))
+        if parsed is None:
+            raise ValueError(f"Invalid rate limit: {rate_limit}")
+        return parsed
+
+    def _get_ydl_opts(self, output_dir: Path, identity: Optional[Identity] = None) -> dict:
         """
         Get yt-dlp options dengan rate limiting configuration
 
         Args:
             output_dir: Directory untuk output file
+            identity: Identity (cookies + headers) dari identity pool (optional)
 
         Returns:
             Dictionary of yt-dlp options
@@ -95,10 +249,7 @@ class YTDownloader:
             'audio_quality': 0,  # Best quality
 
             # Rate limiting (PENTING untuk avoid ban!)
-            'sleep_interval': self.sleep_interval,
-            'max_sleep_interval': self.max_sleep_interval,
-            'sleep_interval_requests': self.sleep_requests,
-            'ratelimit': self.rate_limit,
+            'ratelimit': self._parse_rate(self.rate_limit),
 
             # Retry configuration
             'retries': self.max_retries,
@@ -117,7 +268,8 @@ class YTDownloader:
             'writesubtitles': False,  # Skip subtitles untuk avoid extra requests
 
             # Postprocessing: convert to preferred format
-            'postprocessors': [{
+            # (kosong kalau konversi dikerjakan oleh transcode pool)
+            'postprocessors': [] if self.transcoder else [{
                 'key': 'FFmpegExtractAudio',
                 'preferredcodec': 'wav',  # Convert to WAV if possible
                 'preferredquality': '0',   # Best quality
@@ -125,17 +277,45 @@ class YTDownloader:
                 'key': 'FFmpegMetadata',  # Embed metadata
             }],
 
+            # Metrics: timing transfer per video
+            'progress_hooks': [self._on_progress],
+
             # User agent
             'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         }
 
+        # Sleep antar request dari yt-dlp hanya kalau tidak ada token bucket
+        # (rate_limiter / identity_pool sudah mengatur jarak antar request)
+        if not (self.rate_limiter or self.identity_pool):
+            opts.update({
+                'sleep_interval': self.sleep_interval,
+                'max_sleep_interval': self.max_sleep_interval,
+                'sleep_interval_requests': self.sleep_requests,
+            })
+
         # Add cookies if provided
-        if self.cookies_file and Path(self.cookies_file).exists():
-            opts['cookiefile'] = self.cookies_file
-            logger.info(f"Using cookies from: {self.cookies_file}")
+        cookies_file = identity.cookies_file if identity else self.cookies_file
+        if cookies_file and Path(cookies_file).exists():
+            opts['cookiefile'] = cookies_file
+            logger.info(f"Using cookies from: {cookies_file}")
+        if identity and identity.headers:
+            opts['http_headers'] = dict(identity.headers)
+            if 'User-Agent' in identity.headers:
+                opts['user_agent'] = identity.headers['User-Agent']
 
         return opts
 
+    def _ydl_pool_for(self, identity: Optional[Identity]) -> YoutubeDLPool:
+        """YoutubeDLPool untuk identity (default pool kalau tanpa identity)"""
+        if identity is None:
+            return self.ydl_pool
+        with self._identity_lock:
+            pool = self._identity_ydl_pools.get(identity.name)
+            if pool is None:
+                pool = YoutubeDLPool(lambda: self._get_ydl_opts(self.output_base_dir, identity))
+                self._identity_ydl_pools[identity.name] = pool
+            return pool
+
     def _extract_video_id(self, url: str) -> Optional[str]:
         """Extract video ID from YouTube URL"""
         patterns = [
@@ -150,19 +330,108 @@ class YTDownloader:
                 return match.group(1)
         return None
 
-    def get_channel_videos(self, channel_url: str, max_videos: Optional[int] = None) -> List[str]:
+    def _iter_channel_entries(self, ydl, channel_url: str, max_redirects: int = 3):
+        """
+        Iterate flat playlist entries secara lazy (page berikutnya baru di-fetch
+        ketika dibutuhkan), jadi caller bisa berhenti kapan saja
+
+        Args:
+            ydl: yt_dlp.YoutubeDL instance
+            channel_url: YouTube channel URL
+
+        Yields:
+            Flat entry dicts (minimal berisi 'id')
+        """
+        # Channel root tanpa tab: yt-dlp mengembalikan satu playlist per tab (Videos,
+        # Live, Shorts) dengan id = channel id, dan gabungan tab tidak newest first.
+        # Uploads playlist berisi semua upload dalam satu urutan newest first.
+        match = _CHANNEL_ROOT_RE.search(channel_url)
+        if match:
+            channel_url = UPLOADS_PLAYLIST_URL.format(match.group(1)[2:])
+
+        # process=False: entries dikembalikan sebagai generator dari extractor,
+        # bukan list yang sudah di-resolve semua
+        result = ydl.extract_info(channel_url, download=False, process=False)
+        for _ in range(max_redirects):
+            if not result or result.get('_type') not in ('url', 'url_transparent'):
+                break
+            result = ydl.extract_info(result['url'], download=False, process=False)
+
+        if not result or 'entries' not in result:
+            return
+
+        for entry in result['entries']:
+            if not entry or 'id' not in entry:
+                continue
+            if entry.get('_type') == 'playlist' or entry.get('ie_key') == 'YoutubeTab':
+                # Listing per tab (e.g. /@handle): pindah ke uploads playlist channel
+                channel_id = result.get('channel_id') or result.get('id') or ''
+                if not channel_id.startswith('UC') or max_redirects <= 0:
+                    logger.warning(f"Channel listing returned tabs without a channel id: {channel_url}")
+                    return
+                yield from self._iter_channel_entries(
+                    ydl, UPLOADS_PLAYLIST_URL.format(channel_id[2:]), max_redirects - 1)
+                return
+            yield entry
+
+    def get_channel_videos(
+        self,
+        channel_url: str,
+        max_videos: Optional[int] = None,
+        refresh: bool = False
+    ) -> List[str]:
         """
         Get all video URLs from a YouTube channel
 
         Args:
             channel_url: YouTube channel URL
             max_videos: Maximum number of videos to fetch (None = all)
+            refresh: Abaikan cache dan lakukan full listing
 
         Returns:
             List of video URLs
         """
+        entries = self.get_channel_entries(channel_url, max_videos, refresh)
+        return [entry["video_url"] for entry in entries]
+
+    def get_channel_entries(
+        self,
+        channel_url: str,
+        max_videos: Optional[int] = None,
+        refresh: bool = False
+    ) -> List[Dict]:
+        """
+        Listing channel beserta durasi dari flat playlist entries (tanpa request per video)
+
+        Kalau channel_cache diset, listing berhenti paging begitu ketemu video ID
+        yang sudah ada di cache (channel listing = newest first), lalu digabung
+        dengan ID list + durasi dari cache.
+
+        Args:
+            channel_url: YouTube channel URL
+            max_videos: Maximum number of videos to fetch (None = all)
+            refresh: Abaikan cache dan lakukan full listing
+
+        Returns:
+            List {"video_id", "video_url", "duration"} (duration dalam detik, None kalau
+            tidak ada di listing, e.g. live / premiere), urutan listing
+        """
         logger.info(f"Fetching videos from channel: {channel_url}")
 
+        cached = None
+        if self.channel_cache and not refresh:
+            cached = self.channel_cache.load(channel_url)
+            # Cache format lama belum punya durasi: full listing sekali
+            if cached and 'durations' not in cached:
+                logger.info(f"Channel cache without durations, doing a full listing: {channel_url}")
+                cached = None
+            # Cache dari listing per tab bisa berisi channel id sebagai "video": full listing sekali
+            elif cached and not all(_VIDEO_ID_RE.fullmatch(vid) for vid in cached['video_ids']):
+                logger.info(f"Channel cache with non-video entries, doing a full listing: {channel_url}")
+                cached = None
+        known_ids = set(cached['video_ids']) if cached else set()
+        durations = dict(cached['durations']) if cached else {}
+
         ydl_opts = {
             'quiet': True,
             'extract_flat': True,  # Don't download, just get URLs
@@ -170,108 +439,476 @@ class YTDownloader:
             'ignoreerrors': True,
         }
 
-        if self.cookies_file and Path(self.cookies_file).exists():
-            ydl_opts['cookiefile'] = self.cookies_file
-
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                result = ydl.extract_info(channel_url, download=False)
-
-                if 'entries' not in result:
-                    logger.warning(f"No videos found in channel: {channel_url}")
-                    return []
-
-                # Extract video URLs
-                video_urls = []
-                for entry in result['entries']:
-                    if entry and 'id' in entry:
-                        video_id = entry['id']
-                        video_url = f"https://www.youtube.com/watch?v={video_id}"
-                        video_urls.append(video_url)
+        cookies_file = self.cookies_file
+        if self.identity_pool:
+            cookies_file = self.identity_pool.acquire().cookies_file
+        if cookies_file and Path(cookies_file).exists():
+            ydl_opts['cookiefile'] = cookies_file
 
-                        if max_videos and len(video_urls) >= max_videos:
-                            break
+        # yt-dlp baru di-import saat benar-benar dipakai (CLI --help / arg error tetap cepat)
+        import yt_dlp
 
-                logger.info(f"Found {len(video_urls)} videos in channel")
-                return video_urls
+        try:
+            with self._stage_seconds.time(stage="listing"), yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                new_ids = []
+                reached_known = False
+                truncated = False
+                for entry in self._iter_channel_entries(ydl, channel_url):
+                    video_id = entry['id']
+                    if video_id in known_ids:
+                        reached_known = True
+                        break
+                    if video_id not in new_ids:
+                        new_ids.append(video_id)
+                    if entry.get('duration') is not None:
+                        durations[video_id] = entry['duration']
+
+                    # Tanpa cache: berhenti di max_videos seperti sebelumnya
+                    if not cached and max_videos and len(new_ids) >= max_videos:
+                        truncated = True
+                        break
 
         except Exception as e:
             logger.error(f"Error fetching channel videos: {e}")
+            if not cached:
+                return []
+            logger.warning(f"Using cached listing for channel: {channel_url}")
+            new_ids, reached_known, truncated = [], True, False
+
+        if cached:
+            logger.info(f"Channel listing: {len(new_ids)} new videos "
+                        f"(stopped at known video: {reached_known}), {len(known_ids)} cached")
+            new_id_set = set(new_ids)
+            video_ids = new_ids + [vid for vid in cached['video_ids'] if vid not in new_id_set]
+        else:
+            video_ids = new_ids
+
+        # Simpan hanya listing yang lengkap (bukan yang dipotong max_videos)
+        if self.channel_cache and video_ids and not truncated:
+            self.channel_cache.save(channel_url, video_ids,
+                                    {vid: durations[vid] for vid in video_ids if vid in durations})
+
+        if not video_ids:
+            logger.warning(f"No videos found in channel: {channel_url}")
             return []
 
-    def download_video_audio(self, video_url: str, channel_name: str = "unknown") -> Dict:
+        if max_videos:
+            video_ids = video_ids[:max_videos]
+
+        entries = [
+            {"video_id": video_id, "video_url": f"https://www.youtube.com/watch?v={video_id}",
+             "duration": durations.get(video_id)}
+            for video_id in video_ids
+        ]
+        logger.info(f"Found {len(entries)} videos in channel")
+        return entries
+
+    def download_video_audio(
+        self,
+        video_url: str,
+        channel_name: str = "unknown",
+        on_result: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
         """
         Download audio from a single video dengan metadata
 
         Args:
             video_url: YouTube video URL
             channel_name: Channel name for organizing folders
+            on_result: Callback(result) yang dipanggil sekali ketika status video final
+                (success / failed / skipped). Dengan transcode pool dipanggil dari
+                thread callback setelah konversi selesai.
 
         Returns:
             Dictionary with download results
         """
+        def emit(result: Dict) -> Dict:
+            if on_result:
+                on_result(result)
+            return result
+
         video_id = self._extract_video_id(video_url)
         if not video_id:
             logger.error(f"Could not extract video ID from: {video_url}")
-            return {
+            return emit({
                 "video_url": video_url,
                 "status": "failed",
                 "error": "Invalid video URL"
-            }
+            })
+
+        # Video yang sudah ada di store (channel lain / run sebelumnya): link, tanpa network
+        if self.dedup_store:
+            result = self._dedup_result(video_url, video_id, channel_name)
+            if result:
+                return emit(result)
+
+        # Skip video yang sudah selesai (O(1) lookup, tanpa network)
+        if self.manifest and self.manifest.is_complete(video_id):
+            entry = self.manifest.get(video_id)
+            logger.info(f"↷ Skipping {video_id}: already downloaded ({entry['output_path']})")
+            self._bump_stat("skipped")
+            return emit({
+                "video_url": video_url,
+                "video_id": video_id,
+                "channel_name": channel_name,
+                "status": "skipped",
+                "output_path": entry['output_path']
+            })
+
+        # Video yang sama sedang di-download worker lain (channel lain): tunggu lalu link.
+        # Klaim dilepas di _finish_download / _fail_download
+        if self.dedup_store:
+            while not self.dedup_store.claim(video_id):
+                result = self._dedup_result(video_url, video_id, channel_name)
+                if result:
+                    return emit(result)
+                # Object hilang setelah claim() melihatnya: klaim lagi, lalu download biasa
+
+        # Semua setelah klaim ada di dalam try: error di mkdir / rate wait tetap melepas klaim
+        try:
+            # Create output directory: downloads/{channel_name}/{video_id}/
+            video_output_dir = self.output_base_dir / channel_name / video_id
+            video_output_dir.mkdir(parents=True, exist_ok=True)
+
+            # Identity pool: token bucket per identity; tanpa pool: shared bucket per host
+            identity = None
+            if self.identity_pool:
+                identity, wait = self.identity_pool.checkout()
+                if wait > 0:
+                    logger.info(f"Waiting {wait:.1f} seconds for identity {identity.name}")
+                    time.sleep(wait)
+                self._stage_seconds.observe(max(0.0, wait), stage="rate_wait")
+            elif self.rate_limiter:
+                waited = self.rate_limiter.acquire(video_url)
+                if waited > 0:
+                    logger.info(f"Waited {waited:.1f} seconds for rate limiter token")
+                self._stage_seconds.observe(waited, stage="rate_wait")
+
+            logger.info(f"Downloading: {video_id} from channel: {channel_name}")
+            logger.info(f"Output directory: {video_output_dir}")
+
+            # Dengan transcode pool: yt-dlp hanya download (tanpa ffmpeg) ke staging
+            download_dir = video_output_dir
+            if self.transcoder:
+                download_dir = self.output_base_dir / ".staging" / video_id
+                download_dir.mkdir(parents=True, exist_ok=True)
+
+            # Adaptive rate: ratelimit dan sleep untuk video ini dari AIMD controller
+            params = self.rate_controller.ydl_params() if self.rate_controller else {}
+            if params:
+                self._rate_gauge.set(params['ratelimit'])
+                if self.rate_limiter or self.identity_pool:
+                    # Sleep sudah lewat bucket (controller men-set rate bucket), bukan yt-dlp
+                    params = {'ratelimit': params['ratelimit']}
+
+            started = time.perf_counter()
+            self._in_flight.inc()
+            try:
+                with self._ydl_pool_for(identity).acquire(download_dir, **params) as ydl:
+                    # Download video
+                    info = ydl.extract_info(video_url, download=True)
+            except Exception as e:
+                if self.rate_controller:
+                    self.rate_controller.on_error(video_url, e)
+                if identity:
+                    self.identity_pool.report_failure(identity, throttled=is_throttle_error(e))
+                raise
+            finally:
+                self._in_flight.dec()
+                self._record_transfer(video_id, started)
+
+            if not info:
+                raise Exception("No info returned from yt-dlp")
+            if self.rate_controller:
+                self.rate_controller.on_success(video_url)
+            if identity:
+                self.identity_pool.report_success(identity)
+
+            # Save enhanced metadata
+            metadata = self._extract_metadata(info, channel_name, video_url)
+
+            if self.transcoder:
+                return self._queue_transcode(info, metadata, video_url, video_id,
+                                             channel_name, download_dir, video_output_dir,
+                                             on_result)
+
+            with self._stage_seconds.time(stage="channel_layout"):
+                self._apply_channel_layout(video_output_dir, video_id, metadata)
+            result = self._finish_download(video_url, video_id, channel_name, video_output_dir, metadata)
 
-        # Create output directory: downloads/{channel_name}/{video_id}/
-        video_output_dir = self.output_base_dir / channel_name / video_id
-        video_output_dir.mkdir(parents=True, exist_ok=True)
+        except Exception as e:
+            result = self._fail_download(video_url, video_id, channel_name, e)
+        except BaseException:
+            # KeyboardInterrupt / SystemExit: worker lain yang menunggu klaim jangan sampai hang
+            if self.dedup_store:
+                self.dedup_store.release(video_id)
+            raise
 
-        logger.info(f"Downloading: {video_id} from channel: {channel_name}")
-        logger.info(f"Output directory: {video_output_dir}")
+        return emit(result)
 
-        try:
-            ydl_opts = self._get_ydl_opts(video_output_dir)
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # Download video
-                info = ydl.extract_info(video_url, download=True)
-
-                # Get downloaded file path
-                if info:
-                    # Save enhanced metadata
-                    metadata = self._extract_metadata(info, channel_name, video_url)
-                    metadata_file = video_output_dir / f"{video_id}.json"
-
-                    with open(metadata_file, 'w', encoding='utf-8') as f:
-                        json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-                    logger.info(f"✓ Successfully downloaded: {video_id}")
-                    logger.info(f"  - Audio file: {video_output_dir}")
-                    logger.info(f"  - Metadata: {metadata_file}")
-
-                    self.stats["successful"] += 1
-
-                    return {
-                        "video_url": video_url,
-                        "video_id": video_id,
-                        "channel_name": channel_name,
-                        "status": "success",
-                        "output_dir": str(video_output_dir),
-                        "metadata_file": str(metadata_file),
-                        "metadata": metadata
-                    }
-                else:
-                    raise Exception("No info returned from yt-dlp")
+    def _dedup_result(self, video_url: str, video_id: str, channel_name: str) -> Optional[Dict]:
+        """
+        Result untuk video yang audio-nya sudah ada di dedup store
 
-        except Exception as e:
-            logger.error(f"✗ Failed to download {video_id}: {e}")
-            self.stats["failed"] += 1
+        Download dari sebelum store dipakai (ada di manifest, belum di store) di-ingest
+        dulu. Folder channel yang sudah punya file-nya -> skipped; channel lain ->
+        hardlink / reference + metadata JSON dari download pertama.
 
+        Returns:
+            Dictionary with results, atau None kalau video harus di-download
+        """
+        entry = self.dedup_store.lookup(video_id)
+        if entry is None and self.manifest and self.manifest.is_complete(video_id):
+            manifest_entry = self.manifest.get(video_id)
+            output_path = Path(manifest_entry['output_path'])
+            entry = self.dedup_store.ingest(video_id, manifest_entry['channel_name'] or channel_name,
+                                            output_path)
+        if entry is None:
+            return None
+
+        ref = self.dedup_store.get_ref(video_id, channel_name)
+        if ref:
+            logger.info(f"↷ Skipping {video_id}: already downloaded ({ref['path']})")
+            self._bump_stat("skipped")
             return {
                 "video_url": video_url,
                 "video_id": video_id,
                 "channel_name": channel_name,
-                "status": "failed",
-                "error": str(e)
+                "status": "skipped",
+                "output_path": ref['path']
             }
 
+        video_output_dir = self.output_base_dir / channel_name / video_id
+        video_output_dir.mkdir(parents=True, exist_ok=True)
+        link = self.dedup_store.materialize(video_id, channel_name, video_output_dir)
+
+        # Metadata dari download pertama, dengan channel dan link info untuk channel ini
+        source_metadata = Path(entry['source_dir']) / f"{video_id}.json"
+        metadata = {"video_id": video_id, "original_url": video_url}
+        if source_metadata.exists():
+            with open(source_metadata, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        metadata["channel_name"] = channel_name
+        metadata["dedup"] = {
+            "kind": link["kind"],
+            "sha256": link["sha256"],
+            "object": link["object"],
+            "source_dir": entry['source_dir'],
+        }
+        metadata_file = video_output_dir / f"{video_id}.json"
+        with open(metadata_file, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+        logger.info(f"⧉ Deduplicated {video_id}: {link['kind']} to {link['object']}")
+        self._bump_stat("deduplicated")
+
+        return {
+            "video_url": video_url,
+            "video_id": video_id,
+            "channel_name": channel_name,
+            "status": "success",
+            "output_dir": str(video_output_dir),
+            "audio_file": str(link["path"]),
+            "metadata_file": str(metadata_file),
+            "metadata": metadata,
+            "dedup": link["kind"]
+        }
+
+    def _finish_download(
+        self,
+        video_url: str,
+        video_id: str,
+        channel_name: str,
+        video_output_dir: Path,
+        metadata: dict
+    ) -> Dict:
+        """
+        Tulis {video_id}.json, record ke manifest, dan build success result
+
+        Returns:
+            Dictionary with download results
+        """
+        started = time.perf_counter()
+        metadata_file = video_output_dir / f"{video_id}.json"
+        audio_file = find_audio_file(video_output_dir, video_id)
+
+        # audio_metadata dari yt-dlp menggambarkan source stream; timpa dengan
+        # nilai dari header file yang benar-benar ada di disk
+        if audio_file:
+            try:
+                metadata["audio_metadata"].update(probe_audio(audio_file))
+            except (ProbeError, OSError) as e:
+                logger.warning(f"Could not probe {audio_file.name}: {e}")
+                metadata["audio_metadata"]["file_size"] = audio_file.stat().st_size
+
+        with open(metadata_file, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+        checksum = None
+        if self.dedup_store:
+            if audio_file:
+                checksum = self.dedup_store.ingest(video_id, channel_name, audio_file)["sha256"]
+            self.dedup_store.release(video_id)
+        if self.manifest and audio_file:
+            self.manifest.record_file(video_id, channel_name, audio_file, checksum=checksum)
+        self._stage_seconds.observe(time.perf_counter() - started, stage="metadata")
+        if metadata["audio_metadata"].get("file_size"):
+            self._audio_bytes.inc(metadata["audio_metadata"]["file_size"])
+
+        result = {
+            "video_url": video_url,
+            "video_id": video_id,
+            "channel_name": channel_name,
+            "status": "success",
+            "output_dir": str(video_output_dir),
+            "audio_file": str(audio_file) if audio_file else None,
+            "metadata_file": str(metadata_file),
+            "metadata": metadata
+        }
+
+        # Tar output: pack ke shard, folder per video dihapus; manifest menunjuk ke shard
+        if self.output_sink and audio_file:
+            with self._stage_seconds.time(stage="archive"):
+                archive = self.output_sink.add_video_dir(video_output_dir, video_id, channel_name, audio_file)
+            if self.manifest:
+                self.manifest.record(video_id, status='success', output_path=archive["shard"])
+            result.update(output_dir=None, audio_file=None, metadata_file=None, archive=archive)
+            logger.info(f"✓ Successfully downloaded: {video_id}")
+            logger.info(f"  - Archived: {archive['shard']} ({archive['key']})")
+        else:
+            logger.info(f"✓ Successfully downloaded: {video_id}")
+            logger.info(f"  - Audio file: {video_output_dir}")
+            logger.info(f"  - Metadata: {metadata_file}")
+
+        self._bump_stat("successful")
+        return result
+
+    def _apply_channel_layout(self, video_output_dir: Path, video_id: str, metadata: dict):
+        """
+        Analisis channel layout hasil download inline dan downmix ke mono kalau perlu.
+        Keputusan ditulis ke metadata["channel_layout"].
+
+        Args:
+            video_output_dir: Folder video
+            video_id: YouTube video ID
+            metadata: Metadata dict (di-update in-place)
+        """
+        audio_file = find_audio_file(video_output_dir, video_id)
+        if not audio_file:
+            return
+
+        audio_metadata = metadata["audio_metadata"]
+        try:
+            layout = resolve_channel_layout(str(audio_file), self.channel_layout,
+                                            source_channels=audio_metadata.get("channels"))
+        except Exception as e:
+            logger.warning(f"Channel layout analysis failed for {video_id}: {e}")
+            return
+
+        metadata["channel_layout"] = layout
+        channels = layout.get("channels") or audio_metadata.get("channels")
+        logger.info(f"  - Channel layout: {layout['decision']} ({layout['reason']})")
+
+        if layout["decision"] == "mono" and channels and channels > 1:
+            try:
+                downmix_to_mono(str(audio_file))
+                audio_metadata["channels"] = 1
+            except Exception as e:
+                logger.warning(f"Mono downmix failed for {video_id}: {e}")
+
+    def _fail_download(self, video_url: str, video_id: str, channel_name: str, error: Exception) -> Dict:
+        """Log, count dan record failed download"""
+        logger.error(f"✗ Failed to download {video_id}: {error}")
+        self._bump_stat("failed")
+        if self.dedup_store:
+            self.dedup_store.release(video_id)
+        if self.manifest:
+            self.manifest.record(video_id, status='failed', channel_name=channel_name, error=str(error))
+
+        return {
+            "video_url": video_url,
+            "video_id": video_id,
+            "channel_name": channel_name,
+            "status": "failed",
+            "error": str(error)
+        }
+
+    def _queue_transcode(
+        self,
+        info: dict,
+        metadata: dict,
+        video_url: str,
+        video_id: str,
+        channel_name: str,
+        staging_dir: Path,
+        video_output_dir: Path,
+        on_result: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Serahkan file hasil download ke transcode pool
+
+        Result dict yang di-return berstatus "transcoding" dan di-update in-place
+        (success/failed) oleh callback ketika konversi selesai; setelah itu
+        on_result dipanggil dengan result final.
+
+        Returns:
+            Dictionary with download results (status: transcoding)
+        """
+        source_file = find_audio_file(staging_dir, video_id)
+        if not source_file:
+            raise Exception(f"Downloaded file not found in staging: {staging_dir}")
+
+        # yt-dlp info json langsung ke folder final
+        info_json = staging_dir / f"{video_id}.info.json"
+        if info_json.exists():
+            os.replace(info_json, video_output_dir / info_json.name)
+
+        result = {
+            "video_url": video_url,
+            "video_id": video_id,
+            "channel_name": channel_name,
+            "status": "transcoding",
+            "output_dir": str(video_output_dir)
+        }
+
+        def on_transcoded(future):
+            try:
+                output = future.result()
+                self._stage_seconds.observe(output["seconds"], stage="transcode")
+                metadata["channel_layout"] = output["channel_layout"]
+                metadata["audio_metadata"].update({
+                    "codec": output["codec"],
+                    "sample_rate": output["sample_rate"] or metadata["audio_metadata"]["sample_rate"],
+                    "channels": output["channels"] or metadata["audio_metadata"]["channels"],
+                    "format": output["format"],
+                    "file_size": output["file_size"],
+                })
+                result.update(self._finish_download(video_url, video_id, channel_name,
+                                                    video_output_dir, metadata))
+            except Exception as e:
+                result.update(self._fail_download(video_url, video_id, channel_name, e))
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            if on_result:
+                on_result(result)
+
+        logger.info(f"↪ Downloaded {video_id}, queued for transcoding")
+        self.transcoder.submit(
+            source_file,
+            video_output_dir,
+            video_id,
+            source_sample_rate=info.get('asr'),
+            source_channels=info.get('audio_channels'),
+            tags={
+                "title": info.get('title'),
+                "artist": info.get('uploader'),
+                "date": info.get('upload_date'),
+                "comment": video_url,
+            },
+            callback=on_transcoded
+        )
+        return result
+
     def _extract_metadata(self, info: dict, channel_name: str, video_url: str) -> dict:
         """
         Extract and format metadata dari yt-dlp info
@@ -318,7 +955,10 @@ class YTDownloader:
         self,
         channel_url: str,
         channel_name: str,
-        max_videos: Optional[int] = None
+        max_videos: Optional[int] = None,
+        on_result: Optional[Callable[[Dict], None]] = None,
+        skip_ids: Optional[Set[str]] = None,
+        summary: Optional[Dict[str, int]] = None
     ) -> List[Dict]:
         """
         Download semua video dari sebuah channel
@@ -327,9 +967,14 @@ class YTDownloader:
             channel_url: YouTube channel URL
             channel_name: Channel name for organizing
             max_videos: Maximum videos to download (None = all)
+            on_result: Callback(result) per video ketika statusnya final
+                (e.g., append ke ResultJournal)
+            skip_ids: Video ID yang sudah selesai di run sebelumnya (resume);
+                tidak di-download dan tidak menghasilkan result baru
+            summary: Counter per status (optional), lihat download_videos
 
         Returns:
-            List of download results
+            List of download results (kosong kalau summary diberikan)
         """
         logger.info(f"="*60)
         logger.info(f"Processing channel: {channel_name}")
@@ -343,27 +988,107 @@ class YTDownloader:
             logger.warning(f"No videos found for channel: {channel_name}")
             return []
 
+        if skip_ids:
+            pending = [url for url in video_urls if self._extract_video_id(url) not in skip_ids]
+            logger.info(f"Resume: {len(video_urls) - len(pending)} videos already done, "
+                        f"{len(pending)} left")
+            video_urls = pending
+
         logger.info(f"Found {len(video_urls)} videos to download")
+        return self.download_videos(video_urls, channel_name, on_result=on_result, summary=summary)
 
-        results = []
-        self.stats["total_videos"] += len(video_urls)
+    def download_videos(
+        self,
+        video_urls: List[str],
+        channel_name: str,
+        on_result: Optional[Callable[[Dict], None]] = None,
+        summary: Optional[Dict[str, int]] = None
+    ) -> List[Dict]:
+        """
+        Download list video secara berurutan (dengan sleep / rate limiter)
 
-        for idx, video_url in enumerate(video_urls, 1):
-            logger.info(f"\n--- Video {idx}/{len(video_urls)} ---")
+        Args:
+            video_urls: YouTube video URLs
+            channel_name: Channel name for organizing
+            on_result: Callback(result) per video ketika statusnya final
+            summary: Counter per status (optional). Kalau diberikan, result tidak
+                disimpan (hanya di-stream lewat on_result) dan hanya jumlah per status
+                yang di-update, jadi memory tidak tumbuh dengan jumlah video. Status
+                dihitung saat final (dengan transcode pool: setelah konversi selesai)
 
-            result = self.download_video_audio(video_url, channel_name)
-            results.append(result)
+        Returns:
+            List of download results (kosong kalau summary diberikan)
+        """
+        results = []
+        self._bump_stat("total_videos", len(video_urls))
+
+        callback = on_result
+        if summary is not None:
+            # Hitung status final lewat callback, bukan return value (yang bisa
+            # masih "transcoding"); callback bisa datang dari transcode thread.
+            # Selama konversi, video dihitung sebagai "transcoding".
+            summary_lock = threading.Lock()
+            transcoding_ids: Set[str] = set()
+            finished_ids: Set[str] = set()
+
+            def callback(result: Dict):
+                with summary_lock:
+                    summary[result["status"]] = summary.get(result["status"], 0) + 1
+                    video_id = result.get("video_id")
+                    if video_id in transcoding_ids:
+                        transcoding_ids.discard(video_id)
+                        summary["transcoding"] -= 1
+                    elif video_id:
+                        finished_ids.add(video_id)
+                if on_result:
+                    on_result(result)
 
-            # Sleep between downloads (kecuali video terakhir)
-            if idx < len(video_urls):
+        for idx, video_url in enumerate(video_urls, 1):
+            logger.info(f"\n--- [{channel_name}] Video {idx}/{len(video_urls)} ---")
+
+            result = self.download_video_audio(video_url, channel_name, on_result=callback)
+            if summary is None:
+                results.append(result)
+            elif result["status"] == "transcoding":
+                with summary_lock:
+                    # Final result bisa sudah masuk sebelum return (transcode cepat)
+                    if result["video_id"] in finished_ids:
+                        finished_ids.discard(result["video_id"])
+                    else:
+                        transcoding_ids.add(result["video_id"])
+                        summary["transcoding"] = summary.get("transcoding", 0) + 1
+            else:
+                with summary_lock:
+                    finished_ids.discard(result.get("video_id"))
+
+            # Sleep between downloads (kecuali video terakhir dan video dari dedup store)
+            if not (self.rate_limiter or self.identity_pool or result.get("dedup")) and idx < len(video_urls):
                 # Random sleep antara min dan max interval
-                import random
-                sleep_time = random.uniform(self.sleep_interval, self.max_sleep_interval)
+                if self.rate_controller:
+                    params = self.rate_controller.ydl_params()
+                    sleep_time = random.uniform(params['sleep_interval'], params['max_sleep_interval'])
+                else:
+                    sleep_time = random.uniform(self.sleep_interval, self.max_sleep_interval)
                 logger.info(f"Sleeping for {sleep_time:.1f} seconds before next download...")
                 time.sleep(sleep_time)
 
         return results
 
+    def close(self):
+        """
+        Tunggu transcode jobs selesai, lalu release pooled yt-dlp instances
+        (save cookies, close connections)
+        """
+        if self.transcoder:
+            self.transcoder.shutdown(wait=True)
+        if self.rate_controller:
+            self.rate_controller.close()
+        self.ydl_pool.close()
+        with self._identity_lock:
+            pools, self._identity_ydl_pools = list(self._identity_ydl_pools.values()), {}
+        for pool in pools:
+            pool.close()
+
     def print_stats(self):
         """Print download statistics"""
         logger.info("\n" + "="*60)
@@ -373,6 +1098,19 @@ class YTDownloader:
         logger.info(f"Successful: {self.stats['successful']}")
         logger.info(f"Failed: {self.stats['failed']}")
         logger.info(f"Skipped: {self.stats['skipped']}")
+        if self.dedup_store:
+            store = self.dedup_store.stats()
+            logger.info(f"Deduplicated: {self.stats['deduplicated']} "
+                        f"({store['objects']} objects, {store['object_bytes'] / 1024 / 1024:.1f} MB in store)")
+        for labels, stage in sorted(self._stage_seconds.stats().items()):
+            stage_name = dict(labels).get("stage")
+            logger.info(f"Stage {stage_name}: {stage['count']}x, "
+                        f"avg {stage['sum'] / stage['count']:.2f}s, total {stage['sum']:.1f}s")
+        logger.info(f"Downloaded: {self._downloaded_bytes.value() / 1024 / 1024:.1f} MB")
+        if self.identity_pool:
+            for identity in self.identity_pool.stats():
+                logger.info(f"Identity {identity['name']}: {identity['successes']} ok, "
+                            f"{identity['failures']} failed")
         logger.info("="*60)
 
 
@@ -392,6 +1130,7 @@ def main():
 
     print(f"\nResult: {json.dumps(result, indent=2, ensure_ascii=False)}")
     downloader.print_stats()
+    downloader.close()
 
 
 if __name__ == "__main__":